@@ -0,0 +1,98 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+import openpyxl
+from openpyxl.styles import PatternFill
+
+from bulk_writer import Highlight, Sheet, add_highlight, patch_workbook
+from workbook_reader import read_columns
+
+# ==========================================
+# 批量写入基准测试：10 万行
+#   5.自动生成数据.py 的写法 (逐格算浓度、设 number_format) vs bulk_writer 整列改进原表
+#   8.设置格式.py 的写法 (逐格 PatternFill) vs 条件格式 add_highlight
+# 运行: python excel/bench_bulk_writer.py
+# ==========================================
+N = 100_000
+
+
+def make_input(path):
+    rng = np.random.default_rng(0)
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet('Sheet1')
+    ws.append(['OH'])
+    ws.append(['序号', '峰面积', '浓度', '降解率', '备注'])
+    for i, (b, rate) in enumerate(zip(rng.uniform(0.1, 2, N).tolist(), rng.uniform(0, 1, N).tolist())):
+        ws.append([i + 1, b, None, rate, '正常'])
+    wb.save(path)
+
+
+def per_cell(path, out):
+    wb = openpyxl.load_workbook(path)
+    ws = wb.active
+    ws['C2'] = "浓度"
+    for row in ws.iter_rows(min_row=3, min_col=2, max_col=2):
+        cell_b = row[0]
+        cell_b.number_format = '0.00'
+        if isinstance(cell_b.value, (int, float)):
+            cell_c = ws.cell(row=cell_b.row, column=3)
+            cell_c.value = ((cell_b.value - 0.0667) / 0.0221) / 0.35
+            cell_c.number_format = '0.00'
+    wb.save(out)
+
+
+def bulk(path, out):
+    b = read_columns(path, [1], start_row=2)[:, 0]
+    ws = Sheet('Sheet1')
+    ws.set_cell(1, 2, "浓度")
+    ws.set_format(1, '0.00', first_row=2)
+    ws.set_column(2, ((b - 0.0667) / 0.0221) / 0.35, first_row=2, number_format='0.00')
+    patch_workbook(path, ws, output=out)
+
+
+def fill_per_cell(path):
+    wb = openpyxl.load_workbook(path)
+    ws = wb.active
+    red_fill = PatternFill(start_color='FFCCCC', end_color='FFCCCC', fill_type='solid')
+    for row in ws.iter_rows(min_row=3):
+        val = row[3].value
+        if isinstance(val, (int, float)) and val > 0.9:
+            for cell in row:
+                cell.fill = red_fill
+    wb.save(path)
+
+
+def timed(label, func, *args):
+    t0 = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - t0
+    print(f"{label:<34} {elapsed:>6.2f} s")
+    return elapsed
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, 'OH.xlsx')
+        make_input(src)
+        slow = timed(f"逐格计算 + number_format ({N:,} 行)", per_cell, src, os.path.join(tmp, 'a.xlsx'))
+        fast = timed("bulk_writer 整列 patch_workbook", bulk, src, os.path.join(tmp, 'b.xlsx'))
+        print(f"  快 {slow / fast:.1f} 倍")
+
+        # 两种写法的结果一致
+        a = openpyxl.load_workbook(os.path.join(tmp, 'a.xlsx'), read_only=True).active
+        b = openpyxl.load_workbook(os.path.join(tmp, 'b.xlsx'), read_only=True).active
+        for row_a, row_b in zip(a.iter_rows(max_row=2000, values_only=True), b.iter_rows(max_row=2000, values_only=True)):
+            # openpyxl 写浮点数的有效位数比 repr 少，数值按相对误差比
+            for x, y in zip(row_a, row_b):
+                assert x == y or np.isclose(x, y, rtol=1e-12), (row_a, row_b)
+
+        slow = timed("逐格 PatternFill 标红", fill_per_cell, os.path.join(tmp, 'a.xlsx'))
+        rule = Highlight.rows_where(3, '>', 0.9, first_row=2, last_col=4)
+        fast = timed("条件格式 add_highlight", add_highlight, os.path.join(tmp, 'b.xlsx'), 'Sheet1', rule)
+        print(f"  快 {slow / fast:.1f} 倍")
+
+
+if __name__ == '__main__':
+    main()
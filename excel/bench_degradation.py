@@ -0,0 +1,76 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from degradation import summarize
+from synthetic_workbook import synthetic_blocks
+from workbook_reader import PollutantBlocks
+
+# ==========================================
+# 降解率汇总基准测试：5000 个污染物 x 50 行，
+# 原来 6.复杂的排序.py 的逐块循环 和 degradation.summarize 向量化版本对比 (并核对结果一致)
+# 运行: python excel/bench_degradation.py
+# ==========================================
+N_BLOCKS = 5000
+N_ROWS = 50
+
+names, t, conc, _ = synthetic_blocks(N_BLOCKS, N_ROWS)
+time_cols = np.tile(t[:, None], (1, N_BLOCKS))
+# 造一些缺数据的情况：缺 0min、缺 140min、两个都缺、初始浓度为 0
+rng = np.random.default_rng(1)
+conc[0, rng.choice(N_BLOCKS, 50, replace=False)] = np.nan
+conc[7, rng.choice(N_BLOCKS, 50, replace=False)] = np.nan
+time_cols[0, rng.choice(N_BLOCKS, 20, replace=False)] = np.nan
+conc[0, rng.choice(N_BLOCKS, 20, replace=False)] = 0.0
+blocks = PollutantBlocks(names, time_cols, conc)
+
+
+def loop_summary(blocks):
+    """原脚本的写法：每个污染物建一个 DataFrame，布尔筛选找 0min 和 140min。"""
+    summary_list = []
+    for name, time_col, conc_col in blocks:
+        block_df = pd.DataFrame({'time': time_col, 'conc': conc_col})
+        block_df['time'] = pd.to_numeric(block_df['time'], errors='coerce')
+        block_df['conc'] = pd.to_numeric(block_df['conc'], errors='coerce')
+        block_df.dropna(subset=['time', 'conc'], inplace=True)
+        row_0 = block_df[block_df['time'] == 0]
+        row_140 = block_df[block_df['time'] == 140]
+        c0 = c140 = rate = None
+        note = "正常"
+        if not row_0.empty:
+            c0 = row_0.iloc[0]['conc']
+        else:
+            note = "缺0min数据"
+        if not row_140.empty:
+            c140 = row_140.iloc[0]['conc']
+        else:
+            note = "缺140min数据" if note == "正常" else note + ", 缺140min"
+        if c0 is not None and c140 is not None:
+            if c0 != 0:
+                rate = 1 - (c140 / c0)
+            else:
+                note = "初始浓度为0"
+                rate = 0
+        summary_list.append({'污染物名称': name, '初始浓度(0min)': c0, '最终浓度(140min)': c140,
+                             '降解率': rate, '备注': note})
+    return pd.DataFrame(summary_list)
+
+
+t0 = time.perf_counter()
+expected = loop_summary(blocks)
+print(f"逐块循环 ({N_BLOCKS} 个污染物): {time.perf_counter() - t0:.2f} s")
+
+best = np.inf
+for _ in range(5):
+    t0 = time.perf_counter()
+    result = summarize(blocks)
+    best = min(best, time.perf_counter() - t0)
+print(f"向量化 summarize:            {best * 1000:.1f} ms")
+
+pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+print("结果一致; 备注统计:", result['备注'].value_counts().to_dict())
+
+t0 = time.perf_counter()
+summarize(blocks, times=(0, 20, 60, 100, 140))
+print(f"5 个时间点:                  {(time.perf_counter() - t0) * 1000:.1f} ms")
@@ -0,0 +1,67 @@
+import time
+
+import numpy as np
+from scipy import stats
+
+from kinetics import fit_blocks
+from synthetic_workbook import synthetic_blocks
+from workbook_reader import PollutantBlocks
+
+# ==========================================
+# 动力学批量拟合基准测试：500 个污染物 x 50 行，
+# 逐个污染物调用 stats.linregress (原来 9.线性回归分析.py 的做法) 和 kinetics.fit_blocks 对比，
+# 再测 1000 次 bootstrap 置信区间 (单进程 / 多进程，两者结果应完全相同)
+# 运行: python excel/bench_kinetics.py
+# ==========================================
+N_BLOCKS = 500
+N_ROWS = 50
+
+
+def loop_fit(blocks):
+    slopes = []
+    for _, t, c in blocks:
+        ok = ~np.isnan(t) & ~np.isnan(c)
+        t, c = t[ok], c[ok]
+        c0 = c[np.argmin(t)]
+        keep = c > 0
+        t, y = t[keep], np.log(c[keep] / c0)
+        fit = t > 0
+        slopes.append(stats.linregress(t[fit], y[fit]))
+    return slopes
+
+
+def main():
+    names, t, conc, k_true = synthetic_blocks(N_BLOCKS, N_ROWS)
+    blocks = PollutantBlocks(names, np.tile(t[:, None], (1, N_BLOCKS)), conc)
+
+    t0 = time.perf_counter()
+    expected = loop_fit(blocks)
+    print(f"逐个 linregress ({N_BLOCKS} 个污染物): {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    t0 = time.perf_counter()
+    table = fit_blocks(blocks)
+    print(f"fit_blocks 一次算完:               {(time.perf_counter() - t0) * 1000:.0f} ms")
+
+    assert np.allclose(table['速率常数k(1/min)'], [-r.slope for r in expected])
+    assert np.allclose(table['截距'], [r.intercept for r in expected])
+    assert np.allclose(table['R2'], [r.rvalue ** 2 for r in expected])
+    assert np.allclose(table['k标准误'], [r.stderr for r in expected])
+    assert np.allclose(table['p值'], [r.pvalue for r in expected], rtol=1e-6, atol=1e-300)
+    print("和 linregress 结果一致; k 的最大相对误差 (相对真实值):",
+          f"{np.max(np.abs(table['速率常数k(1/min)'] / k_true - 1)):.3%}")
+
+    tables = []
+    for workers in (1, None):
+        t0 = time.perf_counter()
+        table = fit_blocks(blocks, bootstrap=1000, workers=workers)
+        label = "单进程" if workers == 1 else "多进程"
+        print(f"1000 次 bootstrap ({label}):        {time.perf_counter() - t0:.2f} s")
+        tables.append(table)
+    # 同一个 seed，置信区间和进程数无关
+    assert tables[0][['k下限', 'k上限']].equals(tables[1][['k下限', 'k上限']])
+    inside = (table['k下限'] <= k_true) & (k_true <= table['k上限'])
+    print(f"95% 置信区间覆盖真实 k 的比例: {inside.mean():.1%}")
+
+
+if __name__ == '__main__':
+    main()
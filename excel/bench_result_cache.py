@@ -0,0 +1,82 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from bulk_writer import Sheet, patch_workbook
+from degradation import summarize
+from header_index import header_index
+from kinetics import fit_blocks
+from result_cache import ResultCache
+from synthetic_workbook import write_synthetic_workbook
+from workbook_reader import read_blocks
+
+# ==========================================
+# 结果缓存基准测试：500 个污染物 x 50 行，汇总 + 动力学拟合 (含 200 次 bootstrap)
+#   第一次运行 (全部计算) / 数据没变 (不读数据) / 改了其中 1 个污染物的一个浓度 (只重算这一个)
+# 运行: python excel/bench_result_cache.py
+# ==========================================
+N_BLOCKS = 500
+N_ROWS = 50
+BOOTSTRAP = 200
+
+
+def compute_summary(blocks):
+    return summarize(blocks, times=(0, 140))
+
+
+def compute_kinetics(blocks):
+    return fit_blocks(blocks, bootstrap=BOOTSTRAP, workers=1)
+
+
+def run(path, cache_dir):
+    """返回 (汇总表, 动力学表, 读数据秒数, 计算秒数, 重新计算的污染物数)。"""
+    index = header_index(path, cache_dir=cache_dir)
+    cache = ResultCache(path, index.sheet, cache_dir=cache_dir)
+    read = [0.0]
+
+    def load_blocks():
+        t0 = time.perf_counter()
+        blocks = read_blocks(path, index.sheet, blocks=index.layout_blocks())
+        read[0] += time.perf_counter() - t0
+        return blocks
+
+    t0 = time.perf_counter()
+    summary = cache.table('summary', {'times': (0, 140)}, compute_summary, load_blocks)
+    kinetics = cache.table('kinetics', {'bootstrap': BOOTSTRAP}, compute_kinetics, load_blocks)
+    cache.save()
+    total = time.perf_counter() - t0
+    return summary, kinetics, read[0], total - read[0], cache.computed['kinetics']
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'pollution degradation.xlsx')
+        cache_dir = os.path.join(tmp, '.cache')
+        write_synthetic_workbook(path, N_BLOCKS, N_ROWS)
+
+        print(f"{'':<22}{'读数据':>8}{'计算':>10}  重新计算")
+        for label in ("第一次运行", "数据没变", f"改了 1/{N_BLOCKS} 个污染物"):
+            if label.startswith("改了"):
+                # 改 P0123 在 60min 的浓度
+                _, conc_col = header_index(path, cache_dir=cache_dir).block('P0123')
+                patch_workbook(path, Sheet('Sheet1').set_cell(5, conc_col, 1.5))
+            summary, kinetics, read, compute, n = run(path, cache_dir)
+            print(f"{label:<22}{read:>7.2f}s{compute * 1000:>8.1f}ms  {n}/{N_BLOCKS}")
+            if label == "第一次运行":
+                full = compute
+        print(f"只重算一个污染物的计算时间约为全部重算的 1/{full / max(compute, 1e-9):.0f}")
+
+        # 和不用缓存整表重算的结果一致 (bootstrap 的置信区间每次抽样不同，不比较)
+        blocks = read_blocks(path)
+        pd.testing.assert_frame_equal(summary, compute_summary(blocks))
+        expected = fit_blocks(blocks)
+        pd.testing.assert_frame_equal(kinetics[expected.columns], expected)
+        assert np.all(kinetics['k下限'] <= kinetics['k上限'])
+        print("和整表重算的结果一致")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from synthetic_workbook import write_synthetic_workbook
+from workbook_reader import has_calamine, read_blocks
+
+# ==========================================
+# 工作簿读取基准测试：100 个污染物 x 2000 行 (约 100 万个单元格)，
+# 整表 pd.read_excel / openpyxl 全量加载 和 read_blocks 流式读取 (各引擎) 的耗时与峰值内存
+# 每种方法在单独的子进程里跑，峰值内存 (ru_maxrss) 互不影响
+# 运行: python excel/bench_workbook_reader.py
+# ==========================================
+N_BLOCKS = 100
+N_ROWS = 2000
+
+
+def run_one(method, path):
+    if method == 'pandas':
+        import pandas as pd
+        df = pd.read_excel(path, header=None)
+        result = df.shape
+    elif method == 'openpyxl':
+        import openpyxl
+        wb = openpyxl.load_workbook(path, data_only=True)
+        result = len(list(wb.worksheets[0].values))
+    else:
+        blocks = read_blocks(path, engine=_engine(method))
+        result = blocks.conc.shape
+    return result
+
+
+def _engine(method):
+    return 'openpyxl' if method == 'openpyxl-stream' else method
+
+
+def child(method, path):
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    t0 = time.perf_counter()
+    run_one(method, path)
+    elapsed = time.perf_counter() - t0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 上 ru_maxrss 单位是 KB，macOS 上是字节
+    scale = 1 if sys.platform == 'darwin' else 1024
+    print(elapsed, (peak - baseline) * scale / 2 ** 20, peak * scale / 2 ** 20)
+
+
+def main():
+    methods = [('pandas', "pd.read_excel 整表"), ('openpyxl', "openpyxl 全量加载"),
+               ('openpyxl-stream', "read_blocks (openpyxl 流式)"), ('xml', "read_blocks (xml)")]
+    if has_calamine():
+        methods.append(('calamine', "read_blocks (calamine)"))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'bench.xlsx')
+        t0 = time.perf_counter()
+        _, _, conc, _ = write_synthetic_workbook(path, N_BLOCKS, N_ROWS)
+        print(f"生成工作簿 ({N_BLOCKS} 块 x {N_ROWS} 行, {os.path.getsize(path) / 2 ** 20:.1f} MB): "
+              f"{time.perf_counter() - t0:.2f} s")
+
+        # 先核对一次结果：各引擎读出来的浓度都应该和写进去的一样
+        for method, _ in methods[2:]:
+            assert np.allclose(read_blocks(path, engine=_engine(method)).conc, conc), method
+
+        print(f"{'方法':<28} {'耗时':>8} {'新增内存':>10} {'进程峰值':>10}")
+        for method, label in methods:
+            out = subprocess.run([sys.executable, __file__, '--child', method, path],
+                                 capture_output=True, text=True, check=True).stdout.split()
+            elapsed, grown, peak = map(float, out)
+            print(f"{label:<28} {elapsed:>7.2f}s {grown:>8.0f} MB {peak:>8.0f} MB")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 4 and sys.argv[1] == '--child':
+        child(sys.argv[2], sys.argv[3])
+    else:
+        main()
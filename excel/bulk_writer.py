@@ -0,0 +1,728 @@
+import contextlib
+import datetime
+import io
+import os
+import re
+import zipfile
+from xml.sax.saxutils import escape, quoteattr, unescape
+
+import numpy as np
+
+from workbook_reader import sheet_parts
+
+# ==========================================
+# 批量写 Excel：整列用 NumPy 算好，直接流式生成工作表 XML；标色用条件格式 (一条规则管一整片区域)
+# ==========================================
+# openpyxl 逐个单元格设值、设 number_format、设 PatternFill，10 万行要十几二十秒；
+# 这里每一列一次性转成 XML 片段，按行拼起来边生成边压缩写盘。两种用法：
+#   write_workbook(path, sheets) — 写一个新的工作簿
+#   patch_workbook(path, sheet)  — 改已有的工作簿：只把要改的列拼进原来的行 XML 里，
+#                                  其余单元格、样式、别的 sheet 都按原样拷贝，不用把整个工作簿解析进内存
+_MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+_REL_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+_PKG_REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_EXCEL_EPOCH = np.datetime64('1899-12-30', 'D')
+_CHUNK = 1 << 20
+# 每一行、每个单元格都要用的几个正则先编译好
+_ROW_NUM = re.compile(r'\sr="(\d+)"')
+_CELL_COL = re.compile(r'\sr="([A-Z]+)')
+_SPANS = re.compile(r'\sspans="[^"]*"')
+_STYLE = re.compile(r'\ss="\d+"')
+
+# Excel 内置的数字格式 (不用写进 styles.xml)
+BUILTIN_FORMATS = {'General': 0, '0': 1, '0.00': 2, '#,##0': 3, '#,##0.00': 4, '0%': 9, '0.00%': 10,
+                   '0.00E+00': 11, 'mm-dd-yy': 14}
+DATE_FORMAT = 'yyyy-mm-dd'
+DATETIME_FORMAT = 'yyyy-mm-dd h:mm:ss'
+
+
+def column_letter(col):
+    """0 起的列号 -> Excel 列名 (0 -> A, 26 -> AA)。"""
+    letters = ''
+    col += 1
+    while col:
+        col, rem = divmod(col - 1, 26)
+        letters = chr(65 + rem) + letters
+    return letters
+
+
+def column_index(letters):
+    """Excel 列名 -> 0 起的列号。"""
+    idx = 0
+    for ch in letters:
+        idx = idx * 26 + ord(ch) - 64
+    return idx - 1
+
+
+class Highlight:
+    """
+    条件格式：formula 为真的单元格填充 color。formula 按 sqref 左上角单元格来写，
+    比如 sqref='A2:E1048576'、formula='AND(ISNUMBER($D2),$D2>0.9)' 就是 D 列大于 0.9 的整行标色。
+    """
+
+    def __init__(self, sqref, formula, color='FFCCCC'):
+        self.sqref = sqref
+        self.formula = formula
+        self.color = color.upper()
+
+    @classmethod
+    def rows_where(cls, col, op, value, first_row, last_col, color='FFCCCC'):
+        """
+        第 col 列 (0 起) 满足 `op value` 的整行 (A 列到 last_col 列) 标色，从 first_row 行 (0 起) 到表尾。
+        和逐格判断 isinstance(val, (int, float)) 一样，只比较数字 (文字和空单元格不标)。
+        """
+        ref = f"${column_letter(col)}{first_row + 1}"
+        sqref = f"A{first_row + 1}:{column_letter(last_col)}1048576"
+        return cls(sqref, f"AND(ISNUMBER({ref}),{ref}{op}{value})", color)
+
+    def dxf(self):
+        return (f'<dxf><fill><patternFill patternType="solid"><fgColor rgb="FF{self.color}"/>'
+                f'<bgColor rgb="FF{self.color}"/></patternFill></fill></dxf>')
+
+    def xml(self, dxf_id, priority):
+        return (f'<conditionalFormatting sqref="{self.sqref}">'
+                f'<cfRule type="expression" dxfId="{dxf_id}" priority="{priority}">'
+                f'<formula>{escape(self.formula)}</formula></cfRule></conditionalFormatting>')
+
+
+class Sheet:
+    """
+    要写出 (或要改) 的一个工作表。行列号都从 0 开始。
+    set_column: 某一列从 first_row 行开始的一段设成数组里的值 (NaN / None / 空字符串写成空单元格)；
+    set_format: 一段单元格的数字格式 (只改格式不改值，比如原表里的 B 列显示两位小数)；
+    highlight:  加一条条件格式。
+    """
+
+    def __init__(self, name='Sheet1'):
+        self.name = name
+        self.columns = {}  # 列号 -> [(首行, 数组), ...]
+        self.formats = {}  # 列号 -> [(首行, 末行 (不含，None 表示到表尾), 格式), ...]
+        self.highlights = []
+
+    def set_column(self, col, values, first_row=0, number_format=None):
+        values = np.asarray(values)
+        self.columns.setdefault(col, []).append((first_row, values))
+        if number_format is not None:
+            self.set_format(col, number_format, first_row, first_row + len(values))
+        return self
+
+    def set_cell(self, row, col, value, number_format=None):
+        return self.set_column(col, np.array([value], dtype=object), row, number_format)
+
+    def set_format(self, col, number_format, first_row=0, last_row=None):
+        self.formats.setdefault(col, []).append((first_row, last_row, number_format))
+        return self
+
+    def highlight(self, rule):
+        self.highlights.append(rule)
+        return self
+
+    @property
+    def n_rows(self):
+        """set_column 写到的最后一行 + 1。"""
+        return max((first + len(values) for parts in self.columns.values() for first, values in parts), default=0)
+
+    @property
+    def n_cols(self):
+        return max(list(self.columns) + list(self.formats), default=-1) + 1
+
+    def _column_cells(self, col, n_rows, styles):
+        """这一列每一行的 <c> 片段：None 表示这一行没改，'' 表示写成空单元格。"""
+        formats = [None] * n_rows
+        for first, last, number_format in self.formats.get(col, ()):
+            last = n_rows if last is None else min(last, n_rows)
+            formats[first:last] = [number_format] * max(last - first, 0)
+        letter = column_letter(col)
+        cells = [None] * n_rows
+        for first, values in self.columns.get(col, ()):
+            cells[first:first + len(values)] = _array_cells(letter, first, values, formats[first:], styles)
+        return cells
+
+    def _format_at(self, col, row):
+        """set_format 给这一格指定的数字格式，没有为 None。"""
+        for first, last, number_format in reversed(self.formats.get(col, ())):
+            if first <= row and (last is None or row < last):
+                return number_format
+        return None
+
+    def _last_edited_row(self):
+        """最后一个要动的行 + 1 (有只改格式、一直到表尾的，就是无穷大)。"""
+        lasts = [last for parts in self.formats.values() for _, last, _ in parts]
+        if any(last is None for last in lasts):
+            return float('inf')
+        return max([self.n_rows] + lasts)
+
+    def _write(self, out, styles):
+        n_rows = self.n_rows
+        cols = sorted(self.columns)
+        out.write(f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                  f'<worksheet xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}">'
+                  f'<dimension ref="A1:{column_letter(max(self.n_cols - 1, 0))}{max(n_rows, 1)}"/>'
+                  '<sheetData>'.encode())
+        columns = [self._column_cells(col, n_rows, styles) for col in cols]
+        chunk = []
+        for r, cells in enumerate(zip(*columns)):
+            body = ''.join(c for c in cells if c)
+            if body:
+                chunk.append(f'<row r="{r + 1}">{body}</row>')
+            if len(chunk) >= 4096:
+                out.write(''.join(chunk).encode())
+                chunk = []
+        out.write((''.join(chunk) + '</sheetData>').encode())
+        for priority, rule in enumerate(self.highlights, start=1):
+            out.write(rule.xml(styles.dxf(rule), priority).encode())
+        out.write(b'</worksheet>')
+
+
+def _cell(ref, v, s=''):
+    """单个 Python 值 -> <c> 片段，s 是样式属性 (' s="1"' 或 '')。"""
+    if v is None:
+        return ''
+    if isinstance(v, (bool, np.bool_)):
+        return f'<c r="{ref}"{s} t="b"><v>{int(v)}</v></c>'
+    if isinstance(v, (int, np.integer)):
+        return f'<c r="{ref}"{s}><v>{int(v)}</v></c>'
+    if isinstance(v, (float, np.floating)):
+        return f'<c r="{ref}"{s}><v>{float(v)!r}</v></c>' if np.isfinite(v) else ''
+    if isinstance(v, datetime.datetime):
+        serial = (v - datetime.datetime(1899, 12, 30)).total_seconds() / 86400
+        return f'<c r="{ref}"{s}><v>{serial!r}</v></c>'
+    if isinstance(v, datetime.date):
+        return f'<c r="{ref}"{s}><v>{(v - datetime.date(1899, 12, 30)).days}</v></c>'
+    text = str(v)
+    return f'<c r="{ref}"{s} t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>' if text else ''
+
+
+def _array_cells(letter, first, values, formats, styles):
+    """一整段 NumPy 数组 -> <c> 片段列表，数字类型整列一起转成文本。没指定格式的日期用默认的日期格式。"""
+    n = len(values)
+    refs = [f"{letter}{r}" for r in range(first + 1, first + n + 1)]
+    formats = list(formats[:n]) + [None] * (n - len(formats))
+    kind = values.dtype.kind
+    default = None
+    if kind == 'M':
+        whole_days = (values.astype('datetime64[D]') == values) | np.isnat(values)
+        default = DATE_FORMAT if whole_days.all() else DATETIME_FORMAT
+        values = np.where(np.isnat(values), np.nan, (values - _EXCEL_EPOCH) / np.timedelta64(1, 'D'))
+        kind = 'f'
+    if kind == 'O':
+        return [_cell(ref, v, styles.attr(f, v)) for ref, v, f in zip(refs, values.tolist(), formats)]
+    attrs = [styles.attr(f, default=default) for f in formats]
+    if kind == 'f':
+        ok = np.isfinite(values).tolist()
+        return [f'<c r="{ref}"{s}><v>{t}</v></c>' if k else ''
+                for ref, s, t, k in zip(refs, attrs, values.astype(str).tolist(), ok)]
+    if kind in 'iu':
+        return [f'<c r="{ref}"{s}><v>{t}</v></c>' for ref, s, t in zip(refs, attrs, values.astype(str).tolist())]
+    if kind == 'b':
+        return [f'<c r="{ref}"{s} t="b"><v>{int(t)}</v></c>' for ref, s, t in zip(refs, attrs, values.tolist())]
+    return [f'<c r="{ref}"{s} t="inlineStr"><is><t xml:space="preserve">{escape(t)}</t></is></c>' if t else ''
+            for ref, s, t in zip(refs, attrs, values.astype(str).tolist())]
+
+
+class _Styles:
+    """
+    写出时用到的单元格样式 (cellXfs) 和条件格式填充 (dxfs)。
+    base 是已有工作簿的 styles.xml (改已有工作簿时)：新的样式都由原有的样式换一个数字格式得到 (字体、填充、
+    边框不变)，追加在原有的后面，原有的样式编号不变；一模一样的样式已经有了就直接用。
+    """
+
+    def __init__(self, base=None):
+        self.base = base
+        self.prefix = p = _prefix(base, 'styleSheet') if base else ''
+        self.custom = {}    # 新加的自定义格式 -> numFmtId
+        self.known = {}     # 原有的自定义格式 -> numFmtId
+        self.next_fmt_id = 164
+        self.xfs = ['<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>']
+        self.base_fills = []
+        self.fills = []     # 新加的 dxf 片段
+        self._attrs = {}    # 格式 -> ' s="n"'
+        self._derived = {}  # (原样式号, numFmtId) -> 样式号
+        if base:
+            self.xfs = re.findall(rf'<{p}xf\b[^>]*?(?:/>|>.*?</{p}xf>)', _inner(base, p, 'cellXfs') or '', re.S)
+            for el in re.findall(rf'<{p}numFmt\s[^>]*>', _inner(base, p, 'numFmts') or ''):
+                fmt_id = int(re.search(r'numFmtId="(\d+)"', el).group(1))
+                code = re.search(r'formatCode="([^"]*)"', el)
+                if code:
+                    self.known[unescape(code.group(1), {'&quot;': '"'})] = fmt_id
+                self.next_fmt_id = max(self.next_fmt_id, fmt_id + 1)
+            self.base_fills = re.findall(rf'<{p}dxf[\s>].*?</{p}dxf>|<{p}dxf/>', _inner(base, p, 'dxfs') or '', re.S)
+        self.n_xfs = len(self.xfs)
+
+    def attr(self, number_format, value=None, default=None):
+        """新单元格的样式属性 (' s="1"' 或 '')。没指定格式时，日期值用默认的日期格式。"""
+        if number_format is None:
+            if isinstance(value, datetime.datetime):
+                number_format = DATETIME_FORMAT
+            elif isinstance(value, datetime.date):
+                number_format = DATE_FORMAT
+            else:
+                number_format = default
+        if number_format is None:
+            return ''
+        attr = self._attrs.get(number_format)
+        if attr is None:
+            s = self.derive(0, number_format)
+            attr = self._attrs[number_format] = f' s="{s}"' if s else ''
+        return attr
+
+    def format_id(self, number_format):
+        fmt_id = BUILTIN_FORMATS.get(number_format, self.known.get(number_format))
+        if fmt_id is None:
+            fmt_id = self.custom.get(number_format)
+            if fmt_id is None:
+                fmt_id = self.custom[number_format] = self.next_fmt_id
+                self.next_fmt_id += 1
+        return fmt_id
+
+    def derive(self, s, number_format):
+        """样式 s 换成数字格式 number_format 后的样式号 (number_format 也可以直接是 numFmtId)。"""
+        fmt_id = number_format if isinstance(number_format, int) else self.format_id(number_format)
+        key = (s, fmt_id)
+        derived = self._derived.get(key)
+        if derived is None:
+            xf = self.xfs[s] if s < len(self.xfs) else self.xfs[0]
+            if self._format_of(xf) == fmt_id:
+                derived = s
+            else:
+                xf = re.sub(r'\snumFmtId="\d+"', f' numFmtId="{fmt_id}"', xf, count=1)
+                if 'applyNumberFormat=' in xf:
+                    xf = re.sub(r'applyNumberFormat="\w+"', 'applyNumberFormat="1"', xf, count=1)
+                else:
+                    xf = re.sub(r'(\s*/?>)', r' applyNumberFormat="1"\1', xf, count=1)
+                if xf not in self.xfs:
+                    self.xfs.append(xf)
+                derived = self.xfs.index(xf)
+            self._derived[key] = derived
+        return derived
+
+    def merge(self, old, new):
+        """
+        已有单元格 (样式号 old) 换成新值 (样式号 new，由 attr 得到) 后的样式号：
+        和 openpyxl 给单元格赋值一样保留原来的字体、填充、边框，新值指定了数字格式时只换数字格式。
+        """
+        if not old:
+            return new
+        if not new:
+            return old
+        return self.derive(old, self._format_of(self.xfs[new]))
+
+    def format_of(self, s):
+        """样式 s 的 numFmtId。"""
+        return self._format_of(self.xfs[s]) if s < len(self.xfs) else 0
+
+    @staticmethod
+    def _format_of(xf):
+        m = re.search(r'\snumFmtId="(\d+)"', xf)
+        return int(m.group(1)) if m else 0
+
+    def dxf(self, rule):
+        xml = _prefixed(rule.dxf(), self.prefix)
+        # 一模一样的填充已经有了就直接用 (重复运行不会让 styles.xml 越来越长)
+        if xml in self.base_fills:
+            return self.base_fills.index(xml)
+        if xml not in self.fills:
+            self.fills.append(xml)
+        return len(self.base_fills) + self.fills.index(xml)
+
+    def _new_num_fmts(self):
+        return [f'<numFmt numFmtId="{i}" formatCode={quoteattr(code)}/>' for code, i in self.custom.items()]
+
+    def xml(self):
+        if self.base is not None:
+            p = self.prefix
+            xml = _extend(self.base, p, 'numFmts', 'numFmt', [_prefixed(x, p) for x in self._new_num_fmts()],
+                          before=('fonts', 'fills', 'borders', 'cellStyleXfs', 'cellXfs'))
+            xml = _extend(xml, p, 'cellXfs', 'xf', self.xfs[self.n_xfs:],
+                          before=('cellStyles', 'dxfs', 'tableStyles', 'colors', 'extLst'))
+            return _extend(xml, p, 'dxfs', 'dxf', self.fills, before=('tableStyles', 'colors', 'extLst'))
+        num_fmts = self._new_num_fmts()
+        return (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<styleSheet xmlns="{_MAIN_NS}">'
+                + (f'<numFmts count="{len(num_fmts)}">{"".join(num_fmts)}</numFmts>' if num_fmts else '')
+                + '<fonts count="1"><font><sz val="11"/><name val="Calibri"/><family val="2"/></font></fonts>'
+                '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+                '<fill><patternFill patternType="gray125"/></fill></fills>'
+                '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+                '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+                f'<cellXfs count="{len(self.xfs)}">{"".join(self.xfs)}</cellXfs>'
+                '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+                f'<dxfs count="{len(self.fills)}">{"".join(self.fills)}</dxfs>'
+                '</styleSheet>')
+
+
+@contextlib.contextmanager
+def _replacing(path):
+    """给出 path 旁边的临时文件名，with 块正常结束后改名替换 path；出错时删掉临时文件，path 原样不动。"""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp)
+        raise
+
+
+# ---------- 新建工作簿 ----------
+def write_workbook(path, sheets, compresslevel=1):
+    """
+    把若干个 Sheet 写成一个新的 .xlsx (边生成边压缩，不在内存里拼整张表)。
+    先写临时文件再改名，写到一半出错不会留下半个文件。
+    """
+    if isinstance(sheets, Sheet):
+        sheets = [sheets]
+    styles = _Styles()
+    with _replacing(path) as tmp, zipfile.ZipFile(tmp, 'w', zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as z:
+        for i, sheet in enumerate(sheets, start=1):
+            with z.open(f'xl/worksheets/sheet{i}.xml', 'w', force_zip64=True) as out:
+                sheet._write(out, styles)
+        z.writestr('xl/styles.xml', styles.xml())
+        z.writestr('xl/workbook.xml',
+                   f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                   f'<workbook xmlns="{_MAIN_NS}" xmlns:r="{_REL_NS}"><sheets>'
+                   + ''.join(f'<sheet name={quoteattr(s.name)} sheetId="{i}" r:id="rId{i}"/>'
+                             for i, s in enumerate(sheets, start=1))
+                   + '</sheets></workbook>')
+        z.writestr('xl/_rels/workbook.xml.rels',
+                   f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<Relationships xmlns="{_PKG_REL_NS}">'
+                   + ''.join(f'<Relationship Id="rId{i}" Type="{_REL_NS}/worksheet" Target="worksheets/sheet{i}.xml"/>'
+                             for i in range(1, len(sheets) + 1))
+                   + f'<Relationship Id="rId{len(sheets) + 1}" Type="{_REL_NS}/styles" Target="styles.xml"/>'
+                   '</Relationships>')
+        z.writestr('_rels/.rels',
+                   f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<Relationships xmlns="{_PKG_REL_NS}">'
+                   f'<Relationship Id="rId1" Type="{_REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+                   '</Relationships>')
+        sheet_types = ''.join(
+            f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for i in range(1, len(sheets) + 1))
+        z.writestr('[Content_Types].xml',
+                   '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                   '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                   '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                   '<Default Extension="xml" ContentType="application/xml"/>'
+                   '<Override PartName="/xl/workbook.xml" '
+                   'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+                   '<Override PartName="/xl/styles.xml" '
+                   'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+                   + sheet_types + '</Types>')
+
+
+# ---------- 改已有的工作簿 ----------
+# 工作表 XML 里 conditionalFormatting 后面可能跟着的元素 (按 OOXML 规定的顺序)，新规则插在它们前面
+_AFTER_CF = ('dataValidations', 'hyperlinks', 'printOptions', 'pageMargins', 'pageSetup', 'headerFooter',
+             'rowBreaks', 'colBreaks', 'customProperties', 'cellWatches', 'ignoredErrors', 'smartTags',
+             'drawing', 'legacyDrawing', 'legacyDrawingHF', 'picture', 'oleObjects', 'controls',
+             'webPublishItems', 'tableParts', 'extLst')
+
+
+def patch_workbook(path, edits, output=None, replace_highlights=True, compresslevel=1):
+    """
+    把 edits (一个或几个 Sheet，按 Sheet.name 对应到已有的 sheet) 改进 path 里，写到 output (默认覆盖原文件)。
+    要改的 sheet 边解压边按行处理：不在修改范围内的行原样写回，范围内的行只替换 / 插入要改的单元格，
+    其余单元格连同原来的样式都不动。styles.xml 只追加新用到的数字格式和填充，其它文件原样拷贝。
+    replace_highlights=True 时先去掉这些 sheet 上原有的条件格式 (重复运行不会越叠越多)。
+    """
+    if isinstance(edits, Sheet):
+        edits = [edits]
+    members = dict(sheet_parts(path))
+    for sheet in edits:
+        if sheet.name not in members:
+            raise KeyError(f"Worksheet {sheet.name} does not exist.")
+    targets = {members[sheet.name]: sheet for sheet in edits}
+    output = path if output is None else output
+    with _replacing(output) as tmp, zipfile.ZipFile(path) as src, \
+            zipfile.ZipFile(tmp, 'w', zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as dst:
+        styles = _Styles(src.read('xl/styles.xml').decode('utf-8'))
+        # 改了单元格的值以后原来的公式计算链可能对不上，去掉让 Excel 打开时重建 (openpyxl 保存时也是这样)
+        drop_calc_chain = 'xl/calcChain.xml' in src.namelist() and any(sheet.columns for sheet in edits)
+        for info in src.infolist():
+            name = info.filename
+            if name in targets:
+                with src.open(info) as fin, dst.open(name, 'w', force_zip64=True) as fout:
+                    _patch_sheet(fin, fout, targets[name], styles, replace_highlights)
+            elif name == 'xl/styles.xml' or (drop_calc_chain and name == 'xl/calcChain.xml'):
+                continue
+            elif drop_calc_chain and name in ('[Content_Types].xml', 'xl/_rels/workbook.xml.rels'):
+                dst.writestr(info, _drop_calc_chain(src.read(info).decode('utf-8')).encode('utf-8'))
+            else:
+                _copy(src, dst, info)
+        dst.writestr('xl/styles.xml', styles.xml().encode('utf-8'))
+
+
+def write_sheet(path, sheet, output=None, compresslevel=1):
+    """
+    把 sheet 整张写进已有的工作簿：同名的 sheet 整张替换 (和 pandas ExcelWriter 的 if_sheet_exists='replace'
+    一样)，没有就加在最后。其余 sheet 和文件原样拷贝，不把工作簿解析进内存。
+    """
+    output = path if output is None else output
+    members = dict(sheet_parts(path))
+    with _replacing(output) as tmp, zipfile.ZipFile(path) as src, \
+            zipfile.ZipFile(tmp, 'w', zipfile.ZIP_DEFLATED, compresslevel=compresslevel) as dst:
+        names = set(src.namelist())
+        styles = _Styles(src.read('xl/styles.xml').decode('utf-8'))
+        member = members.get(sheet.name)
+        replace = member is not None
+        if not replace:
+            k = len(members) + 1
+            while f'xl/worksheets/sheet{k}.xml' in names:
+                k += 1
+            member = f'xl/worksheets/sheet{k}.xml'
+            rel_id = _new_rel_id(src.read('xl/_rels/workbook.xml.rels').decode('utf-8'))
+        # 替换掉的 sheet 原来的关系 (图表、批注等) 不再被引用；公式计算链也可能对不上，一起去掉
+        sheet_rels = f"{os.path.dirname(member)}/_rels/{os.path.basename(member)}.rels"
+        drop_calc_chain = replace and 'xl/calcChain.xml' in names
+        for info in src.infolist():
+            name = info.filename
+            if name in (member, sheet_rels, 'xl/styles.xml') or (drop_calc_chain and name == 'xl/calcChain.xml'):
+                continue
+            if name in ('[Content_Types].xml', 'xl/_rels/workbook.xml.rels', 'xl/workbook.xml'):
+                text = src.read(info).decode('utf-8')
+                if drop_calc_chain:
+                    text = _drop_calc_chain(text)
+                if not replace:
+                    text = _register_sheet(name, text, sheet.name, member, rel_id)
+                dst.writestr(info, text.encode('utf-8'))
+            else:
+                _copy(src, dst, info)
+        with dst.open(member, 'w', force_zip64=True) as fout:
+            sheet._write(fout, styles)
+        dst.writestr('xl/styles.xml', styles.xml().encode('utf-8'))
+
+
+def frame_sheet(df, name, index=False):
+    """DataFrame -> Sheet：第一行是列名，下面每列整列写出 (和 df.to_excel(index=False) 的排法一样)。"""
+    if index:
+        df = df.reset_index()
+    sheet = Sheet(name)
+    for col, (label, series) in enumerate(df.items()):
+        sheet.set_cell(0, col, str(label))
+        values = series.to_numpy()
+        if values.dtype.kind not in 'biufM':
+            values = values.astype(object)
+        sheet.set_column(col, values, first_row=1)
+    return sheet
+
+
+def add_highlight(path, sheet, rules, output=None, replace=True):
+    """给已有工作簿的 sheet 加条件格式 (Highlight)，其余内容不变。"""
+    edits = Sheet(sheet)
+    for rule in [rules] if isinstance(rules, Highlight) else rules:
+        edits.highlight(rule)
+    patch_workbook(path, edits, output=output, replace_highlights=replace)
+
+
+def _patch_sheet(fin, fout, sheet, styles, replace_highlights):
+    reader = io.TextIOWrapper(fin, encoding='utf-8')
+    buf = reader.read(_CHUNK)
+    p = _prefix(buf, 'worksheet')
+    start = re.compile(rf'<{p}sheetData(\s[^>]*?)?(/?)>')
+    while (m := start.search(buf)) is None:
+        more = reader.read(_CHUNK)
+        if not more:
+            raise ValueError("工作表里没有 sheetData")
+        buf += more
+    n_rows = sheet.n_rows
+    fout.write((_grow_dimension(buf[:m.start()], p, n_rows, sheet.n_cols) + f'<{p}sheetData>').encode('utf-8'))
+    buf = (f'</{p}sheetData>' if m.group(2) else '') + buf[m.end():]
+
+    cells = {col: sheet._column_cells(col, n_rows, styles) for col in sorted(sheet.columns)}
+    last_edit = sheet._last_edited_row()
+
+    def new_rows(lo, hi):
+        """原表里没有的行 (lo ~ hi) 中要写新值的，整行新建。"""
+        out = []
+        for r in range(lo, min(hi, n_rows)):
+            body = ''.join(column[r] or '' for column in cells.values())
+            if body:
+                out.append(_prefixed(f'<row r="{r + 1}">{body}</row>', p))
+        return ''.join(out)
+
+    row_re = re.compile(rf'<{p}row\b[^>]*?(?:/>|>.*?</{p}row>)', re.S)
+    cell_re = re.compile(rf'<{p}c\b[^>]*?(?:/>|>.*?</{p}c>)', re.S)
+    end_tag = f'</{p}sheetData>'
+    next_row = 0
+    while True:
+        pos = 0
+        out = []
+        for m in row_re.finditer(buf):
+            if buf[pos:m.start()].strip():
+                break
+            row_xml = m.group(0)
+            num = _ROW_NUM.search(row_xml[:row_xml.index('>')])
+            r = int(num.group(1)) - 1 if num else next_row
+            out.append(new_rows(next_row, r))
+            if r < last_edit:
+                row_xml = _patch_row(row_xml, r, p, cell_re, cells, sheet, styles)
+            out.append(row_xml)
+            next_row = r + 1
+            pos = m.end()
+        fout.write(''.join(out).encode('utf-8'))
+        buf = buf[pos:]
+        if buf.lstrip().startswith(end_tag):
+            break
+        more = reader.read(_CHUNK)
+        if not more:
+            raise ValueError("工作表 XML 不完整")
+        buf += more
+
+    tail = buf + reader.read()
+    tail = tail.replace(end_tag, new_rows(next_row, n_rows) + end_tag, 1)
+    if replace_highlights:
+        tail = re.sub(rf'<{p}conditionalFormatting[\s>].*?</{p}conditionalFormatting>', '', tail, flags=re.S)
+    if sheet.highlights:
+        priorities = [int(v) for v in re.findall(r'<(?:\w+:)?cfRule[^>]*\spriority="(\d+)"', tail)]
+        first = max(priorities, default=0) + 1
+        snippet = ''.join(_prefixed(rule.xml(styles.dxf(rule), first + i), p)
+                          for i, rule in enumerate(sheet.highlights))
+        tail = _insert_before(tail, p, _AFTER_CF, 'worksheet', snippet)
+    fout.write(tail.encode('utf-8'))
+
+
+def _patch_row(row_xml, r, p, cell_re, cells, sheet, styles):
+    """
+    把一行里要改的单元格换掉 / 插进去，其余单元格原样保留，按列排好。
+    换掉的单元格保留原来的样式 (只按新值的格式换数字格式)，和 openpyxl 给已有单元格赋值一样。
+    """
+    close = row_xml.index('>')
+    end = f'</{p}row>'
+    if row_xml[close - 1] == '/':  # <row r="5"/>
+        open_tag, body = row_xml[:close - 1] + '>', ''
+    else:
+        open_tag, body = row_xml[:close + 1], row_xml[close + 1:-len(end)]
+    by_col = {}
+    next_col = 0
+    for m in cell_re.finditer(body):
+        cell = m.group(0)
+        head = cell[:cell.index('>')]
+        ref = _CELL_COL.search(head)
+        col = column_index(ref.group(1)) if ref else next_col
+        next_col = col + 1
+        new = cells[col][r] if col in cells and r < len(cells[col]) else None
+        number_format = sheet._format_at(col, r) if col in sheet.formats else None
+        if new is None and number_format is None:
+            by_col[col] = cell
+            continue
+        style = _STYLE.search(head)
+        old = int(style.group(0)[4:-1]) if style else 0
+        if new is None:
+            cell = _set_style(cell, styles.derive(old, number_format))
+        elif new:
+            new_style = _STYLE.search(new[:new.index('>')])
+            new_style = int(new_style.group(0)[4:-1]) if new_style else 0
+            # 没指定格式的日期：原来有数字格式就沿用 (openpyxl 也只在原来是 General 时才换成日期格式)
+            keep = number_format is None and styles.format_of(old) != 0
+            cell = _set_style(_prefixed(new, p), old if keep else styles.merge(old, new_style))
+        elif old:
+            # 值清空了，样式还留着 (空单元格)
+            cell = f'<{p}c r="{column_letter(col)}{r + 1}" s="{old}"/>'
+        else:
+            continue
+        by_col[col] = cell
+    for col, column in cells.items():
+        if col not in by_col and r < len(column) and column[r]:
+            by_col[col] = _prefixed(column[r], p)
+    # 列变了以后 spans (只是给 Excel 的提示) 可能不准，去掉
+    open_tag = _SPANS.sub('', open_tag)
+    return open_tag + ''.join(by_col[c] for c in sorted(by_col)) + end
+
+
+def _copy(src, dst, info):
+    with src.open(info) as fin, dst.open(info, 'w', force_zip64=True) as fout:
+        while block := fin.read(_CHUNK):
+            fout.write(block)
+
+
+def _drop_calc_chain(text):
+    return re.sub(r'<(\w+:)?(Override|Relationship)\b[^>]*calcChain[^>]*/>', '', text)
+
+
+def _register_sheet(part, text, name, member, rel_id):
+    """新加的 sheet 登记到 workbook.xml / workbook.xml.rels / [Content_Types].xml 里。"""
+    target = member[len('xl/'):]
+    if part == '[Content_Types].xml':
+        p = _prefix(text, 'Types')
+        return _insert_before(text, p, (), 'Types', _prefixed(
+            f'<Override PartName="/{member}" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>', p))
+    if part == 'xl/_rels/workbook.xml.rels':
+        p = _prefix(text, 'Relationships')
+        return _insert_before(text, p, (), 'Relationships', _prefixed(
+            f'<Relationship Id="{rel_id}" Type="{_REL_NS}/worksheet" Target="{target}"/>', p))
+    p = _prefix(text, 'workbook')
+    sheet_ids = [int(v) for v in re.findall(r'\ssheetId="(\d+)"', text)]
+    r = re.search(rf'xmlns:(\w+)="{re.escape(_REL_NS)}"', text)
+    r_attr = f'{r.group(1)}:id' if r else f'xmlns:r="{_REL_NS}" r:id'
+    return _insert_before(text, p, (), 'sheets', _prefixed(
+        f'<sheet name={quoteattr(name)} sheetId="{max(sheet_ids, default=0) + 1}" '
+        f'{r_attr}="{rel_id}"/>', p))
+
+
+def _new_rel_id(rels):
+    """workbook.xml.rels 里还没用过的 rIdN。"""
+    used = set(re.findall(r'\sId="([^"]*)"', rels))
+    n = len(used) + 1
+    while f'rId{n}' in used:
+        n += 1
+    return f'rId{n}'
+
+
+def _set_style(cell, s):
+    close = cell.index('>')
+    if cell[close - 1] == '/':
+        close -= 1
+    return _STYLE.sub('', cell[:close]) + (f' s="{s}"' if s else '') + cell[close:]
+
+
+def _grow_dimension(head, p, n_rows, n_cols):
+    """<dimension ref="A1:F24"/> 扩大到包含新写的行列。"""
+    m = re.search(rf'<{p}dimension\s+ref="([A-Z]+)(\d+)(?::([A-Z]+)(\d+))?"', head)
+    if m is None:
+        return head
+    last_col = column_index(m.group(3) or m.group(1))
+    last_row = int(m.group(4) or m.group(2))
+    ref = f'{m.group(1)}{m.group(2)}:{column_letter(max(last_col, n_cols - 1))}{max(last_row, n_rows)}'
+    return head[:m.start(1)] + ref + head[m.end(m.lastindex):]
+
+
+# ---------- XML 文本小工具 ----------
+def _prefix(xml, root):
+    m = re.search(rf'<(\w+:)?{root}[\s>]', xml)
+    return (m.group(1) or '') if m else ''
+
+
+def _prefixed(xml, p):
+    """生成的片段都不带命名空间前缀；原文件用了前缀 (比如 x:) 时给元素名补上。"""
+    return re.sub(r'<(/?)(?=[A-Za-z])', rf'<\1{p}', xml) if p else xml
+
+
+def _inner(xml, p, tag):
+    m = re.search(rf'<{p}{tag}(\s[^>]*)?>(.*?)</{p}{tag}>', xml, re.S)
+    return m.group(2) if m else None
+
+
+def _insert_before(xml, p, candidates, closing, snippet):
+    for tag in candidates:
+        m = re.search(rf'<{p}{tag}[\s/>]', xml)
+        if m:
+            return xml[:m.start()] + snippet + xml[m.start():]
+    end = xml.rindex(f'</{p}{closing}>')
+    return xml[:end] + snippet + xml[end:]
+
+
+def _extend(xml, p, tag, child, items, before):
+    """在 <tag> 里追加子元素 items 并更新 count；没有 <tag> 时在 before 里第一个出现的元素前新建。"""
+    if not items:
+        return xml
+    m = re.search(rf'<{p}{tag}(\s[^>]*?)?(/?)>', xml)
+    if m is None:
+        block = f'<{p}{tag} count="{len(items)}">{"".join(items)}</{p}{tag}>'
+        return _insert_before(xml, p, before, 'styleSheet', block)
+    if m.group(2):  # <dxfs count="0"/>
+        xml = xml[:m.start()] + f'<{p}{tag}></{p}{tag}>' + xml[m.end():]
+        m = re.search(rf'<{p}{tag}(\s[^>]*)?>', xml)
+    end = xml.index(f'</{p}{tag}>', m.end())
+    count = len(re.findall(rf'<{p}{child}[\s>/]', xml[m.end():end]))
+    xml = xml[:end] + ''.join(items) + xml[end:]
+    return xml[:m.start()] + f'<{p}{tag} count="{count + len(items)}">' + xml[m.end():]
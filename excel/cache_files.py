@@ -0,0 +1,58 @@
+import contextlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# 工作簿旁边的 JSON 缓存文件：表头索引 (header_index.py) 和结果缓存 (result_cache.py) 共用
+# ==========================================
+# 缓存放在工作簿同目录的 .cache/<工作簿文件名><后缀>。
+# 读不到、格式坏了、版本不对都当作没有缓存；目录不可写就不写，下次重新算。
+
+
+def cache_path(path, suffix, cache_dir=None):
+    """工作簿 path 的缓存文件路径，cache_dir 默认是工作簿同目录的 .cache/。"""
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(path), '.cache')
+    return os.path.join(cache_dir, os.path.basename(path) + suffix)
+
+
+def load_json(target, version):
+    """读缓存文件，版本号 (data['version']) 对不上或者读不出来时为 None。"""
+    try:
+        with open(target, encoding='utf-8') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return data if isinstance(data, dict) and data.get('version') == version else None
+
+
+def dump_json(target, data):
+    """
+    写缓存文件：先写临时文件再改名，多个进程同时写也不会读到半个文件。
+    写不了 (目录不可写等) 时返回 False，不抛异常。
+    """
+    tmp = f"{target}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(data, ensure_ascii=False))  # 一次编码完再写，比 json.dump 边编码边写快得多
+        os.replace(tmp, target)
+    except OSError:
+        with contextlib.suppress(OSError):
+            os.remove(tmp)
+        return False
+    return True
+
+
+def jsonable(v):
+    """单元格的值 / 结果表里的一个值 -> 能写进 JSON 的值 (NumPy 数字转成 Python 数字，空值为 None，其余转字符串)。"""
+    if v is None or isinstance(v, (str, bool)):
+        return v
+    if isinstance(v, (int, np.integer)):
+        return int(v)
+    if isinstance(v, (float, np.floating)):
+        return float(v)
+    return None if pd.isna(v) else str(v)
@@ -0,0 +1,204 @@
+import datetime
+import os
+import tempfile
+import zipfile
+
+import numpy as np
+import openpyxl
+import pandas as pd
+from openpyxl.styles import Font, PatternFill
+
+from bulk_writer import Highlight, Sheet, add_highlight, frame_sheet, patch_workbook, write_sheet, write_workbook
+from workbook_reader import sheet_parts
+
+# ==========================================
+# bulk_writer 的正确性检查：写出 / 改过的工作簿用 openpyxl 读回来核对
+#   值和数字格式、原有的字体和填充、条件格式、没动的 sheet 原样保留、写到一半出错时原文件不变
+# 运行: python excel/check_bulk_writer.py (全部通过打印 ✅，否则 AssertionError)
+# ==========================================
+YELLOW = PatternFill(start_color='FFFFFF00', end_color='FFFFFF00', fill_type='solid')
+
+
+def make_input(path):
+    """两个 sheet：Sheet1 带字体、填充、数字格式，Other 是不会去改的 sheet。"""
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = 'Sheet1'
+    ws.append(['OH'])
+    ws.append(['序号', '峰面积', '浓度', '备注'])
+    for i in range(10):
+        ws.append([i + 1, 0.5 + i / 10, None, '正常'])
+    ws['B3'].font = Font(bold=True, color='FFFF0000')
+    ws['B3'].fill = YELLOW
+    ws['C3'].font = Font(italic=True)
+    ws['C3'].number_format = '0.000'
+    ws['D4'].fill = YELLOW
+    other = wb.create_sheet('Other')
+    other.append(['名称', '数值'])
+    other.append(['a', 1.25])
+    other['B2'].number_format = '0.0%'
+    other['A3'] = '=SUM(B2:B2)'
+    wb.save(path)
+
+
+def member_bytes(path, sheet):
+    """sheet 对应的工作表 XML 原始字节。"""
+    member = dict(sheet_parts(path))[sheet]
+    with zipfile.ZipFile(path) as z:
+        return z.read(member)
+
+
+def check_patch(tmp):
+    src = os.path.join(tmp, 'patch.xlsx')
+    make_input(src)
+    other = member_bytes(src, 'Other')
+
+    conc = np.arange(10) * 1.5
+    conc[4] = np.nan
+    edits = Sheet('Sheet1')
+    edits.set_cell(1, 2, '浓度')
+    edits.set_format(1, '0.00', first_row=2)
+    edits.set_column(2, conc, first_row=2, number_format='0.00')
+    edits.set_column(4, np.array(['2024-01-02', 'NaT'], dtype='datetime64[D]'), first_row=2)
+    edits.set_cell(12, 0, '合计')
+    patch_workbook(src, edits)
+
+    ws = openpyxl.load_workbook(src)['Sheet1']
+    assert ws['C2'].value == '浓度'
+    for i in range(10):
+        c = ws.cell(row=i + 3, column=3)
+        if i == 4:
+            assert c.value is None  # NaN 写成空单元格
+        else:
+            assert c.value == conc[i] and c.number_format == '0.00', (c.coordinate, c.value, c.number_format)
+        b = ws.cell(row=i + 3, column=2)
+        assert b.value == 0.5 + i / 10 and b.number_format == '0.00', (b.coordinate, b.value, b.number_format)
+        assert ws.cell(row=i + 3, column=4).value == '正常'
+    # 改了值 / 格式的单元格保留原来的字体和填充
+    assert ws['B3'].font.b and ws['B3'].font.color.rgb == 'FFFF0000'
+    assert ws['B3'].fill.fgColor.rgb == 'FFFFFF00'
+    assert ws['C3'].font.i
+    assert ws['D4'].fill.fgColor.rgb == 'FFFFFF00'
+    assert ws['E3'].value == datetime.datetime(2024, 1, 2) and ws['E3'].number_format == 'yyyy-mm-dd'
+    assert ws['E4'].value is None
+    assert ws['A13'].value == '合计'
+    assert ws['A1'].value == 'OH' and ws['A12'].value == 10
+    # 没改的 sheet 原样拷贝
+    assert member_bytes(src, 'Other') == other
+    other_ws = openpyxl.load_workbook(src)['Other']
+    assert other_ws['B2'].number_format == '0.0%' and other_ws['A3'].value == '=SUM(B2:B2)'
+
+
+def check_highlight(tmp):
+    src = os.path.join(tmp, 'highlight.xlsx')
+    make_input(src)
+    rule = Highlight.rows_where(1, '>', 0.9, first_row=2, last_col=3)
+    add_highlight(src, 'Sheet1', rule)
+    add_highlight(src, 'Sheet1', rule)  # 重复运行不会叠加
+
+    ws = openpyxl.load_workbook(src)['Sheet1']
+    rules = [(str(cf.sqref), r) for cf in ws.conditional_formatting for r in cf.rules]
+    assert len(rules) == 1, rules
+    sqref, r = rules[0]
+    assert sqref == 'A3:D1048576' and r.formula == ['AND(ISNUMBER($B3),$B3>0.9)']
+    assert r.dxf.fill.fgColor.rgb == 'FFFFCCCC'
+    # 条件格式不影响单元格自己的填充
+    assert ws['B3'].fill.fgColor.rgb == 'FFFFFF00'
+
+
+def check_write_sheet(tmp):
+    src = os.path.join(tmp, 'write_sheet.xlsx')
+    make_input(src)
+    sheet1, other = member_bytes(src, 'Sheet1'), member_bytes(src, 'Other')
+    df = pd.DataFrame({'污染物': ['A', 'B', 'C'], 'k': [0.1, np.nan, 0.3], 'n': [5, 6, 7]})
+
+    write_sheet(src, frame_sheet(df, '结果'))
+    wb = openpyxl.load_workbook(src)
+    assert wb.sheetnames == ['Sheet1', 'Other', '结果']
+    rows = list(wb['结果'].iter_rows(values_only=True))
+    assert rows == [('污染物', 'k', 'n'), ('A', 0.1, 5), ('B', None, 6), ('C', 0.3, 7)], rows
+    assert member_bytes(src, 'Sheet1') == sheet1 and member_bytes(src, 'Other') == other
+
+    # 同名 sheet 整张替换，位置不变
+    write_sheet(src, frame_sheet(df.head(1), 'Other'))
+    wb = openpyxl.load_workbook(src)
+    assert wb.sheetnames == ['Sheet1', 'Other', '结果']
+    assert list(wb['Other'].iter_rows(values_only=True)) == [('污染物', 'k', 'n'), ('A', 0.1, 5)]
+    assert member_bytes(src, 'Sheet1') == sheet1
+
+
+def check_write_workbook(tmp):
+    path = os.path.join(tmp, 'new.xlsx')
+    ws = Sheet('数据')
+    ws.set_column(0, np.array([1, 2, 3]))
+    ws.set_column(1, np.array([0.5, np.nan, 1e-9]), number_format='0.00E+00')
+    ws.set_column(2, np.array(['x', None, 'a<b&c'], dtype=object))
+    ws.set_column(3, np.array(['2024-01-02T03:04:05', 'NaT', '2024-01-03'], dtype='datetime64[s]'))
+    ws.set_cell(0, 4, True)
+    ws.highlight(Highlight('A1:A3', '$A1>1'))
+    write_workbook(path, [ws, Sheet('空')])
+
+    wb = openpyxl.load_workbook(path)
+    assert wb.sheetnames == ['数据', '空']
+    rows = list(wb['数据'].iter_rows(values_only=True))
+    assert rows == [(1, 0.5, 'x', datetime.datetime(2024, 1, 2, 3, 4, 5), True),
+                    (2, None, None, None, None),
+                    (3, 1e-9, 'a<b&c', datetime.datetime(2024, 1, 3), None)], rows
+    assert wb['数据']['B1'].number_format == '0.00E+00'
+    assert wb['数据']['D1'].number_format == 'yyyy-mm-dd h:mm:ss'
+    assert len(list(wb['数据'].conditional_formatting)) == 1
+
+
+class _Unwritable:
+    def __str__(self):
+        raise RuntimeError("写不出来的值")
+
+
+def check_failed_write(tmp):
+    src = os.path.join(tmp, 'failed.xlsx')
+    make_input(src)
+    with open(src, 'rb') as f:
+        original = f.read()
+
+    def unchanged():
+        with open(src, 'rb') as f:
+            assert f.read() == original
+        assert not [name for name in os.listdir(tmp) if name.endswith('.tmp')], os.listdir(tmp)
+
+    bad = Sheet('Sheet1').set_column(2, np.array([1.0, _Unwritable()], dtype=object), first_row=2)
+    for write in (lambda: patch_workbook(src, bad),
+                  lambda: write_sheet(src, bad),
+                  lambda: write_workbook(src, bad)):
+        try:
+            write()
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("应该抛出 RuntimeError")
+        unchanged()
+
+    # 原文件里的工作表 XML 被截断 (比如拷贝到一半的文件)
+    broken = os.path.join(tmp, 'broken.xlsx')
+    member = dict(sheet_parts(src))['Sheet1']
+    with zipfile.ZipFile(src) as zin, zipfile.ZipFile(broken, 'w') as zout:
+        for info in zin.infolist():
+            data = zin.read(info)
+            zout.writestr(info, data[:data.index(b'</sheetData>') - 20] if info.filename == member else data)
+    try:
+        patch_workbook(broken, Sheet('Sheet1').set_cell(2, 2, 1.0), output=src)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("应该抛出 ValueError")
+    unchanged()
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        for check in (check_patch, check_highlight, check_write_sheet, check_write_workbook, check_failed_write):
+            check(tmp)
+            print(f"✅ {check.__name__}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+
+# ==========================================
+# 降解率汇总：所有污染物一次性算 C0 / Ct / 降解率 (和 6.复杂的排序.py 的规则一致)
+# ==========================================
+NOTE_OK = "正常"
+NOTE_ZERO_C0 = "初始浓度为0"
+
+
+def long_format(blocks):
+    """
+    把 PollutantBlocks 的宽表 (行数, 污染物数) 摊平成长表三列 (污染物下标, 时间, 浓度)，
+    时间或浓度为空的行去掉。按污染物排列，同一污染物内保持工作簿里的行顺序。
+    """
+    n_rows, n = blocks.time.shape
+    pid = np.repeat(np.arange(n), n_rows)
+    time = blocks.time.ravel(order='F')
+    conc = blocks.conc.ravel(order='F')
+    ok = ~np.isnan(time) & ~np.isnan(conc)
+    return pid[ok], time[ok], conc[ok]
+
+
+def concentrations_at(pid, time, conc, n, times):
+    """
+    (污染物数, 时间点数) 的浓度矩阵：每个污染物在每个时间点的浓度，没有这个时间点的为 NaN。
+    同一时间点出现多次时取最靠前的一行 (和原脚本的 iloc[0] 一样)。
+    """
+    times = np.asarray(times, dtype=np.float64)
+    out = np.full((n, times.size), np.nan)
+    order = np.argsort(times, kind='stable')
+    sorted_times = times[order]
+    pos = np.searchsorted(sorted_times, time)
+    pos = np.minimum(pos, max(times.size - 1, 0))
+    hit = sorted_times[pos] == time if times.size else np.zeros(time.size, dtype=bool)
+    key = pid[hit] * times.size + order[pos[hit]]
+    # np.unique 的 return_index 给的是每个键第一次出现的位置，长表里就是最靠前的那一行
+    keys, first = np.unique(key, return_index=True)
+    out.flat[keys] = conc[hit][first]
+    return out
+
+
+def summarize(blocks, times=(0, 140)):
+    """
+    降解率对比表 (DataFrame)，一行一个污染物，顺序和工作簿里一样。
+    times[0] 是初始时间，times[-1] 是最终时间，中间的时间点也各给一列浓度和降解率。
+    列: 污染物名称, 初始浓度(0min), [浓度(60min), 降解率(60min), ...] 最终浓度(140min), 降解率, 备注
+    降解率 = 1 - Ct / C0；缺时间点的降解率为空并在备注里写明，初始浓度为 0 时降解率记 0。
+    """
+    times = [float(t) for t in times]
+    if len(times) < 2:
+        raise ValueError("至少需要初始和最终两个时间点")
+    n = len(blocks.names)
+    c = concentrations_at(*long_format(blocks), n, times)
+    c0 = c[:, :1]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rate = np.where(c0 != 0, 1 - c / c0, 0.0)
+    rate[np.isnan(c) | np.isnan(c0)] = np.nan
+
+    # 备注：按时间点顺序列出缺的数据，"缺0min数据, 缺140min"
+    missing = np.isnan(c)
+    notes = np.full(n, NOTE_OK, dtype=object)
+    for i, t in enumerate(times):
+        miss = missing[:, i]
+        first = miss & (notes == NOTE_OK)
+        notes[first] = f"缺{t:g}min数据"
+        notes[miss & ~first] = notes[miss & ~first] + f", 缺{t:g}min"
+    # 和原脚本一样只看初始和最终两个时间点：两个都有且 C0 为 0 时备注改成初始浓度为0
+    notes[(c0[:, 0] == 0) & ~missing[:, -1]] = NOTE_ZERO_C0
+
+    columns = {'污染物名称': blocks.names, f'初始浓度({times[0]:g}min)': c[:, 0]}
+    for i, t in enumerate(times[1:-1], start=1):
+        columns[f'浓度({t:g}min)'] = c[:, i]
+        columns[f'降解率({t:g}min)'] = rate[:, i]
+    columns[f'最终浓度({times[-1]:g}min)'] = c[:, -1]
+    columns['降解率'] = rate[:, -1]
+    columns['备注'] = notes
+    return pd.DataFrame(columns)
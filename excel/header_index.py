@@ -0,0 +1,146 @@
+import os
+
+from cache_files import cache_path, dump_json, jsonable, load_json
+from workbook_reader import HEADER_ROWS, find_blocks, read_header, sheet_fingerprints
+
+# ==========================================
+# 表头索引：流式只读表头两行，一次找出所有污染物的 (时间列, 浓度列)，并按工作簿缓存
+# ==========================================
+# 缓存放在工作簿同目录的 .cache/ 下 (和 streamlit 里湖面几何的缓存一样)：
+#   文件的 mtime 和大小都没变 -> 直接用；
+#   变了 -> 再比每个 sheet 的指纹 (zip 目录里的 CRC32，不用解压)，内容没变的 sheet 照样不重新扫描。
+# 所以 6.复杂的排序.py 往同一个文件里追加 comparison 表之后，数据表的索引仍然有效。
+INDEX_VERSION = 1
+PROBE_WIDTH = 6  # 名称列往后找几列小标题 (和 9.线性回归分析.py 一样)
+TIME_LABELS = ("时间", "time", "min")
+CONC_LABELS = ("浓度", "conc", "um")
+
+_memo = {}  # 绝对路径 -> (mtime_ns, 大小, 缓存内容)，同一进程里连 JSON 都不用再读
+
+
+class HeaderIndex:
+    """
+    一个 sheet 的表头。rows 是表头的前几行 (第 0 行污染物名称，第 1 行小标题)。
+    blocks: {名称: (时间列, 浓度列)}，列号从 0 开始；只收时间列和浓度列都找到了的污染物。
+    layout: 按固定版式 (workbook_reader.find_blocks) 找出的 [(名称, 时间列, 浓度列), ...]，不看小标题。
+    """
+
+    def __init__(self, sheet, rows):
+        self.sheet = sheet
+        self.rows = [tuple(row) for row in rows]
+        self.blocks = _probe_blocks(self.rows)
+        self.layout = find_blocks(self.rows)
+
+    def __contains__(self, name):
+        return name in self.blocks
+
+    def block(self, name):
+        """某个污染物的 (时间列, 浓度列)，没有这个污染物时为 None。"""
+        return self.blocks.get(name)
+
+    def block_list(self, names=None):
+        """[(名称, 时间列, 浓度列), ...]，可以直接传给 workbook_reader.read_blocks(blocks=...)。"""
+        names = self.blocks if names is None else [n for n in names if n in self.blocks]
+        return [(name,) + self.blocks[name] for name in names]
+
+    def layout_blocks(self):
+        """
+        固定版式的块列表 (名称在第 1+5k 列，时间列 +1、浓度列 +3)，和 read_blocks 不传 blocks 时一样。
+        小标题写法不统一 (比如 "C (μmol/L)") 时 block_list 会漏掉污染物，按版式找就不会。
+        """
+        return list(self.layout)
+
+    def column(self, text, row=0):
+        """第 row 行里第一个包含 text 的单元格的列号 (比如 comparison 表里的 "降解率")，找不到为 None。"""
+        cells = self.rows[row] if row < len(self.rows) else ()
+        for c, value in enumerate(cells):
+            if value is not None and text in str(value):
+                return c
+        return None
+
+
+def _probe_blocks(rows):
+    """
+    第 0 行每个非空的名称，往后 PROBE_WIDTH 列内 (遇到下一个名称就停) 在第 1 行找
+    "时间/time/min" 和 "浓度/conc/um" 的小标题，各取第一个。名称重复时保留最左边的。
+    """
+    if len(rows) < 2:
+        return {}
+    names, labels = rows[0], rows[1]
+    width = max(len(names), len(labels))
+    blocks = {}
+    for c, name in enumerate(names):
+        if name is None or not str(name).strip():
+            continue
+        name = str(name).strip()
+        time_col = conc_col = None
+        for j in range(c, min(c + PROBE_WIDTH, width)):
+            if j > c and j < len(names) and names[j] is not None and str(names[j]).strip():
+                break
+            label = str(labels[j] if j < len(labels) else None).strip().lower()
+            if time_col is None and any(key in label for key in TIME_LABELS):
+                time_col = j
+            elif conc_col is None and any(key in label for key in CONC_LABELS):
+                conc_col = j
+        if time_col is not None and conc_col is not None and name not in blocks:
+            blocks[name] = (time_col, conc_col)
+    return blocks
+
+
+def header_index(path, sheet=None, n_rows=HEADER_ROWS, cache_dir=None):
+    """
+    path 里 sheet (None 表示第一个) 的表头索引，sheet 不存在时抛 KeyError。
+    命中缓存时不解析任何单元格；没命中才流式读表头，并把结果写回缓存。cache_dir=False 不用磁盘缓存。
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    cached = _load(path, cache_dir)
+    fresh = cached is not None and cached['mtime_ns'] == stat.st_mtime_ns and cached['size'] == stat.st_size
+
+    if fresh:
+        fingerprints = None
+        sheets = cached['sheets']
+    else:
+        fingerprints = sheet_fingerprints(path)
+        sheets = list(fingerprints)
+    if sheet is None:
+        sheet = sheets[0]
+    if sheet not in sheets:
+        raise KeyError(f"Worksheet {sheet} does not exist.")
+
+    headers = cached['headers'] if cached is not None else {}
+    entry = headers.get(sheet)
+    if fresh and entry is not None and entry['n_rows'] >= n_rows:
+        return HeaderIndex(sheet, entry['rows'][:n_rows])
+
+    if fingerprints is None:
+        fingerprints = sheet_fingerprints(path)
+    fingerprint = list(fingerprints[sheet])
+    if entry is None or entry['fingerprint'] != fingerprint or entry['n_rows'] < n_rows:
+        rows = [[jsonable(v) for v in row] for row in read_header(path, sheet, n_rows)]
+        entry = {'fingerprint': fingerprint, 'n_rows': n_rows, 'rows': rows}
+    # 其它 sheet 只留指纹还对得上的
+    headers = {name: e for name, e in headers.items()
+               if name in fingerprints and e['fingerprint'] == list(fingerprints[name])}
+    headers[sheet] = entry
+    _store(path, cache_dir, {'version': INDEX_VERSION, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size,
+                             'sheets': list(fingerprints), 'headers': headers})
+    return HeaderIndex(sheet, entry['rows'][:n_rows])
+
+
+def _load(path, cache_dir):
+    memo = _memo.get(path)
+    if memo is not None:
+        return memo
+    if cache_dir is False:
+        return None
+    data = load_json(cache_path(path, '.header.json', cache_dir), INDEX_VERSION)
+    if data is not None:
+        _memo[path] = data
+    return data
+
+
+def _store(path, cache_dir, data):
+    _memo[path] = data
+    if cache_dir is not False:
+        dump_json(cache_path(path, '.header.json', cache_dir), data)  # 写不了就只用进程内的缓存
@@ -0,0 +1,135 @@
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from degradation import long_format
+
+BOOTSTRAP_CHUNK = 256  # 重抽样每块的副本数，一块一个随机数流；改了它同一个 seed 的结果也会变
+
+# ==========================================
+# 准一级动力学批量拟合：ln(Ct/C0) = slope * t + intercept，所有污染物一次算完
+# (规则和 9.线性回归分析.py 一致：C0 取最早时间点的浓度，去掉浓度 <= 0 的点，只用 t > 0 的点拟合)
+# ==========================================
+def log_ratio(pid, time, conc, n):
+    """
+    长表 (见 degradation.long_format) -> 参与拟合的点 (污染物下标, t, ln(Ct/C0))，按污染物排好。
+    """
+    order = np.lexsort((time, pid))
+    pid, time, conc = pid[order], time[order], conc[order]
+    # 排序后每个污染物的第一行就是最早的时间点 (时间相同取工作簿里靠前的一行，和 idxmin 一样)
+    first = np.searchsorted(pid, np.arange(n))
+    has = first < pid.size
+    c0 = np.full(n, np.nan)
+    c0[has] = conc[first[has]]
+    fit = (conc > 0) & (time > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y = np.log(conc[fit] / c0[pid[fit]])
+    ok = np.isfinite(y)
+    return pid[fit][ok], time[fit][ok], y[ok]
+
+
+def fit_groups(group, x, y, n):
+    """
+    每组一条最小二乘直线，全部用 np.bincount 分组求和的闭式解 (先求组均值再算离差平方和，数值更稳)。
+    返回 {'n', 'slope', 'intercept', 'r2', 'stderr', 'intercept_stderr', 'p'}，每项是长度 n 的数组，
+    点数不够的组为 NaN。和 scipy.stats.linregress 的定义一致。
+    """
+    count = np.bincount(group, minlength=n).astype(np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mx = np.bincount(group, x, minlength=n) / count
+        my = np.bincount(group, y, minlength=n) / count
+        dx, dy = x - mx[group], y - my[group]
+        sxx = np.bincount(group, dx * dx, minlength=n)
+        syy = np.bincount(group, dy * dy, minlength=n)
+        sxy = np.bincount(group, dx * dy, minlength=n)
+
+        slope = sxy / sxx
+        intercept = my - slope * mx
+        r = np.clip(sxy / np.sqrt(sxx * syy), -1, 1)
+        # 所有点 y 都一样 (syy = 0) 时 linregress 给 r = 0
+        r = np.where(syy == 0, 0.0, r)
+        dof = count - 2
+        stderr = np.sqrt((1 - r * r) * syy / sxx / dof)
+        intercept_stderr = stderr * np.sqrt(sxx / count + mx * mx)
+        p = 2 * stats.t.sf(np.abs(slope / stderr), dof)
+    bad = (count < 2) | (sxx == 0)
+    slope[bad] = intercept[bad] = r[bad] = np.nan
+    few = bad | (dof < 1)
+    stderr[few] = intercept_stderr[few] = p[few] = np.nan
+    return {'n': count.astype(np.int64), 'slope': slope, 'intercept': intercept, 'r2': r * r,
+            'stderr': stderr, 'intercept_stderr': intercept_stderr, 'p': p}
+
+
+def bootstrap_slopes(pid, x, y, n, replicates, seed=0, chunk=2_000_000):
+    """
+    成对重抽样：每个污染物在自己的点里有放回地抽同样多个点重新拟合，返回 (replicates, n) 的斜率。
+    一次抽一批副本，副本号 * n + 污染物号 当作组号，一起进 fit_groups；每批不超过 chunk 个点。
+    pid 需要已经排好序 (log_ratio 的输出就是)。
+    """
+    rng = np.random.default_rng(seed)
+    count = np.bincount(pid, minlength=n)
+    start = np.r_[0, np.cumsum(count)[:-1]]
+    per_batch = max(1, chunk // max(pid.size, 1))
+    out = np.empty((replicates, n))
+    for b0 in range(0, replicates, per_batch):
+        b = min(per_batch, replicates - b0)
+        draw = start[pid] + (rng.random((b, pid.size)) * count[pid]).astype(np.int64)
+        group = (np.arange(b)[:, None] * n + pid).ravel()
+        out[b0:b0 + b] = fit_groups(group, x[draw].ravel(), y[draw].ravel(), b * n)['slope'].reshape(b, n)
+    return out
+
+
+def _bootstrap_job(args):
+    return bootstrap_slopes(*args)
+
+
+def fit_blocks(blocks, bootstrap=0, ci=0.95, workers=None, seed=0):
+    """
+    对 PollutantBlocks 里的每个污染物拟合 ln(Ct/C0) - t，返回 DataFrame，一行一个污染物。
+    速率常数 k = -斜率 (1/min)，半衰期 = ln2 / k (k <= 0 时为空)。
+    bootstrap > 0 时再做这么多次重抽样，给出 k 的 ci 置信区间；副本每 BOOTSTRAP_CHUNK 个一块，
+    分给 workers 个进程并行 (workers=1 时在当前进程里算)，区间只由 seed 和 bootstrap 决定。多进程需要调用方的脚本有 if __name__ == '__main__' 保护。
+    """
+    n = len(blocks.names)
+    pid, x, y = log_ratio(*long_format(blocks), n)
+    res = fit_groups(pid, x, y, n)
+    k = -res['slope']
+    with np.errstate(divide='ignore', invalid='ignore'):
+        half_life = np.where(k > 0, np.log(2) / k, np.nan)
+    table = pd.DataFrame({
+        '污染物名称': blocks.names,
+        '速率常数k(1/min)': k,
+        '截距': res['intercept'],
+        'R2': res['r2'],
+        'k标准误': res['stderr'],
+        'p值': res['p'],
+        '半衰期(min)': half_life,
+        '拟合点数': res['n'],
+    })
+    if bootstrap:
+        slopes = _run_bootstrap(pid, x, y, n, int(bootstrap), seed, workers)
+        alpha = (1 - ci) / 2
+        with warnings.catch_warnings():
+            # 点数不够的污染物整列都是 NaN
+            warnings.simplefilter('ignore', RuntimeWarning)
+            low, high = np.nanquantile(-slopes, [alpha, 1 - alpha], axis=0)
+        table['k下限'] = low
+        table['k上限'] = high
+    return table
+
+
+def _run_bootstrap(pid, x, y, n, replicates, seed, workers):
+    # 副本切成固定大小的块，每块一个独立的随机数流 (SeedSequence.spawn)，块再分给空闲的进程，
+    # 结果只和 seed、replicates 有关，和 workers 无关
+    sizes = [min(BOOTSTRAP_CHUNK, replicates - b0) for b0 in range(0, replicates, BOOTSTRAP_CHUNK)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(pid, x, y, n, size, s) for size, s in zip(sizes, seeds)]
+    workers = min(workers or os.cpu_count() or 1, len(jobs))
+    if workers == 1:
+        return np.concatenate([_bootstrap_job(job) for job in jobs])
+    with ProcessPoolExecutor(workers) as pool:
+        return np.concatenate(list(pool.map(_bootstrap_job, jobs)))
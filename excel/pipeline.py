@@ -0,0 +1,304 @@
+import argparse
+import glob
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+
+matplotlib.use('Agg')  # 进程池里只存图，不开窗口 (要在 import pyplot 之前设置)
+
+import numpy as np
+
+from bulk_writer import Highlight, frame_sheet, write_sheet
+from degradation import NOTE_OK, summarize
+from header_index import header_index
+from kinetics import fit_blocks, fit_groups, log_ratio
+from plots import bar_chart, kinetics_chart
+from result_cache import ResultCache, digest
+from workbook_reader import read_blocks
+
+# ==========================================
+# 批处理流水线：一个目录 (或通配符) 里的所有工作簿，一条命令跑完
+#   汇总 (6.复杂的排序.py) -> 标红 (8.设置格式.py) -> 柱状图 (7.柱状图.py)；动力学 (9.线性回归分析.py)
+# 每个工作簿在一个进程里只读一次，各步骤共用读出来的数据；comparison 表 (含标红规则) 最后一次写回。
+# 不同工作簿分到进程池里并行，最后报告每一步的耗时。
+# 结果按污染物块的内容哈希缓存 (result_cache.py)：只有数据变了的污染物重新计算、重新画图，
+# 数据表完全没变时连读都不用读。--no-cache 关掉。
+# 运行: python excel/pipeline.py data/ --out results/
+#       python excel/pipeline.py "data/*.xlsx" --stages kinetics --workers 4
+# ==========================================
+COMPARISON_SHEET = 'comparison'
+RATE_THRESHOLD = 0.9
+
+STAGE_LABELS = {
+    'load': '读取',
+    'summary': '汇总',
+    'highlight': '标红',
+    'bar': '柱状图',
+    'kinetics': '动力学',
+    'save': '保存',
+}
+
+
+class Job:
+    """一个工作簿在流水线里的状态：读一次的数据、各步骤的结果、要写回的 comparison 表。"""
+
+    def __init__(self, path, out_dir, options):
+        self.path = path
+        self.out_dir = out_dir
+        self.options = options
+        self.index = header_index(path)
+        self.cache = ResultCache(path, self.index.sheet) if options['cache'] else None
+        self.summary = None  # comparison 表 (DataFrame)
+        self.sheet = None    # 要写回工作簿的 comparison 表 (bulk_writer.Sheet)
+        self.messages = []
+        self.timings = {'load': 0.0}
+        self._blocks = None
+
+    def blocks(self):
+        """所有污染物块的数据，第一次用到时才读 (结果全在缓存里时就不读了)。"""
+        if self._blocks is None:
+            t0 = time.perf_counter()
+            self._blocks = read_blocks(self.path, self.index.sheet, blocks=self.index.layout_blocks())
+            self.timings['load'] += time.perf_counter() - t0
+        return self._blocks
+
+    def table(self, kind, params, compute):
+        """compute(PollutantBlocks) 的结果表；开了缓存时只算数据变了的污染物。"""
+        if self.cache is None:
+            return compute(self.blocks())
+        return self.cache.table(kind, params, compute, self.blocks)
+
+    def chart(self, save_path, key, draw):
+        """draw() 画图存到 save_path；开了缓存、同样的数据 (key) 已经画过而且文件还在时跳过。"""
+        if self.cache is not None and self.cache.chart_fresh(save_path, key):
+            return
+        draw()
+        if self.cache is not None:
+            self.cache.mark_chart(save_path, key)
+
+    def output(self, filename):
+        os.makedirs(self.out_dir, exist_ok=True)
+        return os.path.join(self.out_dir, filename)
+
+
+# ---------- 各个步骤 ----------
+def run_summary(job):
+    """0min 和 140min 的浓度、降解率，按降解率从高到低排好 (6.复杂的排序.py)。"""
+    times = job.options['times']
+    result_df = job.table('summary', {'times': times}, lambda blocks: summarize(blocks, times=times))
+    for name, note in zip(result_df['污染物名称'], result_df['备注']):
+        if note != NOTE_OK:
+            job.messages.append(f"警告: {name} {note}")
+    if len(result_df) == 0:
+        job.messages.append("未找到任何有效数据，不写 comparison 表")
+        return
+    result_df.sort_values(by='降解率', ascending=False, inplace=True)
+    job.summary = result_df
+    job.sheet = frame_sheet(result_df, COMPARISON_SHEET)
+
+
+def run_highlight(job):
+    """降解率 > 阈值的整行标红：在要写回的 comparison 表上加一条条件格式 (8.设置格式.py)。"""
+    if job.sheet is None:
+        return
+    columns = list(job.summary.columns)
+    threshold = job.options['threshold']
+    rule = Highlight.rows_where(columns.index('降解率'), '>', threshold, first_row=1, last_col=len(columns) - 1)
+    job.sheet.highlight(rule)
+    count = int(np.sum(job.summary['降解率'].to_numpy(dtype=np.float64) > threshold))
+    job.messages.append(f"{count} 个污染物的降解率 > {threshold}")
+
+
+def run_bar(job):
+    """降解率柱状图 (7.柱状图.py)，直接用汇总的结果，不再读 comparison 表。"""
+    if job.summary is None:
+        return
+    # 缓存里只存汇总表的短哈希，不存整张表
+    job.chart(job.output('degradation_bar_chart.tiff'), digest(job.summary.to_csv()),
+              lambda: bar_chart(job.summary, job.output('degradation_bar_chart.tiff')))
+
+
+def run_kinetics(job):
+    """所有污染物的准一级动力学拟合表，再给指定的污染物画拟合图 (9.线性回归分析.py)。"""
+    # 已经在进程池的 worker 里了，bootstrap 不再开子进程
+    # (用了缓存时，没变的污染物的置信区间是上次算的，重抽样的随机数和这次不同)
+    bootstrap = job.options['bootstrap']
+    table = job.table('kinetics', {'bootstrap': bootstrap},
+                      lambda blocks: fit_blocks(blocks, bootstrap=bootstrap, workers=1))
+    table.sort_values(by='速率常数k(1/min)', ascending=False, inplace=True)
+    table.to_csv(job.output('kinetics_all.csv'), index=False, encoding='utf-8-sig')
+
+    names = list(table['污染物名称'])
+    for name in job.options['plot']:
+        if name not in names:
+            continue
+        key = job.cache.block_hash(name) if job.cache is not None else None
+        for lang in ('cn', 'en'):
+            save_path = job.output(f'{name}_kinetics_{lang.upper()}.tiff')
+            job.chart(save_path, key, lambda: _draw_kinetics(job, name, lang, save_path))
+
+
+def _draw_kinetics(job, name, lang, save_path):
+    t, c = job.blocks().block(name)
+    group, fit_time, fit_y = log_ratio(np.zeros(len(t), dtype=np.int64), t, c, 1)
+    fit = fit_groups(group, fit_time, fit_y, 1)
+    if np.isnan(fit['slope'][0]):
+        job.messages.append(f"警告: {name} 有效数据点不够，不画拟合图")
+        return
+    kinetics_chart(fit_time, fit_y, fit['slope'][0], fit['intercept'][0], fit['r2'][0], lang=lang,
+                   save_path=save_path, name=name)
+
+
+# 步骤名 -> (依赖的步骤, 函数)
+STAGES = {
+    'summary': ((), run_summary),
+    'highlight': (('summary',), run_highlight),
+    'bar': (('summary',), run_bar),
+    'kinetics': ((), run_kinetics),
+}
+
+
+def plan(stages):
+    """选中的步骤连同它们依赖的步骤，按依赖关系排好执行顺序 (同一层按 STAGES 里的顺序)。"""
+    unknown = [name for name in stages if name not in STAGES]
+    if unknown:
+        raise ValueError(f"未知的步骤: {', '.join(unknown)} (可选: {', '.join(STAGES)})")
+    order = []
+
+    def visit(name, path=()):
+        if name in path:
+            raise ValueError(f"步骤依赖成环: {' -> '.join(path + (name,))}")
+        if name in order:
+            return
+        for dep in STAGES[name][0]:
+            visit(dep, path + (name,))
+        order.append(name)
+
+    for name in STAGES:
+        if name in stages:
+            visit(name)
+    return order
+
+
+def process_workbook(path, stages, out_dir, options):
+    """
+    在一个进程里跑完一个工作簿：按顺序跑各步骤 (污染物块在第一次用到时读，至多读一次)，
+    最后把 comparison 表写回、更新结果缓存。
+    返回 {'path', 'timings': {步骤: 秒}, 'messages', 'error'}，出错时 error 是错误信息 (不影响别的工作簿)。
+    """
+    job = None
+    try:
+        job = Job(path, out_dir, options)
+        timings = job.timings
+        for name in stages:
+            t0, loading = time.perf_counter(), timings['load']
+            STAGES[name][1](job)
+            # 数据是在某一步里第一次用到时才读的，读数据的时间记在“读取”里
+            timings[name] = time.perf_counter() - t0 - (timings['load'] - loading)
+        t0 = time.perf_counter()
+        if job.sheet is not None and options['write']:
+            write_sheet(path, job.sheet)
+        if job.cache is not None:
+            job.cache.save()
+            computed = ', '.join(f"{STAGE_LABELS[kind]} {n}/{len(job.cache.hashes)}"
+                                 for kind, n in job.cache.computed.items())
+            job.messages.append(f"重新计算的污染物: {computed or '无'}")
+        timings['save'] = time.perf_counter() - t0
+    except Exception as e:
+        return {'path': path, 'timings': job.timings if job else {}, 'messages': job.messages if job else [],
+                'error': f"{type(e).__name__}: {e}"}
+    return {'path': path, 'timings': timings, 'messages': job.messages, 'error': None}
+
+
+def collect_workbooks(patterns):
+    """目录 (取里面的 .xlsx)、通配符或文件名 -> 去重排好的工作簿列表，跳过 Excel 打开时的 ~$ 临时文件。"""
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(pattern, '*.xlsx'))
+        else:
+            matches = glob.glob(pattern) or ([pattern] if os.path.exists(pattern) else [])
+        paths.extend(m for m in matches if not os.path.basename(m).startswith('~$'))
+    return sorted(set(os.path.abspath(p) for p in paths))
+
+
+def output_dir(path, out):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(out, stem) if out else os.path.join(os.path.dirname(path), f"{stem}_results")
+
+
+def format_timings(timings):
+    return ' | '.join(f"{STAGE_LABELS[name]} {seconds:.2f}s" for name, seconds in timings.items())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="批量处理污染物降解工作簿：汇总、标红、柱状图、动力学拟合")
+    parser.add_argument('inputs', nargs='+', help="工作簿、目录或通配符 (如 'data/*.xlsx')")
+    parser.add_argument('--out', default=None, help="图和拟合表的输出目录 (每个工作簿一个子目录)，默认放在工作簿旁边")
+    parser.add_argument('--stages', default=','.join(STAGES),
+                        help=f"要跑的步骤，逗号分隔，依赖的步骤会自动带上 (默认全部: {','.join(STAGES)})")
+    parser.add_argument('--workers', type=int, default=None, help="并行的进程数 (默认 CPU 核数)")
+    parser.add_argument('--times', default='0,140', help="汇总用的起止时间点 (min)")
+    parser.add_argument('--threshold', type=float, default=RATE_THRESHOLD, help="降解率超过多少标红")
+    parser.add_argument('--plot', default='CBZ', help="画动力学拟合图的污染物，逗号分隔 (空字符串表示不画)")
+    parser.add_argument('--bootstrap', type=int, default=0, help="k 置信区间的 bootstrap 次数 (0 = 不算)")
+    parser.add_argument('--no-write', dest='write', action='store_false', help="不把 comparison 表写回工作簿")
+    parser.add_argument('--no-cache', dest='cache', action='store_false', help="不用结果缓存，所有污染物都重新计算")
+    args = parser.parse_args()
+
+    try:
+        stages = plan([s.strip() for s in args.stages.split(',') if s.strip()])
+    except ValueError as e:
+        parser.error(str(e))
+    paths = collect_workbooks(args.inputs)
+    if not paths:
+        print("❌ 没有找到任何 .xlsx 工作簿")
+        raise SystemExit(1)
+    options = {
+        'times': tuple(float(t) for t in args.times.split(',')),
+        'threshold': args.threshold,
+        'plot': [name.strip() for name in args.plot.split(',') if name.strip()],
+        'bootstrap': args.bootstrap,
+        'write': args.write,
+        'cache': args.cache,
+    }
+    workers = max(1, min(args.workers or os.cpu_count() or 1, len(paths)))
+    print(f"🚀 {len(paths)} 个工作簿，步骤: {' -> '.join(STAGE_LABELS[s] for s in stages)}，{workers} 个进程")
+
+    t_start = time.perf_counter()
+    jobs = [(path, stages, output_dir(path, args.out), options) for path in paths]
+    if workers == 1:
+        results = (process_workbook(*job) for job in jobs)
+    else:
+        pool = ProcessPoolExecutor(workers)
+        results = (future.result() for future in as_completed([pool.submit(process_workbook, *job) for job in jobs]))
+
+    totals = {}
+    failed = []
+    for result in results:
+        name = os.path.basename(result['path'])
+        for stage, seconds in result['timings'].items():
+            totals[stage] = totals.get(stage, 0.0) + seconds
+        if result['error']:
+            failed.append(name)
+            print(f"❌ {name}: {result['error']}")
+        else:
+            print(f"✅ {name}  {format_timings(result['timings'])}")
+        for message in result['messages']:
+            print(f"   {message}")
+    if workers > 1:
+        pool.shutdown()
+
+    print(f"\n--- 各步骤累计耗时 ({len(paths)} 个工作簿) ---")
+    for stage, seconds in totals.items():
+        print(f"{STAGE_LABELS[stage]:<6} {seconds:>8.2f} s")
+    print(f"总用时 {time.perf_counter() - t_start:.2f} s")
+    if failed:
+        print(f"❌ {len(failed)} 个工作簿失败: {', '.join(failed)}")
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
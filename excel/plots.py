@@ -0,0 +1,146 @@
+import platform
+
+import matplotlib.pyplot as plt
+import matplotlib.ticker as mtick
+import numpy as np
+import pandas as pd
+from matplotlib import font_manager
+
+# ==========================================
+# 绘图：降解率柱状图 (7.柱状图.py) 和准一级动力学拟合图 (9.线性回归分析.py)
+# 只接收已经算好的数据，不读 Excel，脚本和 pipeline.py 共用
+# ==========================================
+
+# 莫兰迪色系
+MORANDI_COLORS = [
+    '#A0C1B8', '#7098DA', '#E0BBE4', '#FFDFD3',
+    '#957DAD', '#D291BC', '#FEC8D8', '#FF9AA2'
+]
+
+# 动力学图标题里用的中英文全称，没列出来的直接用表头里的名称
+POLLUTANT_NAMES = {
+    'CBZ': ('卡马西平', 'Carbamazepine'),
+}
+
+
+def chinese_font():
+    """中文字体：用微软雅黑 (Microsoft YaHei)，Mac 上没装微软雅黑就回退到 Arial Unicode MS。"""
+    if platform.system() == 'Darwin':
+        font_names = {f.name for f in font_manager.fontManager.ttflist}
+        if 'Microsoft YaHei' not in font_names:
+            return 'Arial Unicode MS'
+    return 'Microsoft YaHei'
+
+
+def save_tiff(fig, save_path):
+    fig.savefig(save_path, format='tiff', dpi=300, pil_kwargs={"compression": "tiff_lzw"})
+    plt.close(fig)
+
+
+def bar_chart(df, save_path):
+    """降解率柱状图：df 是 comparison 表 (至少有 污染物名称、降解率 两列)，按降解率从高到低画。"""
+    df = df.sort_values(by='降解率', ascending=False)
+    font_en = {'family': 'Arial', 'weight': 'normal'}
+    chinese_font_name = chinese_font()
+    # 字号设置 (加大 30%)
+    font_cn_label = font_manager.FontProperties(family=chinese_font_name, size=16)
+    font_title = font_manager.FontProperties(family=chinese_font_name, size=21)
+
+    fig, ax = plt.subplots(figsize=(10, 6), dpi=300)
+
+    # 绘制柱状图 (宽度 0.54)，颜色不够时循环使用
+    colors = [MORANDI_COLORS[i % len(MORANDI_COLORS)] for i in range(len(df))]
+    bars = ax.bar(np.arange(len(df)), df['降解率'].astype(float), color=colors, width=0.54, edgecolor=None)
+
+    ax.set_title('污染物降解率对比', fontproperties=font_title, pad=25)
+    ax.set_xlabel('污染物名称', fontproperties=font_cn_label, labelpad=10)
+    ax.set_ylabel('降解率', fontproperties=font_cn_label, labelpad=10)
+
+    # 先明确设置刻度的位置 (0, 1, 2, 3...)，再给这些位置贴上标签
+    ax.set_xticks(np.arange(len(df)))
+    ax.set_xticklabels(df['污染物名称'], fontdict=font_en, fontsize=14)
+
+    for label in ax.get_yticklabels():
+        label.set_fontname('Arial')
+        label.set_fontsize(13)
+
+    # Y 轴为百分比格式
+    ax.yaxis.set_major_formatter(mtick.PercentFormatter(1.0))
+    ax.set_ylim(0, 1.15)
+
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+
+    # 柱子上方的数值标签
+    for bar in bars:
+        height = bar.get_height()
+        if pd.notna(height):
+            ax.text(bar.get_x() + bar.get_width() / 2, height,
+                    f'{height:.1%}', ha='center', va='bottom', fontname='Arial', fontsize=13)
+
+    fig.tight_layout()
+    save_tiff(fig, save_path)
+
+
+def kinetics_chart(time, y_log, slope, intercept, r_squared, lang='cn', save_path='', name='CBZ'):
+    """
+    一个污染物的 ln(Ct/C0) - t 散点和拟合直线。time / y_log 是参与拟合的点 (kinetics.log_ratio 的输出)。
+    lang: 'cn' 或 'en'。
+    """
+    name_cn, name_en = POLLUTANT_NAMES.get(name, (name, name))
+    if lang == 'cn':
+        title_text = f'{name_cn}降解动力学'
+        xlabel_text = '反应时间 (min)'
+        ylabel_text = 'ln($C_t/C_0$)'
+        legend_data = '实验数据'
+        legend_fit = '线性拟合'
+        chinese_font_name = chinese_font()
+        font_title_prop = font_manager.FontProperties(family=chinese_font_name, size=18)
+        font_label_prop = font_manager.FontProperties(family=chinese_font_name, size=15)
+        font_legend_prop = font_manager.FontProperties(family=chinese_font_name, size=13)
+    else:
+        title_text = f'Degradation Kinetics of {name_en}'
+        xlabel_text = 'Time (min)'
+        ylabel_text = 'ln($C_t/C_0$)'
+        legend_data = 'Experimental Data'
+        legend_fit = 'Linear Fit'
+        font_title_prop = font_manager.FontProperties(family='Arial', size=18, weight='bold')
+        font_label_prop = font_manager.FontProperties(family='Arial', size=15)
+        font_legend_prop = font_manager.FontProperties(family='Arial', size=13)
+
+    time = np.asarray(time, dtype=np.float64)
+    line_x = np.array([time.min(), time.max()])
+    line_y = slope * line_x + intercept
+
+    fig, ax = plt.subplots(figsize=(8, 6), dpi=300)
+
+    # 散点 (Sage Green 鼠尾草绿)，大点 + 半透明 + 白边
+    ax.scatter(time, y_log, color='#8FBC8F', s=320, alpha=0.6, label=legend_data,
+               edgecolors='white', linewidth=1.5, zorder=5)
+    # 拟合线 (Dusty Rose 干枯玫瑰)
+    ax.plot(line_x, line_y, color='#BC8F8F', linewidth=3, linestyle='--', label=legend_fit, zorder=4)
+
+    # 公式标注
+    formula_text = f"y = {slope:.4f}x {intercept:+.4f}\n$R^2$ = {r_squared:.4f}"
+    ax.text(0.95, 0.95, formula_text, transform=ax.transAxes,
+            fontsize=13, fontdict={'family': 'Arial'},
+            verticalalignment='top', horizontalalignment='right',
+            bbox=dict(boxstyle='round', facecolor='white', alpha=0.9, edgecolor='none'))
+
+    ax.set_title(title_text, fontproperties=font_title_prop, pad=20)
+    ax.set_xlabel(xlabel_text, fontproperties=font_label_prop)
+    ax.set_ylabel(ylabel_text, fontproperties=font_label_prop)
+    for label in ax.get_xticklabels() + ax.get_yticklabels():
+        label.set_fontname('Arial')
+        label.set_fontsize(13)
+    ax.grid(False)
+
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.spines['left'].set_linewidth(1.2)
+    ax.spines['bottom'].set_linewidth(1.2)
+
+    ax.legend(prop=font_legend_prop, frameon=False, loc='lower left')
+
+    fig.tight_layout()
+    save_tiff(fig, save_path)
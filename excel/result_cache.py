@@ -0,0 +1,143 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from cache_files import cache_path, dump_json, jsonable, load_json
+from workbook_reader import BLOCK_LAYOUT, sheet_fingerprints
+
+# ==========================================
+# 结果缓存：按每个污染物块原始数据的哈希缓存它的计算结果 (汇总表的一行、动力学拟合的一行、拟合图)
+# ==========================================
+# 缓存放在工作簿同目录的 .cache/<工作簿>.results.json (和 header_index 的表头缓存放在一起)。
+#   数据表的指纹 (zip 目录里的 CRC32) 没变 -> 连数据都不用读，所有结果直接从缓存取；
+#   变了 -> 读一遍数据、算出每块的哈希，只有哈希变了 (或新加) 的污染物重新计算，其余的照用缓存。
+# 块的哈希只看名称和去掉空值后的 (时间, 浓度) 数据，别的块变长变短 (数组补的 NaN 变了) 不影响。
+# 缓存里的块列表还要看是按什么规则找出来的 (layout，默认 workbook_reader.BLOCK_LAYOUT)，规则变了就重新读。
+CACHE_VERSION = 2
+
+
+def block_hashes(blocks):
+    """每个污染物块的内容哈希 (十六进制字符串)，顺序和 blocks.names 一样。"""
+    hashes = []
+    for name, t, c in blocks:
+        ok = ~np.isnan(t) & ~np.isnan(c)
+        h = hashlib.blake2b(str(name).encode('utf-8'), digest_size=16)
+        h.update(np.ascontiguousarray(t[ok], dtype=np.float64).tobytes())
+        h.update(np.ascontiguousarray(c[ok], dtype=np.float64).tobytes())
+        hashes.append(h.hexdigest())
+    return hashes
+
+
+def digest(*parts):
+    """若干个值 (转成字符串) 合起来的短哈希，用作缓存键。"""
+    return hashlib.blake2b(json.dumps(parts, default=str).encode('utf-8'), digest_size=16).hexdigest()
+
+
+class ResultCache:
+    """
+    一个工作簿 (的一个数据 sheet) 的结果缓存。用法：
+        cache = ResultCache(path, sheet)
+        table = cache.table('summary', {'times': (0, 140)}, lambda b: summarize(b, (0, 140)), load_blocks)
+        cache.save()
+    table 只对缓存里没有的污染物调用 compute (传进去的是只含这些污染物的 PollutantBlocks)；
+    load_blocks() 读出整个数据表的 PollutantBlocks，只在数据表变了、需要算哈希或重新计算时才调用 (至多一次)，
+    数据表没变时整个工作簿都不用读。已经读过数据的可以先 set_blocks(blocks)。
+    layout 是 load_blocks 找块的规则的标识，按别的规则找块 (比如 HeaderIndex.block_list 按小标题) 时传别的值。
+    """
+
+    def __init__(self, path, sheet, cache_dir=None, layout=BLOCK_LAYOUT):
+        self.path = os.path.abspath(path)
+        self.sheet = sheet
+        self.cache_dir = cache_dir
+        self.layout = layout
+        self.fingerprint = list(sheet_fingerprints(self.path)[sheet])
+        data = load_json(cache_path(self.path, '.results.json', cache_dir), CACHE_VERSION) or {}
+        self.results = data.get('results', {})    # 块哈希 -> {结果键: 一行}
+        self.columns = data.get('columns', {})    # 结果键 -> 列名
+        self.charts = data.get('charts', {})      # 图片路径 -> 生成它时的键
+        self.unchanged = (data.get('sheet') == sheet and data.get('fingerprint') == self.fingerprint
+                          and data.get('layout') == layout)
+        self.names = data.get('names') if self.unchanged else None
+        self.hashes = data.get('hashes') if self.unchanged else None
+        self.computed = {}  # 结果种类 -> 这次重新算了几个污染物
+        self._blocks = None
+        self._dirty = False
+
+    def set_blocks(self, blocks):
+        self._blocks = blocks
+        self.names = list(blocks.names)
+        self.hashes = block_hashes(blocks)
+        self._dirty = True
+
+    def table(self, kind, params, compute, load_blocks):
+        """
+        compute(PollutantBlocks) -> DataFrame (一行一个污染物，顺序和传进去的一样) 的结果，
+        缓存过的污染物直接取，没有的才算。params 是影响结果的参数，参数变了缓存自然失效。
+        """
+        if self.hashes is None:
+            self.set_blocks(self._load_blocks(load_blocks))
+        key = f"{kind}:{digest(params)}"
+        rows = [self.results.get(h, {}).get(key) for h in self.hashes]
+        missing = [i for i, row in enumerate(rows) if row is None]
+        if missing:
+            df = compute(self._load_blocks(load_blocks).select(missing))
+            self.columns[key] = [str(c) for c in df.columns]
+            self._dirty = True
+            for i, row in zip(missing, df.itertuples(index=False)):
+                rows[i] = [jsonable(v) for v in row]
+                self.results.setdefault(self.hashes[i], {})[key] = rows[i]
+        self.computed[kind] = len(missing)
+        columns = self.columns.get(key, [])
+        return pd.DataFrame(rows, columns=columns).astype(_dtypes(rows, columns))
+
+    def _load_blocks(self, load_blocks):
+        if self._blocks is None:
+            self._blocks = load_blocks()
+        return self._blocks
+
+    def key(self, *parts):
+        """由若干个块的哈希和参数得到的键，用来判断图片要不要重画。"""
+        return digest(*parts)
+
+    def block_hash(self, name):
+        return self.hashes[self.names.index(name)] if self.names and name in self.names else None
+
+    def chart_fresh(self, save_path, key):
+        """save_path 这张图是不是用同样的数据 (key) 画的、文件还在。"""
+        return self.charts.get(os.path.abspath(save_path)) == key and os.path.exists(save_path)
+
+    def mark_chart(self, save_path, key):
+        self.charts[os.path.abspath(save_path)] = key
+        self._dirty = True
+
+    def save(self):
+        """写回缓存 (这次什么都没变就不写)；只留这个工作簿里现在还有的污染物的结果，缓存不会越积越多。"""
+        if not self._dirty:
+            return
+        current = set(self.hashes or ())
+        data = {
+            'version': CACHE_VERSION,
+            'sheet': self.sheet,
+            'fingerprint': self.fingerprint,
+            'layout': self.layout,
+            'names': self.names,
+            'hashes': self.hashes,
+            'results': {h: r for h, r in self.results.items() if h in current},
+            'columns': self.columns,
+            'charts': self.charts,
+        }
+        dump_json(cache_path(self.path, '.results.json', self.cache_dir), data)
+
+
+def _dtypes(rows, columns):
+    """从 JSON 读回来的整列都是整数的，还原成整数列 (比如拟合点数)，其余按 pandas 推断。"""
+    dtypes = {}
+    for j, name in enumerate(columns):
+        values = [row[j] for row in rows]
+        if values and all(isinstance(v, int) and not isinstance(v, bool) for v in values):
+            dtypes[name] = np.int64
+    return dtypes
+
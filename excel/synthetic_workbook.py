@@ -0,0 +1,50 @@
+import numpy as np
+
+from workbook_reader import BLOCK_START, BLOCK_WIDTH, CONC_OFFSET, TIME_OFFSET
+
+# ==========================================
+# 合成的污染物降解工作簿 (版式和 pollution degradation.xlsx 一样)，给基准测试用
+# ==========================================
+TIME_STEP = 20  # 采样间隔 (min)，0、20、…、140 都会出现
+
+
+def synthetic_blocks(n_blocks, n_rows, seed=0):
+    """返回 (名称列表, 时间 (n_rows,), 浓度 (n_rows, n_blocks), 真实速率常数 k (n_blocks,))。"""
+    rng = np.random.default_rng(seed)
+    names = [f"P{j:04d}" for j in range(n_blocks)]
+    time = np.arange(n_rows, dtype=np.float64) * TIME_STEP
+    k = rng.uniform(0.002, 0.03, n_blocks)
+    c0 = rng.uniform(5, 50, n_blocks)
+    conc = c0 * np.exp(-np.outer(time, k)) * rng.lognormal(0, 0.03, (n_rows, n_blocks))
+    return names, time, conc, k
+
+
+def write_synthetic_workbook(path, n_blocks, n_rows, seed=0, sheet='Sheet1'):
+    """用 write_only 模式按行写出工作簿：每块 5 列 (编号 / 时间 / 峰面积 / 浓度 / 空列)。"""
+    import openpyxl
+    names, time, conc, k = synthetic_blocks(n_blocks, n_rows, seed)
+    width = BLOCK_START + n_blocks * BLOCK_WIDTH
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet(sheet)
+
+    row0 = [None] * width
+    row1 = [None] * width
+    row1[0] = '序号'
+    for j, name in enumerate(names):
+        i = BLOCK_START + j * BLOCK_WIDTH
+        row0[i] = name
+        row1[i], row1[i + TIME_OFFSET], row1[i + 2], row1[i + CONC_OFFSET] = '编号', '时间(min)', '峰面积', '浓度(uM)'
+    ws.append(row0)
+    ws.append(row1)
+
+    area = conc * 0.35 * 0.0221 + 0.0667
+    for r in range(n_rows):
+        row = [None] * width
+        row[0] = r + 1
+        row[BLOCK_START::BLOCK_WIDTH] = [r + 1] * n_blocks
+        row[BLOCK_START + TIME_OFFSET::BLOCK_WIDTH] = [float(time[r])] * n_blocks
+        row[BLOCK_START + 2::BLOCK_WIDTH] = area[r].tolist()
+        row[BLOCK_START + CONC_OFFSET::BLOCK_WIDTH] = conc[r].tolist()
+        ws.append(row)
+    wb.save(path)
+    return names, time, conc, k
@@ -0,0 +1,329 @@
+import posixpath
+import xml.etree.ElementTree as ET
+import zipfile
+
+import numpy as np
+
+# ==========================================
+# 流式读取污染物降解工作簿：只取需要的列，整表不进内存
+# ==========================================
+# 表格规律 (和 6.复杂的排序.py 一致)：
+#   第 0 行是污染物名称，从第 1 列 (ATL) 开始每 5 列一个污染物
+#   第 1 行是小标题，名称列后面第 1 列是时间、第 3 列是浓度
+#   第 2 行开始是数据
+BLOCK_START = 1
+BLOCK_WIDTH = 5
+TIME_OFFSET = 1
+CONC_OFFSET = 3
+HEADER_ROWS = 2
+# find_blocks 找块的规则的标识，结果缓存 (result_cache.py) 记下它：规则变了，旧缓存里的块列表就不再用。
+# 改了 find_blocks 的逻辑 (不只是上面几个常数) 时把末尾的版本号加一
+BLOCK_LAYOUT = f"fixed-{BLOCK_START}+{BLOCK_WIDTH}k-t{TIME_OFFSET}-c{CONC_OFFSET}-v1"
+
+
+def has_calamine():
+    try:
+        import python_calamine  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def sheet_names(path):
+    """工作簿里所有 sheet 的名字 (只读目录，不解析单元格)。"""
+    with zipfile.ZipFile(path) as z:
+        return [name for name, _ in _xml_sheets(z)]
+
+
+def sheet_parts(path):
+    """[(sheet 名, 压缩包里工作表 XML 的路径), ...]，按工作簿里的顺序。"""
+    with zipfile.ZipFile(path) as z:
+        return _xml_sheets(z)
+
+
+def sheet_fingerprints(path):
+    """
+    {sheet 名: (工作表 XML 的 CRC32, 大小, 共享字符串表的 CRC32, 大小)}。
+    只读 zip 目录 (CRC 是压缩时就存好的)，不解压任何内容；某个 sheet 的内容没变，它的指纹就不变。
+    """
+    with zipfile.ZipFile(path) as z:
+        names = set(z.namelist())
+        strings = z.getinfo('xl/sharedStrings.xml') if 'xl/sharedStrings.xml' in names else None
+        shared = (strings.CRC, strings.file_size) if strings is not None else (0, 0)
+        return {name: (z.getinfo(member).CRC, z.getinfo(member).file_size) + shared
+                for name, member in _xml_sheets(z)}
+
+
+def iter_rows(path, sheet=None, min_row=0, max_row=None, max_col=None, engine='auto', usecols=None):
+    """
+    逐行产出单元格的值 (元组，行列号都从 0 开始算)，内存里同时只有一行。
+    sheet 是名字，None 表示第一个 sheet。max_col 限制每行最多多少列；
+    usecols 给定时只取这几列的值 (其余位置为 None)，没用到的单元格连类型转换都省掉。
+    engine:
+      'calamine' — 需要安装 python-calamine (Rust 实现)，最快
+      'xml'      — 直接流式解析工作表的 XML (标准库 ElementTree)，比 openpyxl 快 2~3 倍；数字不按单元格格式转成日期
+      'openpyxl' — openpyxl read_only 流式读取
+      'auto'     — 装了 calamine 用 calamine，否则用 xml
+    """
+    if engine == 'auto':
+        engine = 'calamine' if has_calamine() else 'xml'
+    if usecols is not None:
+        usecols = sorted(set(int(c) for c in usecols))
+        max_col = min(max_col, usecols[-1] + 1) if max_col is not None else usecols[-1] + 1
+    if engine == 'calamine':
+        rows, first = _calamine_rows(path, sheet), 0
+    elif engine == 'openpyxl':
+        rows, first = _openpyxl_rows(path, sheet, min_row, max_row, max_col), min_row
+    elif engine == 'xml':
+        rows, first = _xml_rows(path, sheet, max_row, max_col, usecols), 0
+    else:
+        raise ValueError(f"未知的读取引擎: {engine}")
+
+    for r, row in enumerate(rows, start=first):
+        if r < min_row:
+            continue
+        if max_row is not None and r >= max_row:
+            break
+        if max_col is not None:
+            row = row[:max_col]
+        if usecols is not None and engine != 'xml':
+            keep = set(usecols)
+            row = [v if c in keep else None for c, v in enumerate(row)]
+        yield tuple(row)
+
+
+def _openpyxl_rows(path, sheet, min_row, max_row, max_col):
+    import openpyxl
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet] if sheet is not None else wb.worksheets[0]
+        yield from ws.iter_rows(min_row=min_row + 1, max_row=max_row, max_col=max_col, values_only=True)
+    finally:
+        wb.close()
+
+
+def _calamine_rows(path, sheet):
+    from python_calamine import CalamineWorkbook
+    wb = CalamineWorkbook.from_path(str(path))
+    ws = wb.get_sheet_by_name(sheet if sheet is not None else wb.sheet_names[0])
+    # calamine 从第一个有数据的单元格开始给，前面空着的行列补回来，行列号才和 openpyxl 对得上
+    start_row, start_col = getattr(ws, 'start', None) or (0, 0)
+    for _ in range(start_row):
+        yield ()
+    pad = [None] * start_col
+    for row in ws.iter_rows():
+        yield pad + [None if v == '' else v for v in row]
+
+
+# ---------- xml 引擎 ----------
+_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_DIGITS = '0123456789'
+
+
+def _xml_sheets(z):
+    """[(sheet 名, 压缩包里的 XML 路径), ...]，按工作簿里的顺序。"""
+    workbook = ET.fromstring(z.read('xl/workbook.xml'))
+    rels = ET.fromstring(z.read('xl/_rels/workbook.xml.rels'))
+    targets = {rel.get('Id'): rel.get('Target') for rel in rels}
+    sheets = []
+    for el in workbook.iter(_NS + 'sheet'):
+        target = targets[el.get(_REL_NS + 'id')]
+        path = target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('xl', target))
+        sheets.append((el.get('name'), path))
+    return sheets
+
+
+def _shared_strings(z):
+    if 'xl/sharedStrings.xml' not in z.namelist():
+        return []
+    strings = []
+    for _, el in ET.iterparse(z.open('xl/sharedStrings.xml')):
+        if el.tag == _NS + 'si':
+            # 富文本的一个字符串可能拆成多段 <r><t>，拼起来
+            strings.append(''.join(t.text or '' for t in el.iter(_NS + 't')))
+            el.clear()
+    return strings
+
+
+def _column_index(letters, _cache={}):
+    idx = _cache.get(letters)
+    if idx is None:
+        idx = 0
+        for ch in letters:
+            idx = idx * 26 + ord(ch) - 64
+        idx = _cache[letters] = idx - 1
+    return idx
+
+
+def _xml_rows(path, sheet, max_row, max_col, usecols):
+    with zipfile.ZipFile(path) as z:
+        sheets = _xml_sheets(z)
+        if sheet is None:
+            member = sheets[0][1]
+        else:
+            member = dict(sheets).get(sheet)
+            if member is None:
+                raise KeyError(f"Worksheet {sheet} does not exist.")
+        strings = None
+        wanted = set(usecols) if usecols is not None else None
+        row_tag, cell_tag, value_tag = _NS + 'row', _NS + 'c', _NS + 'v'
+
+        next_row = next_col = 0
+        values = {}
+        # 只要 end 事件 (start 事件会多出一倍的 Python 循环)；每行处理完就 clear，
+        # 留在树上的只是一个个空的行节点 (每行约 100 字节)，单元格不会越攒越多
+        for _, el in ET.iterparse(z.open(member)):
+            tag = el.tag
+            if tag == cell_tag:
+                ref = el.get('r')
+                col = _column_index(ref.rstrip(_DIGITS)) if ref else next_col
+                next_col = col + 1
+                if (max_col is not None and col >= max_col) or (wanted is not None and col not in wanted):
+                    continue
+                kind = el.get('t')
+                if kind == 'inlineStr':
+                    values[col] = ''.join(t.text or '' for t in el.iter(_NS + 't'))
+                    continue
+                v = el.find(value_tag)
+                if v is None or v.text is None:
+                    continue
+                if kind is None or kind == 'n':
+                    text = v.text
+                    values[col] = float(text) if ('.' in text or 'E' in text or 'e' in text) else int(text)
+                elif kind == 's':
+                    if strings is None:
+                        strings = _shared_strings(z)
+                    values[col] = strings[int(v.text)]
+                elif kind == 'b':
+                    values[col] = v.text == '1'
+                elif kind == 'str':
+                    values[col] = v.text
+                # 'e' (错误值，如 #DIV/0!) 当作空
+            elif tag == row_tag:
+                r = el.get('r')
+                r = int(r) - 1 if r else next_row
+                # 中间没有写出来的空行补上
+                while next_row < r:
+                    yield ()
+                    next_row += 1
+                width = max(values) + 1 if values else 0
+                row = [None] * width
+                for c, v in values.items():
+                    row[c] = v
+                yield row
+                next_row = r + 1
+                next_col = 0
+                values = {}
+                el.clear()
+                if max_row is not None and next_row >= max_row:
+                    return
+
+
+def read_header(path, sheet=None, n_rows=HEADER_ROWS, engine='auto'):
+    """只读表头的前 n_rows 行，返回行的列表。"""
+    return list(iter_rows(path, sheet, max_row=n_rows, engine=engine))
+
+
+def find_blocks(header):
+    """按固定版式从表头找出所有污染物块：[(名称, 时间列, 浓度列), ...]。名称为空的块跳过。"""
+    names = header[0] if header else ()
+    # 表宽按所有表头行里最长的算 (最后一块的名称行在浓度列之前就结束了)
+    width = max((len(row) for row in header), default=0)
+    blocks = []
+    for i in range(BLOCK_START, len(names), BLOCK_WIDTH):
+        if i + CONC_OFFSET >= width:
+            break
+        name = names[i]
+        if name is None or (isinstance(name, str) and not name.strip()):
+            continue
+        blocks.append((str(name).strip() if isinstance(name, str) else name, i + TIME_OFFSET, i + CONC_OFFSET))
+    return blocks
+
+
+def read_columns(path, columns, sheet=None, start_row=HEADER_ROWS, engine='auto', chunk_rows=4096):
+    """
+    流式读取指定的几列 (0 起的列号)，返回 (行数, 列数) 的 float64 数组。
+    和 pd.to_numeric(errors='coerce') 一样，空单元格和转不成数字的文字都记为 NaN。
+    按 chunk_rows 行一块往预分配的数组里填，不在 Python 列表里攒整表。
+    """
+    columns = np.asarray(columns, dtype=np.int64)
+    chunks = []
+    buf = np.empty((chunk_rows, columns.size))
+    n = 0
+    for row in iter_rows(path, sheet, min_row=start_row, usecols=columns.tolist(), engine=engine):
+        if n == chunk_rows:
+            chunks.append(buf)
+            buf = np.empty((chunk_rows, columns.size))
+            n = 0
+        for j, c in enumerate(columns):
+            buf[n, j] = _to_float(row[c]) if c < len(row) else np.nan
+        n += 1
+    chunks.append(buf[:n])
+    data = np.concatenate(chunks) if len(chunks) > 1 else chunks[0]
+    # 去掉末尾整行全空的部分 (openpyxl 的 max_row 常常比实际数据多出一截带格式的空行)
+    filled = np.flatnonzero(~np.isnan(data).all(axis=1))
+    return data[:filled[-1] + 1] if filled.size else data[:0]
+
+
+def _to_float(v):
+    if isinstance(v, bool) or v is None:
+        return np.nan
+    if isinstance(v, (int, float)):
+        return float(v)
+    if isinstance(v, str):
+        try:
+            return float(v.strip())
+        except ValueError:
+            return np.nan
+    return np.nan
+
+
+class PollutantBlocks:
+    """
+    一个工作簿里所有 (或指定的) 污染物块的数据：
+    time / conc 都是 (行数, 污染物数) 的数组，第 j 列是第 j 个污染物，缺数据为 NaN。
+    """
+
+    def __init__(self, names, time, conc, columns=None):
+        self.names = list(names)
+        self.time = time
+        self.conc = conc
+        self.columns = columns  # [(时间列, 浓度列), ...]，工作簿里的原始列号
+
+    def __len__(self):
+        return len(self.names)
+
+    def __iter__(self):
+        for j, name in enumerate(self.names):
+            yield name, self.time[:, j], self.conc[:, j]
+
+    def select(self, indices):
+        """只留第 indices 个污染物 (按给的顺序) 的 PollutantBlocks。"""
+        indices = list(indices)
+        columns = [self.columns[j] for j in indices] if self.columns is not None else None
+        return PollutantBlocks([self.names[j] for j in indices], self.time[:, indices], self.conc[:, indices],
+                               columns=columns)
+
+    def block(self, name):
+        """某个污染物去掉空值后的 (时间, 浓度)。"""
+        j = self.names.index(name)
+        t, c = self.time[:, j], self.conc[:, j]
+        ok = ~np.isnan(t) & ~np.isnan(c)
+        return t[ok], c[ok]
+
+
+def read_blocks(path, sheet=None, names=None, blocks=None, engine='auto'):
+    """
+    读出污染物块。先只读两行表头找出各块的列号 (也可以直接传 blocks = [(名称, 时间列, 浓度列), ...])，
+    再流式读一遍数据，只保留这些块的时间列和浓度列。names 不为空时只读这些污染物。
+    """
+    if blocks is None:
+        blocks = find_blocks(read_header(path, sheet, engine=engine))
+    if names is not None:
+        wanted = set(names)
+        blocks = [b for b in blocks if b[0] in wanted]
+    columns = [c for _, t, k in blocks for c in (t, k)]
+    data = read_columns(path, columns, sheet, engine=engine) if blocks else np.empty((0, 0))
+    return PollutantBlocks([b[0] for b in blocks], data[:, 0::2], data[:, 1::2],
+                           columns=[(t, k) for _, t, k in blocks])
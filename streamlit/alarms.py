@@ -0,0 +1,281 @@
+import threading
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+
+# ==========================================
+# 报警规则引擎：所有规则、所有通道、所有机器人 / 站点，一批数据一次算完
+# ==========================================
+WARNING, CRITICAL = 'warning', 'critical'
+
+EVENT_COLUMNS = ['Time', 'Bot', 'Rule', 'Channel', 'Level', 'Value', 'Event']
+
+
+class ThresholdRule:
+    """读数低于 low 或高于 high。"""
+    lookback = 0
+
+    def __init__(self, name, channel, low=None, high=None, level=WARNING, persist=1):
+        self.name, self.channel, self.level, self.persist = name, channel, level, int(persist)
+        self.low, self.high = low, high
+
+    def check(self, batch):
+        cond = np.zeros(batch.values.size, dtype=bool)
+        if self.low is not None:
+            cond |= batch.values < self.low
+        if self.high is not None:
+            cond |= batch.values > self.high
+        return cond
+
+
+class RateRule:
+    """和同一机器人上一条读数相比，变化速度超过 max_rate (单位 / 秒)。"""
+    lookback = 1
+
+    def __init__(self, name, channel, max_rate, level=WARNING, persist=1):
+        self.name, self.channel, self.level, self.persist = name, channel, level, int(persist)
+        self.max_rate = float(max_rate)
+
+    def check(self, batch):
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rate = np.abs(batch.values - batch.prev) / batch.dt
+        return np.nan_to_num(rate, nan=0.0, posinf=0.0) > self.max_rate
+
+
+class ZScoreRule:
+    """读数偏离同一机器人最近 window 条读数的均值超过 z 个标准差 (至少要有 min_periods 条)。"""
+
+    def __init__(self, name, channel, window=60, z=3.0, min_periods=10, level=WARNING, persist=1):
+        self.name, self.channel, self.level, self.persist = name, channel, level, int(persist)
+        self.window, self.z, self.min_periods = int(window), float(z), int(min_periods)
+        self.lookback = self.window
+
+    def check(self, batch):
+        count, mean, std = batch.rolling(self.window)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            score = np.abs(batch.values - mean) / std
+        return (count >= self.min_periods) & (std > 0) & (np.nan_to_num(score) > self.z)
+
+
+class _ChannelBatch:
+    """
+    一个通道的一批读数，排成 (历史 + 本批, 分组) 的矩阵：
+    每一列是一个机器人，前 lookback 行是上一批留下的尾巴，后面是本批按到达顺序排好的读数，
+    这样“上一条读数”“前 w 条的均值 / 标准差”都变成整行切片和前缀和，所有机器人一起算。
+    (时间放在第 0 轴，前缀和沿连续内存走，比按行累加快得多)
+    """
+
+    def __init__(self, tail, tail_t, steps, cols, values, seconds, width):
+        lookback, n_cols = tail.shape
+        self.matrix = np.empty((lookback + width, n_cols))
+        self.times = np.empty((lookback + width, n_cols))
+        self.matrix[:lookback] = tail
+        self.times[:lookback] = tail_t
+        self.matrix[lookback:] = np.nan
+        self.times[lookback:] = np.nan
+        self.matrix[steps, cols] = values
+        self.times[steps, cols] = seconds
+        self.steps, self.cols = steps, cols
+        self.width = width
+        self.values = values
+        self._cumsums = None
+
+    @property
+    def prev(self):
+        return self.matrix[self.steps - 1, self.cols]
+
+    @property
+    def dt(self):
+        return self.times[self.steps, self.cols] - self.times[self.steps - 1, self.cols]
+
+    def rolling(self, window):
+        """每条读数之前 window 条 (不含自己) 的有效条数、均值、标准差。"""
+        lookback = self.matrix.shape[0] - self.width
+        if self.width * window <= 4 * self.matrix.shape[0]:
+            # 每组本批只有一两条时 (最常见)，直接对每个位置的窗口求和，比整列前缀和少走很多内存
+            sums = np.empty((3, self.width, self.matrix.shape[1]))
+            for p in range(self.width):
+                block = self.matrix[lookback + p - window:lookback + p]
+                valid = ~np.isnan(block)
+                x = np.where(valid, block, 0.0)
+                sums[:, p] = valid.sum(axis=0), x.sum(axis=0), (x * x).sum(axis=0)
+            count, s1, s2 = sums[:, self.steps - lookback, self.cols]
+        else:
+            if self._cumsums is None:
+                valid = ~np.isnan(self.matrix)
+                x = np.where(valid, self.matrix, 0.0)
+                shape = (self.matrix.shape[0] + 1, self.matrix.shape[1])
+                self._cumsums = []
+                for a in (valid, x, x * x):
+                    c = np.zeros(shape)
+                    np.cumsum(a, axis=0, out=c[1:])
+                    self._cumsums.append(c)
+            count, s1, s2 = (c[self.steps, self.cols] - c[self.steps - window, self.cols] for c in self._cumsums)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = s1 / count
+            var = (s2 - count * mean ** 2) / (count - 1)
+        return count, mean, np.sqrt(np.maximum(var, 0.0))
+
+
+class AlarmEngine:
+    """
+    按 group_col (机器人 / 站点编号) 分组评估一组报警规则。
+    每条规则可以要求连续 persist 条读数都满足条件才触发 (持续性)，
+    状态 (历史尾巴、连续计数、是否处于报警中) 跨批保留，所以分批喂数据和一次喂完结果一样。
+    每次状态翻转产生一条事件：Event = 'raise' (触发) 或 'clear' (解除)。
+    """
+
+    def __init__(self, rules, group_col='Bot', max_events=1000):
+        self.rules = list(rules)
+        self.group_col = group_col
+        self.channels = list(dict.fromkeys(rule.channel for rule in self.rules))
+        self._lookback = {ch: max([1] + [r.lookback for r in self.rules if r.channel == ch]) for ch in self.channels}
+        self.max_events = int(max_events)
+        self.lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self._n_groups = 0
+            # 每个通道每组最近 lookback 条读数和时间 (秒)，形状 (lookback, 组数)
+            self._tail = {ch: np.empty((self._lookback[ch], 0)) for ch in self.channels}
+            self._tail_t = {ch: np.empty((self._lookback[ch], 0)) for ch in self.channels}
+            self._run = np.zeros((len(self.rules), 0), dtype=np.int64)     # 每条规则、每组当前连续满足的条数
+            self._active = np.zeros((len(self.rules), 0), dtype=bool)      # 每条规则、每组是否处于报警中
+            self._events = deque()  # 每批一张事件表，总行数超过 max_events 时丢掉最旧的
+            self._n_events = 0
+
+    def _grow(self, n_groups):
+        extra = n_groups - self._n_groups
+        for ch in self.channels:
+            pad = np.full((self._lookback[ch], extra), np.nan)
+            self._tail[ch] = np.hstack((self._tail[ch], pad))
+            self._tail_t[ch] = np.hstack((self._tail_t[ch], pad))
+        self._run = np.hstack((self._run, np.zeros((len(self.rules), extra), dtype=np.int64)))
+        self._active = np.hstack((self._active, np.zeros((len(self.rules), extra), dtype=bool)))
+        self._n_groups = n_groups
+
+    # ---------- 评估 ----------
+    def evaluate(self, columns):
+        """评估一批数据 ({列名: 数组或标量}，需要 Time 列)，返回这一批产生的事件表。"""
+        n = max((np.size(v) for v in columns.values()), default=0)
+        if n == 0:
+            return _empty_events()
+        times = np.broadcast_to(np.asarray(columns['Time'], dtype='datetime64[ns]'), (n,))
+        groups = np.broadcast_to(np.asarray(columns.get(self.group_col, 0), dtype=np.int64), (n,))
+
+        events = []
+        with self.lock:
+            if n and groups.max() >= self._n_groups:
+                self._grow(int(groups.max()) + 1)
+            for ch in self.channels:
+                if ch not in columns:
+                    continue
+                values = np.broadcast_to(np.asarray(columns[ch], dtype=np.float64), (n,))
+                keep = np.flatnonzero(~np.isnan(values) & (groups >= 0) & ~np.isnat(times))
+                if keep.size:
+                    events += self._evaluate_channel(ch, keep[np.argsort(groups[keep], kind='stable')],
+                                                     groups, values, times)
+            if not events:
+                return _empty_events()
+            new = pd.concat(events, ignore_index=True).sort_values('Time', kind='stable', ignore_index=True)
+            self._events.append(new)
+            self._n_events += len(new)
+            while self._n_events - len(self._events[0]) >= self.max_events:
+                self._n_events -= len(self._events.popleft())
+        return new
+
+    def _evaluate_channel(self, ch, order, groups, values, times):
+        # 本批按 (组, 到达顺序) 排好；每条读数在组内的序号决定它落在矩阵的哪一行
+        g = groups[order]
+        starts = np.flatnonzero(np.r_[True, g[1:] != g[:-1]])
+        sizes = np.diff(np.r_[starts, g.size])
+        touched = g[starts]
+        cols = np.repeat(np.arange(starts.size), sizes)
+        pos = np.arange(g.size) - np.repeat(starts, sizes)
+        lookback = self._lookback[ch]
+        seconds = times[order].astype(np.int64) / 1e9
+
+        # 整支舰队一起上报时组号是连续的一段，用切片代替花式下标
+        sel = touched
+        if touched[-1] - touched[0] + 1 == touched.size:
+            sel = slice(touched[0], touched[-1] + 1)
+        width = int(sizes.max())
+        batch = _ChannelBatch(self._tail[ch][:, sel], self._tail_t[ch][:, sel],
+                              lookback + pos, cols, values[order], seconds, width)
+        # 留下每组最后 lookback 条，给下一批当历史
+        if (sizes == width).all():
+            self._tail[ch][:, sel] = batch.matrix[width:]
+            self._tail_t[ch][:, sel] = batch.times[width:]
+        else:
+            tail_steps = sizes + np.arange(lookback)[:, None]
+            tail_cols = np.arange(starts.size)
+            self._tail[ch][:, sel] = batch.matrix[tail_steps, tail_cols]
+            self._tail_t[ch][:, sel] = batch.times[tail_steps, tail_cols]
+
+        events = []
+        first = np.zeros(g.size, dtype=bool)
+        first[starts] = True
+        idx = np.arange(g.size)
+        last = np.r_[starts[1:], g.size] - 1
+        for i, rule in enumerate(self.rules):
+            if rule.channel != ch:
+                continue
+            cond = rule.check(batch)
+
+            # 连续满足的条数：到最近一次“不满足”为止的距离，组内还没断过就接上一批的计数
+            breaks = np.where(cond, -1, idx)
+            breaks[starts] = np.where(cond[starts], starts - 1, starts)
+            last_break = np.maximum.accumulate(breaks)
+            run = idx - last_break
+            carried = last_break == np.repeat(starts, sizes) - 1
+            run[carried] += self._run[i][g[carried]]
+
+            active = run >= rule.persist
+            was_active = np.empty_like(active)
+            was_active[1:] = active[:-1]
+            was_active[first] = self._active[i][touched]
+            self._run[i][touched] = run[last]
+            self._active[i][touched] = active[last]
+
+            flips = np.flatnonzero(active != was_active)
+            if flips.size:
+                events.append(pd.DataFrame({
+                    'Time': times[order][flips],
+                    'Bot': g[flips],
+                    'Rule': rule.name,
+                    'Channel': ch,
+                    'Level': rule.level,
+                    'Value': batch.values[flips],
+                    'Event': np.where(active[flips], 'raise', 'clear'),
+                }))
+        return events
+
+    # ---------- 读取 ----------
+    @property
+    def events(self):
+        """最近 max_events 条事件 (从旧到新)。"""
+        with self.lock:
+            if not self._events:
+                return _empty_events()
+            return pd.concat(self._events, ignore_index=True).tail(self.max_events).reset_index(drop=True)
+
+    def active(self, group=None):
+        """当前处于报警中的 (组, 规则, 级别)，group 不为 None 时只看这一组。"""
+        with self.lock:
+            rule_idx, bots = np.nonzero(self._active)
+        if group is not None:
+            keep = bots == int(group)
+            rule_idx, bots = rule_idx[keep], bots[keep]
+        return pd.DataFrame({
+            'Bot': bots,
+            'Rule': [self.rules[i].name for i in rule_idx],
+            'Channel': [self.rules[i].channel for i in rule_idx],
+            'Level': [self.rules[i].level for i in rule_idx],
+        })
+
+
+def _empty_events():
+    return pd.DataFrame({name: [] for name in EVENT_COLUMNS})
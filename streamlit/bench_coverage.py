@@ -0,0 +1,27 @@
+import time
+
+from simulation import SimulationRun
+from water_bodies import WaterBodyRegistry
+
+# ==========================================
+# 覆盖率对比：随机游走 vs 规划覆盖，同样的机器人数和步数
+# 运行: python streamlit/bench_coverage.py
+# ==========================================
+lake = WaterBodyRegistry.from_geojson(['qizhen_lake.geojson'])
+
+t0 = time.perf_counter()
+run = SimulationRun(0, lake=lake, n_bots=1, mode='planned')
+planner = run.fleet.planner
+print(f"规划路线: {(time.perf_counter() - t0) * 1000:.0f} ms  "
+      f"水面 {planner.raster.n_water} 格, 路线 {len(planner)} 个航点")
+
+for n_bots in (1, 10, 100):
+    for mode in ('random', 'planned'):
+        run = SimulationRun(0, lake=lake, n_bots=n_bots, mode=mode)
+        t0 = time.perf_counter()
+        for _ in range(500):
+            run.step()
+        elapsed = time.perf_counter() - t0
+        history = dict(run.fleet.coverage.history)
+        marks = "  ".join(f"{t} 步 {history[t]:>6.1%}" for t in (50, 200, 500))
+        print(f"{n_bots:>4} 台 {mode:<8} {marks}   每步 {elapsed / 500 * 1000:.2f} ms")
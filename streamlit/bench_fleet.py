@@ -0,0 +1,21 @@
+import os
+import time
+
+from fleet_engine import FleetSimulator
+from lake_geometry import LakeIndex, read_lake_polygon
+
+# ==========================================
+# 舰队引擎基准测试：10k 台机器人 x 1k 步
+# 运行: python streamlit/bench_fleet.py
+# ==========================================
+current_dir = os.path.dirname(os.path.abspath(__file__))
+lake = LakeIndex(read_lake_polygon(os.path.join(current_dir, 'qizhen_lake.geojson')))
+
+for n_bots, n_steps in [(1, 1000), (1000, 1000), (10000, 1000)]:
+    fleet = FleetSimulator(lake, n_bots=n_bots)
+    t0 = time.perf_counter()
+    for _ in range(n_steps):
+        fleet.step()
+    elapsed = time.perf_counter() - t0
+    print(f"{n_bots:>6} 台 x {n_steps} 步: {elapsed:.2f} s  "
+          f"({n_bots * n_steps / elapsed / 1e6:.2f} M 机器人步/秒)")
@@ -0,0 +1,41 @@
+import time
+
+import numpy as np
+import pandas as pd
+
+from gps_index import GPSIndex
+
+# ==========================================
+# GPS 时间索引基准测试：1e7 个定位点，按小时 / 小时 + 视野框查询，和布尔全表扫描对比
+# 运行: python streamlit/bench_gps_index.py
+# ==========================================
+N = 10_000_000
+rng = np.random.default_rng(0)
+times = rng.uniform(0, 24, N)
+lons = rng.standard_normal(N) / 500 + 120.09
+lats = rng.standard_normal(N) / 500 + 30.31
+df = pd.DataFrame({'time': times, 'lon': lons, 'lat': lats})
+
+t0 = time.perf_counter()
+index = GPSIndex(times, lons, lats, bucket=1 / 60, origin=0)
+print(f"建索引 ({N:,} 点, 分钟桶): {time.perf_counter() - t0:.2f} s")
+
+bbox = (120.088, 30.308, 120.092, 30.312)
+
+
+def timed(label, func, repeat=5):
+    best = np.inf
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - t0)
+    print(f"{label:<30} {best * 1000:>8.2f} ms  ({len(result):,} 点)")
+    return result
+
+
+timed("全表扫描: 10 点这一小时", lambda: df[(df['time'] >= 10) & (df['time'] < 11)])
+timed("索引: 10 点这一小时", lambda: index.query(10, 11))
+timed("全表扫描: 一小时 + 视野框", lambda: df[(df['time'] >= 10) & (df['time'] < 11)
+                                          & df['lon'].between(bbox[0], bbox[2]) & df['lat'].between(bbox[1], bbox[3])])
+timed("索引: 一小时 + 视野框", lambda: index.query(10, 11, bbox=bbox))
+timed("索引: 10:05 ~ 10:20 + 视野框", lambda: index.query(10 + 5 / 60, 10 + 20 / 60, bbox=bbox))
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+import shapely
+from shapely.geometry import Point
+
+from lake_geometry import LakeIndex, read_lake_polygon
+from water_bodies import WaterBodyRegistry
+
+# ==========================================
+# 湖内判定基准测试：原始逐点 contains vs 批量索引
+# 运行: python streamlit/bench_lake_geometry.py
+# ==========================================
+current_dir = os.path.dirname(os.path.abspath(__file__))
+geojson_path = os.path.join(current_dir, 'qizhen_lake.geojson')
+
+raw_polygon = read_lake_polygon(geojson_path)
+t0 = time.perf_counter()
+index = LakeIndex(read_lake_polygon(geojson_path))
+build_ms = (time.perf_counter() - t0) * 1000
+print(f"LakeIndex 建索引: {build_ms:.1f} ms  栅格 {index.nx}x{index.ny}, "
+      f"岸线格子占比 {np.mean(index.grid == 2):.1%}")
+
+# 在湖的外包框里均匀撒点，和巡航时的候选点分布接近
+rng = np.random.default_rng(0)
+min_x, min_y, max_x, max_y = raw_polygon.bounds
+n = 100_000
+lons = rng.uniform(min_x, max_x, n)
+lats = rng.uniform(min_y, max_y, n)
+
+
+def timed(label, func, n_points):
+    t0 = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - t0
+    print(f"{label:<32} {elapsed * 1e9 / n_points:>10.0f} ns/点")
+    return result
+
+
+# 原路径：每个点构造 Point 再调用 contains (只测 1 万个点，太慢)
+m = 10_000
+ref = timed("原始 polygon.contains(Point)",
+            lambda: np.array([raw_polygon.contains(Point(x, y)) for x, y in zip(lons[:m], lats[:m])]), m)
+unprepared = shapely.from_wkb(shapely.to_wkb(raw_polygon))
+timed("shapely.contains_xy (未 prepare)", lambda: shapely.contains_xy(unprepared, lons, lats), n)
+timed("shapely.contains_xy (prepare)", lambda: shapely.contains_xy(index.polygon, lons, lats), n)
+fast = timed("LakeIndex.contains_many", lambda: index.contains_many(lons, lats), n)
+
+assert np.array_equal(ref, fast[:m]), "索引结果与精确判定不一致"
+print("结果一致 ✅")
+
+# 冷启动：每次都从 GeoJSON 解析 + 建索引 vs 读取 WaterBodyRegistry 预编译的 .npz 几何缓存 (含地图描边)
+with tempfile.TemporaryDirectory() as cache_dir:
+    WaterBodyRegistry.from_geojson(geojson_path, cache_dir)  # 第一次：编译并写缓存
+    for label, load in [("GeoJSON 解析 + 建索引", lambda: LakeIndex(read_lake_polygon(geojson_path)).polygon),
+                        ("读取 .npz 几何缓存", lambda: WaterBodyRegistry.from_geojson(geojson_path, cache_dir).map_paths())]:
+        t0 = time.perf_counter()
+        for _ in range(20):
+            load()
+        print(f"{label:<24} {(time.perf_counter() - t0) / 20 * 1000:>8.2f} ms/次")
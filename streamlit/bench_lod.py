@@ -0,0 +1,45 @@
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import pydeck as pdk
+
+from lod import grid_thin, timeseries_lod
+
+# ==========================================
+# LOD 基准测试：原始数据 vs 降采样后，每次刷新发给浏览器的数据量和序列化耗时
+# 运行: python streamlit/bench_lod.py
+# ==========================================
+
+
+def make_history(n, n_bots=100, seed=0):
+    rng = np.random.default_rng(seed)
+    steps = max(1, n // n_bots)
+    return pd.DataFrame({
+        'Time': np.repeat(np.datetime64('2026-01-01T08:00') + np.arange(steps) * np.timedelta64(1, 's'), n_bots)[:n],
+        'Lat': 30.303 + rng.standard_normal(n) * 5e-4,
+        'Lon': 120.082 + rng.standard_normal(n) * 3e-4,
+        'pH': np.round(7 + rng.standard_normal(n) * 0.3, 2),
+        'DO': np.round(6.5 + rng.standard_normal(n) * 0.5, 2),
+    })
+
+
+def render(df, lod):
+    """构造看板里的地图和两张图表并序列化成 JSON，返回 (字节数, 秒)。"""
+    t0 = time.perf_counter()
+    map_df = grid_thin(df, 'Lon', 'Lat', 'DO', zoom=16) if lod else df[['Lon', 'Lat', 'DO']]
+    deck = pdk.Deck(layers=[pdk.Layer("ScatterplotLayer", data=map_df, get_position='[Lon, Lat]')])
+    payload = len(deck.to_json())
+    for col in ('pH', 'DO'):
+        chart_df = timeseries_lod(df, 'Time', [col]) if lod else df
+        payload += len(px.area(chart_df, x='Time', y=col).to_json())
+    return payload, time.perf_counter() - t0
+
+
+print(f"{'点数':>8} | {'原始 payload':>12} {'原始耗时':>9} | {'LOD payload':>12} {'LOD 耗时':>9}")
+for n in (1_000, 100_000, 1_000_000):
+    df = make_history(n)
+    raw_bytes, raw_s = render(df, lod=False)
+    lod_bytes, lod_s = render(df, lod=True)
+    print(f"{n:>8} | {raw_bytes / 1e6:>9.2f} MB {raw_s:>8.2f}s | {lod_bytes / 1e6:>9.2f} MB {lod_s:>8.2f}s")
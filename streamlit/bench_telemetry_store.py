@@ -0,0 +1,41 @@
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from telemetry_store import TelemetryStore
+
+# ==========================================
+# 遥测库基准测试：10 小时 x 100 台机器人 x 1 Hz
+# 运行: python streamlit/bench_telemetry_store.py
+# ==========================================
+n_bots, hours = 100, 10
+start = pd.Timestamp('2026-01-01 08:00:00')
+
+with tempfile.TemporaryDirectory() as root:
+    store = TelemetryStore(root)
+    rng = np.random.default_rng(0)
+    t0 = time.perf_counter()
+    for h in range(hours):
+        # 每小时一批：3600 秒 x 100 台
+        seconds = np.repeat(np.arange(3600), n_bots)
+        store.append({
+            'Time': (start + pd.Timedelta(hours=h)).to_datetime64() + seconds * np.timedelta64(1, 's'),
+            'Bot': np.tile(np.arange(n_bots), 3600),
+            'pH': rng.normal(7, 0.3, seconds.size),
+            'DO': rng.normal(6.5, 0.5, seconds.size),
+            'Lat': rng.normal(30.30, 0.001, seconds.size),
+            'Lon': rng.normal(120.08, 0.001, seconds.size),
+        })
+    total = hours * 3600 * n_bots
+    print(f"写入 {total / 1e6:.1f} M 条: {time.perf_counter() - t0:.2f} s, "
+          f"磁盘 {sum(os.path.getsize(os.path.join(root, p)) for p in os.listdir(root)) / 1e6:.0f} MB")
+
+    for label, offset, window in [('5 分钟', '4h30min', '5min'), ('1 小时', '4h30min', '1h'),
+                                  ('全部 10 小时', '0s', '10h')]:
+        begin = start + pd.Timedelta(offset)
+        t0 = time.perf_counter()
+        df = store.read_window(begin, begin + pd.Timedelta(window))
+        print(f"读取 {label:<8} {len(df):>9} 条: {(time.perf_counter() - t0) * 1000:.1f} ms")
@@ -0,0 +1,63 @@
+import os
+import time
+
+import numpy as np
+import shapely
+
+from lake_geometry import LakeIndex, read_lake_polygon
+from water_bodies import WaterBodyRegistry
+
+# ==========================================
+# 多水体判定基准测试：水体数量 / 顶点数增加时，每个点的判定开销
+# 运行: python streamlit/bench_water_bodies.py
+# ==========================================
+current_dir = os.path.dirname(os.path.abspath(__file__))
+lake = read_lake_polygon(os.path.join(current_dir, 'qizhen_lake.geojson'))
+min_x, min_y, max_x, max_y = lake.bounds
+dx, dy = (max_x - min_x) * 1.5, (max_y - min_y) * 1.5
+
+
+def make_lakes(n_lakes, max_segment=None):
+    """把启真湖复制 n_lakes 份排成方阵；max_segment 用来加密岸线顶点。"""
+    base = lake if max_segment is None else shapely.segmentize(lake, max_segment)
+    side = int(np.ceil(np.sqrt(n_lakes)))
+    return [shapely.affinity.translate(base, (i % side) * dx, (i // side) * dy) for i in range(n_lakes)]
+
+
+def bench(n_lakes, max_segment=None, n_points=100_000):
+    polygons = make_lakes(n_lakes, max_segment)
+    t0 = time.perf_counter()
+    registry = WaterBodyRegistry([str(i) for i in range(n_lakes)], [LakeIndex(p, grid_size=128) for p in polygons])
+    build_s = time.perf_counter() - t0
+
+    # 每个点先随机挑一个湖，再在它的外包框里撒点 (和巡航候选点的分布接近)
+    rng = np.random.default_rng(0)
+    which = rng.integers(0, n_lakes, n_points)
+    b = registry.bounds[which]
+    lons = rng.uniform(b[:, 0], b[:, 2])
+    lats = rng.uniform(b[:, 1], b[:, 3])
+
+    registry.contains_many(lons[:100], lats[:100])  # 预热 (首次解析多边形)
+    t0 = time.perf_counter()
+    result = registry.contains_many(lons, lats)
+    elapsed = time.perf_counter() - t0
+
+    # 小样本和逐个多边形的精确结果对照
+    sample = slice(0, 2000)
+    exact = np.zeros(2000, dtype=bool)
+    for p in polygons:
+        exact |= shapely.contains_xy(p, lons[sample], lats[sample])
+    assert np.array_equal(result[sample], exact), "登记表判定与精确结果不一致"
+
+    n_vertices = shapely.get_num_coordinates(polygons[0])
+    print(f"{n_lakes:>6} 个湖  每湖 {n_vertices:>6} 顶点  建索引 {build_s:>6.2f} s  "
+          f"判定 {elapsed * 1e9 / n_points:>6.0f} ns/点")
+
+
+print("水体数量增加：")
+for n_lakes in (1, 10, 100, 1000):
+    bench(n_lakes)
+
+print("岸线顶点增加 (100 个湖)：")
+for segment in (None, 1e-5, 2e-6):
+    bench(100, segment)
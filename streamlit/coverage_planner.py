@@ -0,0 +1,239 @@
+from collections import deque
+
+import numpy as np
+
+from lod import MAX_CHART_POINTS
+from session_cache import freeze
+
+
+# ==========================================
+# 覆盖式巡航规划：湖面栅格 + 割草机 (boustrophedon) 路线
+# ==========================================
+METERS_PER_DEG_LAT = 111_320.0
+
+
+class LakeRaster:
+    """
+    按 cell_m 米见方切出的湖面栅格 (经度方向按纬度余弦修正)，格心在湖内的格子记为水面。
+    lake 可以是 LakeIndex 也可以是 WaterBodyRegistry，只用到 bounds 和 contains_many。
+    """
+
+    def __init__(self, lake, cell_m=5.0):
+        b = np.asarray(lake.bounds, dtype=np.float64).reshape(-1, 4)
+        self.origin = (b[:, 0].min(), b[:, 1].min())
+        self.cell_m = float(cell_m)
+        self.dlat = cell_m / METERS_PER_DEG_LAT
+        self.dlon = self.dlat / np.cos(np.radians((b[:, 1].min() + b[:, 3].max()) / 2))
+        self.nx = int(np.ceil((b[:, 2].max() - self.origin[0]) / self.dlon)) or 1
+        self.ny = int(np.ceil((b[:, 3].max() - self.origin[1]) / self.dlat)) or 1
+
+        iy, ix = np.divmod(np.arange(self.ny * self.nx), self.nx)
+        self.center_lon = self.origin[0] + (ix + 0.5) * self.dlon
+        self.center_lat = self.origin[1] + (iy + 0.5) * self.dlat
+        self.water = lake.contains_many(self.center_lon, self.center_lat)  # 展平的 (ny * nx) 水面掩膜
+        self.n_water = int(self.water.sum())
+
+    def cell_index(self, lons, lats):
+        """经纬度所在格子的展平编号，栅格外为 -1。"""
+        ix = np.floor((np.asarray(lons, dtype=np.float64) - self.origin[0]) / self.dlon).astype(np.int64)
+        iy = np.floor((np.asarray(lats, dtype=np.float64) - self.origin[1]) / self.dlat).astype(np.int64)
+        inside = (ix >= 0) & (ix < self.nx) & (iy >= 0) & (iy < self.ny)
+        return np.where(inside, iy * self.nx + ix, -1)
+
+
+class CoveragePlanner:
+    """
+    每个湖只规划一次的覆盖路线：
+      1. 按连通水域分块 (多个水体各自一块；块与块之间没有水路，机器人直接转场到下一块)
+      2. 每块自南向北逐行扫描，行内方向交替 (割草机式)，一行里被陆地隔开的几段按扫描方向依次走
+      3. 相邻两个航点之间如果直线穿过陆地，就用栅格上的广度优先搜索绕水路过去
+    结果是一条首尾相接的航点序列 tour。n 台机器人把 tour 平均分段，各从自己那段的起点出发，
+    每一步前进 stride 个航点，第 t 步的位置就是 tour[(起点 + t * stride) % 长度]，O(1) 查表。
+    """
+
+    def __init__(self, lake, cell_m=5.0, min_cells=10):
+        self.raster = LakeRaster(lake, cell_m)
+        self._drop_small_components(min_cells)
+        self.tour = self._plan()
+        self.tour_lon = self.raster.center_lon[self.tour]
+        self.tour_lat = self.raster.center_lat[self.tour]
+
+    def __len__(self):
+        return self.tour.size
+
+    # ---------- 规划 (只在建对象时跑一次) ----------
+    def _drop_small_components(self, min_cells):
+        # 栅格化后和主水面断开的零星小格子 (比格子还窄的湖湾) 开不进去，不算进水面
+        r = self.raster
+        labels = _label_components(r.water.reshape(r.ny, r.nx)).ravel()
+        sizes = np.bincount(labels)
+        small = sizes < min_cells
+        small[0] = False
+        r.water &= ~small[labels]
+        r.n_water = int(r.water.sum())
+
+    def _plan(self):
+        r = self.raster
+        water = r.water.reshape(r.ny, r.nx)
+        labels = _label_components(water)
+        tour = []
+        for comp in range(1, labels.max() + 1):
+            sweep = []
+            for row, y in enumerate(np.flatnonzero((labels == comp).any(axis=1))):
+                cells = np.flatnonzero(labels[y] == comp)
+                if row % 2:
+                    cells = cells[::-1]
+                sweep.append(y * r.nx + cells)
+            sweep = np.concatenate(sweep)
+
+            # 相邻航点不相邻 (换行、跨过陆地的分段) 时补上一段水路
+            part = [sweep[:1]]
+            for a, b in zip(sweep[:-1], sweep[1:]):
+                ay, ax = divmod(int(a), r.nx)
+                by, bx = divmod(int(b), r.nx)
+                if max(abs(ay - by), abs(ax - bx)) > 1 and not _straight_clear(water, ay, ax, by, bx):
+                    part.append(_bfs_path(water, labels == comp, a, b)[1:-1])
+                part.append([b])
+            tour.append(np.concatenate(part).astype(np.int64))
+        return np.concatenate(tour) if tour else np.empty(0, dtype=np.int64)
+
+    # ---------- 查表 ----------
+    def offsets(self, n_bots):
+        """n 台机器人各自在 tour 上的起点 (平均分段)。"""
+        return (np.arange(n_bots) * len(self)) // max(n_bots, 1)
+
+    def positions(self, n_bots, tick, stride=1):
+        """第 tick 步所有机器人的 (lon, lat)。"""
+        idx = (self.offsets(n_bots) + tick * stride) % len(self)
+        return self.tour_lon[idx], self.tour_lat[idx]
+
+    def swept(self, n_bots, tick, stride=1):
+        """第 tick 步 (从 tick-1 走到 tick) 所有机器人经过的格子。"""
+        start = self.offsets(n_bots) + (tick - 1) * stride + 1
+        idx = (start[:, None] + np.arange(stride)) % len(self)
+        return self.tour[idx.ravel()]
+
+
+class CoverageTracker:
+    """
+    记录哪些水面格子已经采过样，给出覆盖率随时间的变化。
+    覆盖率曲线最多保留 max_history 个点：攒满了就隔一个丢一个，之后的记录间隔翻倍，
+    所以不管跑多少步内存都是常数，曲线在整段时间上均匀分布 (最新的一点总在末尾)。
+    """
+
+    def __init__(self, raster, max_history=MAX_CHART_POINTS):
+        self.raster = raster
+        self.visited = np.zeros(raster.water.size, dtype=bool)
+        self.n_visited = 0
+        self.max_history = int(max_history)
+        self.history = []  # [(步数, 覆盖率), ...]
+        self._stride = 1   # 现在每隔几步留一个点
+
+    def mark_cells(self, cells):
+        cells = np.asarray(cells, dtype=np.int64)
+        cells = cells[(cells >= 0)]
+        cells = np.unique(cells[self.raster.water[cells] & ~self.visited[cells]])
+        self.visited[cells] = True
+        self.n_visited += int(cells.size)
+
+    def mark_points(self, lons, lats):
+        self.mark_cells(self.raster.cell_index(lons, lats))
+
+    @property
+    def fraction(self):
+        return self.n_visited / self.raster.n_water if self.raster.n_water else 0.0
+
+    def record(self, tick):
+        point = (int(tick), self.fraction)
+        if len(self.history) > 1 and self.history[-1][0] - self.history[-2][0] < self._stride:
+            self.history[-1] = point  # 离上一个保留点还不到一个间隔，末尾这个点换成最新的
+        else:
+            self.history.append(point)
+        if len(self.history) > self.max_history:
+            self.history = self.history[:-1:2] + self.history[-1:]
+            self._stride *= 2
+
+    def get_state(self):
+        # 覆盖率曲线不进存档点 (否则每个存档点都拷一份越来越长的曲线)，恢复时截掉之后的部分
+        return {'visited': self.visited.copy(), 'tick': self.history[-1][0] if self.history else 0}
+
+    def set_state(self, state):
+        self.visited = state['visited'].copy()
+        self.n_visited = int(self.visited.sum())
+        self.history = [point for point in self.history if point[0] <= state['tick']]
+
+
+# 同一个湖对象、同样格子大小的规划只做一次，所有会话共用 (数组标成只读)
+_planner_cache = {}
+
+
+def plan_for(lake, cell_m=5.0):
+    key = (id(lake), float(cell_m))
+    planner = _planner_cache.get(key)
+    if planner is None:
+        planner = _planner_cache[key] = freeze(CoveragePlanner(lake, cell_m))
+    return planner
+
+
+def _label_components(water):
+    """8 连通的水域编号 (0 = 陆地)，并查集合并相邻格子。栅格化后只靠斜角相连的窄水道也算连通。"""
+    ny, nx = water.shape
+    parent = list(range(ny * nx + 1))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    ids = np.arange(ny * nx).reshape(ny, nx) + 1
+    # 右、下、右下、左下四个方向相邻的水面格子合并
+    pairs = (
+        (np.s_[:, :-1], np.s_[:, 1:]),
+        (np.s_[:-1, :], np.s_[1:, :]),
+        (np.s_[:-1, :-1], np.s_[1:, 1:]),
+        (np.s_[:-1, 1:], np.s_[1:, :-1]),
+    )
+    for sa, sb in pairs:
+        both = water[sa] & water[sb]
+        for i, j in zip(ids[sa][both].tolist(), ids[sb][both].tolist()):
+            ri, rj = find(i), find(j)
+            if ri != rj:
+                parent[max(ri, rj)] = min(ri, rj)
+
+    roots = np.array([find(i) for i in ids[water].tolist()])
+    labels = np.zeros((ny, nx), dtype=np.int64)
+    # 按每块里编号最小的格子排序编号，南边 (行号小) 的水域排在前面
+    labels[water] = np.unique(roots, return_inverse=True)[1] + 1
+    return labels
+
+
+def _straight_clear(water, ay, ax, by, bx):
+    n = 2 * max(abs(ay - by), abs(ax - bx)) + 1
+    ys = np.rint(np.linspace(ay, by, n)).astype(np.int64)
+    xs = np.rint(np.linspace(ax, bx, n)).astype(np.int64)
+    return bool(water[ys, xs].all())
+
+
+def _bfs_path(water, region, a, b):
+    """region 内从格子 a 到格子 b 的最短 8 连通路径 (展平编号，含两端)。"""
+    ny, nx = water.shape
+    flat = region.ravel()
+    prev = np.full(flat.size, -1, dtype=np.int64)
+    prev[a] = a
+    queue = deque([int(a)])
+    while queue:
+        c = queue.popleft()
+        if c == b:
+            break
+        y, x = divmod(c, nx)
+        for dy, dx in ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, -1), (-1, 1), (1, -1), (1, 1)):
+            if 0 <= y + dy < ny and 0 <= x + dx < nx:
+                n = c + dy * nx + dx
+                if flat[n] and prev[n] < 0:
+                    prev[n] = c
+                    queue.append(n)
+    path = [int(b)]
+    while path[-1] != a:
+        path.append(int(prev[path[-1]]))
+    return np.array(path[::-1], dtype=np.int64)
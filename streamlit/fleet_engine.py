@@ -0,0 +1,153 @@
+import time
+
+import numpy as np
+
+from lake_geometry import LakeIndex
+
+
+# ==========================================
+# 机器人舰队引擎：N 台机器人一次性向量化推进
+# ==========================================
+class FleetSimulator:
+    """
+    用“结构数组”(每个属性一个 NumPy 数组) 保存整支舰队的状态，
+    每一步对所有机器人同时做随机游走 + 批量湖内判定 (LakeIndex.contains_many)。
+    行为与原来的 CampusBot.move() 一致：每台机器人最多尝试 max_tries 次，
+    落在湖内才接受这一步并更新 pH / DO，否则原地不动。
+    """
+
+    def __init__(self, lake, n_bots=1, start=None, step_std=0.0003,
+                 max_tries=15, rng=None, planner=None, stride=1, coverage=None):
+        # lake 可以直接传 shapely 多边形，也可以传已经建好的 LakeIndex 或 WaterBodyRegistry
+        # (推荐，避免重复建索引)
+        self.lake = lake if hasattr(lake, 'contains_many') else LakeIndex(lake)
+
+        self.n_bots = int(n_bots)
+        # planner (coverage_planner.CoveragePlanner) 不为空时按规划路线巡航，每步沿路线前进 stride 个航点；
+        # coverage (CoverageTracker) 不为空时记录每一步采过样的格子
+        self.planner = planner
+        self.stride = int(stride)
+        self.coverage = coverage
+        self.tick = 0
+        if start is None and planner is not None:
+            start = planner.positions(self.n_bots, 0, self.stride)
+        if start is None:
+            # 多水体登记表会把机器人轮流分配到各个水体，单个湖就都从安全起点出发
+            start = (self.lake.start_points(self.n_bots) if hasattr(self.lake, 'start_points')
+                     else self.lake.safe_point)
+
+        self.step_std = step_std
+        self.max_tries = max_tries
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+        # start 可以是单个 (lon, lat)，也可以是每台机器人各自的经纬度数组
+        self.lon = np.broadcast_to(np.asarray(start[0], dtype=np.float64), (self.n_bots,)).copy()
+        self.lat = np.broadcast_to(np.asarray(start[1], dtype=np.float64), (self.n_bots,)).copy()
+        self.ph = np.full(self.n_bots, 7.1)
+        self.do = np.full(self.n_bots, 6.5)
+        if self.coverage is not None:
+            self.coverage.mark_points(self.lon, self.lat)
+            self.coverage.record(0)
+
+    def step(self):
+        """所有机器人前进一步，返回本步成功移动的布尔掩码。"""
+        self.tick += 1
+        if self.planner is not None:
+            moved = self._follow_plan()
+        else:
+            moved = self._random_walk()
+            if self.coverage is not None:
+                self.coverage.mark_points(self.lon, self.lat)
+        if self.coverage is not None:
+            self.coverage.record(self.tick)
+
+        # 只有移动成功的机器人才更新水质读数
+        n_moved = int(moved.sum())
+        if n_moved:
+            d_ph, d_do = self.rng.normal(0, 1, size=(2, n_moved)) * np.array([[0.1], [0.2]])
+            self.ph[moved] = np.clip(self.ph[moved] + d_ph, 5.0, 9.0)
+            self.do[moved] = np.clip(self.do[moved] + d_do, 0.5, 12.0)
+        return moved
+
+    def _follow_plan(self):
+        # 航点查表，不需要湖内判定，也不会有被拒绝的候选步
+        self.lon, self.lat = self.planner.positions(self.n_bots, self.tick, self.stride)
+        if self.coverage is not None:
+            self.coverage.mark_cells(self.planner.swept(self.n_bots, self.tick, self.stride))
+        return np.ones(self.n_bots, dtype=bool)
+
+    def _random_walk(self):
+        pending = np.arange(self.n_bots)
+        moved = np.zeros(self.n_bots, dtype=bool)
+
+        for _ in range(self.max_tries):
+            if pending.size == 0:
+                break
+            d_lat, d_lon = self.rng.normal(0, self.step_std, size=(2, pending.size))
+            temp_lat = self.lat[pending] + d_lat
+            temp_lon = self.lon[pending] + d_lon
+
+            inside = self.lake.contains_many(temp_lon, temp_lat)
+            accepted = pending[inside]
+            self.lat[accepted] = temp_lat[inside]
+            self.lon[accepted] = temp_lon[inside]
+            moved[accepted] = True
+            pending = pending[~inside]
+        return moved
+
+    def run(self, n_steps):
+        """连续推进 n_steps 步，返回形状为 (n_steps, n_bots) 的轨迹数组字典。"""
+        out = {key: np.empty((n_steps, self.n_bots)) for key in ('Lat', 'Lon', 'pH', 'DO')}
+        for i in range(n_steps):
+            self.step()
+            out['Lat'][i] = self.lat
+            out['Lon'][i] = self.lon
+            out['pH'][i] = self.ph
+            out['DO'][i] = self.do
+        return out
+
+    def get_state(self):
+        """完整状态 (位置、读数、随机数发生器)，用于存档点和回放。"""
+        return {
+            'lat': self.lat.copy(),
+            'lon': self.lon.copy(),
+            'ph': self.ph.copy(),
+            'do': self.do.copy(),
+            'rng': self.rng.bit_generator.state,
+            'tick': self.tick,
+            'coverage': self.coverage.get_state() if self.coverage is not None else None,
+        }
+
+    def set_state(self, state):
+        self.lat = state['lat'].copy()
+        self.lon = state['lon'].copy()
+        self.ph = state['ph'].copy()
+        self.do = state['do'].copy()
+        self.rng.bit_generator.state = state['rng']
+        self.tick = state['tick']
+        if self.coverage is not None:
+            self.coverage.set_state(state['coverage'])
+
+    def snapshot(self):
+        """当前状态的列式快照 (pH / DO 保留两位小数)，可直接批量写入 TelemetryRing。"""
+        return {
+            'Lat': self.lat.copy(),
+            'Lon': self.lon.copy(),
+            'pH': np.round(self.ph, 2),
+            'DO': np.round(self.do, 2),
+        }
+
+    def records(self):
+        """把当前状态转成和原 CampusBot.move() 一样的字典列表 (每台机器人一条)。"""
+        now = time.strftime("%H:%M:%S")
+        snap = self.snapshot()
+        return [
+            {'Time': now, 'Lat': lat, 'Lon': lon, 'pH': p, 'DO': d}
+            for lat, lon, p, d in zip(snap['Lat'].tolist(), snap['Lon'].tolist(),
+                                      snap['pH'].tolist(), snap['DO'].tolist())
+        ]
+
+    def move(self):
+        """推进一步并返回每台机器人的读数。"""
+        self.step()
+        return self.records()
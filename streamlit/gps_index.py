@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+
+# ==========================================
+# GPS 定位点的时间索引：按 (时间桶, 经度) 排好序，时间段 + 经纬度框查询只切片不全表扫描
+# ==========================================
+class GPSIndex:
+    """
+    建索引时把所有定位点按 (时间桶, 经度) 排一次序 (O(n log n))，并记下每个时间桶在排序后数组里的起止下标。
+    查询 [t0, t1) 时间段：直接由桶号查出起止下标，连续切片；
+    再加经纬度框：每个桶内按经度有序，二分出经度范围，只对剩下的 k 个点判断纬度。
+    总开销 O(桶数 * log n + k)，和总点数无关。时间段没对齐桶边界时，首尾两个桶逐条判断时间。
+
+    times 可以是数字 (比如小时) 或 datetime64；bucket 是桶的宽度，和 times 同单位
+    (datetime64 时可以写 '1min' / '1h' 之类)；origin 是第 0 个桶的起点，默认取最早的时间。
+    columns 是其它要一起排好序的列 ({列名: 数组})。
+    """
+
+    def __init__(self, times, lons, lats, bucket=1, origin=None, columns=None):
+        times = np.asarray(times)
+        self.is_datetime = np.issubdtype(times.dtype, np.datetime64)
+        if self.is_datetime:
+            times = times.astype('datetime64[ns]')
+            self.bucket = pd.Timedelta(bucket).value
+            keys = times.astype(np.int64)
+        else:
+            self.bucket = bucket
+            keys = times
+        if origin is not None:
+            self.origin = pd.Timestamp(origin).value if self.is_datetime else origin
+        else:
+            self.origin = keys.min() if keys.size else 0
+        bucket_ids = np.floor((keys - self.origin) / self.bucket).astype(np.int64)
+        if keys.size and bucket_ids.min() < 0:
+            raise ValueError("origin 晚于最早的定位时间")
+
+        # 先按经度排，再按桶号稳定排序 (整数稳定排序是基数排序)，比 np.lexsort 快一倍左右
+        order = np.argsort(np.asarray(lons, dtype=np.float64))
+        order = order[np.argsort(bucket_ids[order], kind='stable')]
+        self.columns = {'time': times[order], 'lon': np.asarray(lons, dtype=np.float64)[order],
+                        'lat': np.asarray(lats, dtype=np.float64)[order]}
+        for name, values in (columns or {}).items():
+            self.columns[name] = np.asarray(values)[order]
+        self._keys = keys[order]
+        self.n_buckets = int(bucket_ids.max()) + 1 if keys.size else 0
+        # offsets[b] : offsets[b + 1] 是第 b 个桶在排序后数组里的范围
+        self.offsets = np.searchsorted(bucket_ids[order], np.arange(self.n_buckets + 1))
+
+    def __len__(self):
+        return self._keys.size
+
+    def bucket_counts(self):
+        """每个时间桶里的点数 (不用扫描数据)。"""
+        return np.diff(self.offsets)
+
+    def _key(self, t):
+        return pd.Timestamp(t).value if self.is_datetime else t
+
+    # ---------- 查询 ----------
+    def ranges(self, t0=None, t1=None, bbox=None):
+        """
+        满足时间段 [t0, t1) 和经度范围的 (起, 止) 下标区间列表 (纬度和未对齐的时间边界还要再判断一次，见 select)。
+        bbox = (西, 南, 东, 北)，None 表示不限。
+        """
+        # t0 所在的桶到 t1 之前的最后一个桶 (t1 正好在桶边界上时不含它所在的桶)
+        b0 = 0 if t0 is None else max(int(np.floor((self._key(t0) - self.origin) / self.bucket)), 0)
+        b1 = self.n_buckets if t1 is None else min(int(np.ceil((self._key(t1) - self.origin) / self.bucket)),
+                                                   self.n_buckets)
+        if b0 >= b1:
+            return []
+        if bbox is None:
+            return [(int(self.offsets[b0]), int(self.offsets[b1]))]
+        lon = self.columns['lon']
+        out = []
+        for b in range(b0, b1):
+            lo, hi = self.offsets[b], self.offsets[b + 1]
+            if lo == hi:
+                continue
+            west = np.searchsorted(lon[lo:hi], bbox[0], side='left')
+            east = np.searchsorted(lon[lo:hi], bbox[2], side='right')
+            if east > west:
+                out.append((int(lo + west), int(lo + east)))
+        return out
+
+    def select(self, t0=None, t1=None, bbox=None):
+        """满足条件的点在排序后数组里的下标。"""
+        ranges = self.ranges(t0, t1, bbox)
+        if not ranges:
+            return np.empty(0, dtype=np.int64)
+        idx = np.concatenate([np.arange(lo, hi) for lo, hi in ranges])
+        keep = np.ones(idx.size, dtype=bool)
+        if bbox is not None:
+            lat = self.columns['lat'][idx]
+            keep &= (lat >= bbox[1]) & (lat <= bbox[3])
+        # 只有落在首尾两个桶里的点才可能越过时间边界
+        keys = self._keys[idx]
+        if t0 is not None:
+            keep &= keys >= self._key(t0)
+        if t1 is not None:
+            keep &= keys < self._key(t1)
+        return idx[keep]
+
+    def query(self, t0=None, t1=None, bbox=None, columns=None):
+        """时间段 [t0, t1)、经纬度框 bbox 内的点，返回 DataFrame (按时间桶、经度排序)。"""
+        idx = self.select(t0, t1, bbox)
+        names = columns or list(self.columns)
+        return pd.DataFrame({name: self.columns[name][idx] for name in names})
+
+    def count(self, t0=None, t1=None, bbox=None):
+        if bbox is None and (t0 is None or self._aligned(t0)) and (t1 is None or self._aligned(t1)):
+            return sum(hi - lo for lo, hi in self.ranges(t0, t1))
+        return int(self.select(t0, t1, bbox).size)
+
+    def _aligned(self, t):
+        return (self._key(t) - self.origin) % self.bucket == 0
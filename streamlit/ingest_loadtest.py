@@ -0,0 +1,104 @@
+import argparse
+import asyncio
+import threading
+import time
+
+import numpy as np
+
+from ingest_service import DEFAULT_HOST, IngestService, encode_frame
+from telemetry_buffer import TelemetryRing, now
+from virtual_sensor import SensorBank
+
+# ==========================================
+# 采集服务压测：一大批虚拟传感器通过本地 socket 持续发帧
+# 运行: python streamlit/ingest_loadtest.py --sensors 2000 --steps 50
+# ==========================================
+
+
+def build_frames(n_sensors, n_steps, batch):
+    """先把所有传感器的读数算好并打包成帧，压测时只测网络 + 采集服务本身。"""
+    bot_ids = np.arange(n_sensors, dtype=np.int32)
+    is_ph = bot_ids % 2 == 0
+    bank = SensorBank(
+        np.where(is_ph, "pH传感器", "氨氮传感器"),
+        base_values=np.where(is_ph, 7.0, 0.5),
+        volatilities=np.where(is_ph, 0.05, 0.02)
+    )
+    # 所有传感器、所有步一次采样，得到 (n_steps, n_sensors) 的读数矩阵
+    readings = bank.sample(n_steps)
+
+    frames = []
+    for values in readings:
+        t = now()
+        for lo in range(0, n_sensors, batch):
+            sl = slice(lo, lo + batch)
+            frames.append(encode_frame({
+                'Time': t,
+                'Bot': bot_ids[sl],
+                'pH': np.where(is_ph[sl], values[sl], np.nan),
+                'Ammonia': np.where(is_ph[sl], np.nan, values[sl]),
+            }))
+    return frames
+
+
+async def send_all(frames, host, port, n_connections):
+    async def worker(chunk):
+        reader, writer = await asyncio.open_connection(host, port)
+        for frame in chunk:
+            writer.write(frame)
+            await writer.drain()
+        writer.close()
+        await writer.wait_closed()
+
+    await asyncio.gather(*(worker(frames[i::n_connections]) for i in range(n_connections)))
+
+
+def watch_readers(buffer, stop, samples):
+    """模拟看板每次重跑时读取共享缓冲区，记录每次读取耗时。"""
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        buffer.to_frame(copy=True)
+        samples.append(time.perf_counter() - t0)
+        time.sleep(0.01)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="采集服务压测")
+    parser.add_argument('--sensors', type=int, default=2000, help="虚拟传感器数量")
+    parser.add_argument('--steps', type=int, default=50, help="每个传感器发送的读数条数")
+    parser.add_argument('--batch', type=int, default=500, help="每帧打包的记录数")
+    parser.add_argument('--connections', type=int, default=8, help="并发连接数")
+    parser.add_argument('--port', type=int, default=0, help="采集服务端口 (0 = 自动分配)")
+    args = parser.parse_args()
+
+    print(f"生成 {args.sensors} 个传感器 x {args.steps} 步的读数...")
+    frames = build_frames(args.sensors, args.steps, args.batch)
+    total = args.sensors * args.steps
+
+    buffer = TelemetryRing(['Time', 'Bot', 'pH', 'Ammonia'], capacity=100_000)
+    service = IngestService(buffer, port=args.port).start()
+
+    stop = threading.Event()
+    read_times = []
+    reader = threading.Thread(target=watch_readers, args=(buffer, stop, read_times), daemon=True)
+    reader.start()
+
+    t0 = time.perf_counter()
+    asyncio.run(send_all(frames, DEFAULT_HOST, service.port, args.connections))
+    done = service.wait_for(total)
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    reader.join()
+    service.stop()
+
+    print(f"发送 {len(frames)} 帧 / {total} 条记录，用时 {elapsed:.2f} s "
+          f"({'完成' if done else '超时'})")
+    print(f"吞吐: {service.stats['records'] / elapsed:,.0f} 条/秒, "
+          f"{service.stats['bytes'] / elapsed / 1e6:.1f} MB/s")
+    if read_times:
+        print(f"看板读取共享缓冲区: 平均 {np.mean(read_times) * 1000:.2f} ms, "
+              f"最慢 {np.max(read_times) * 1000:.2f} ms (共 {len(read_times)} 次)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+import asyncio
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+from telemetry_store import RECORD_DTYPE
+
+
+# ==========================================
+# 帧格式：8 字节帧头 + N 条 RECORD_DTYPE 定长记录
+#   帧头 = 魔数 b'ZJUW' + uint32 记录条数 (小端)
+# 和磁盘遥测库用同一种记录格式，解码就是一次 np.frombuffer，不需要逐条解析
+# ==========================================
+MAGIC = b'ZJUW'
+HEADER = struct.Struct('<4sI')
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 18830
+
+
+def encode_frame(columns):
+    """把 {列名: 数组或标量} 打包成一帧字节串，缺的通道写 NaN (Bot 写 -1)。"""
+    n = max((np.size(v) for v in columns.values()), default=0)
+    records = np.empty(n, dtype=RECORD_DTYPE)
+    for name in RECORD_DTYPE.names:
+        default = -1 if name == 'Bot' else np.nan
+        records[name] = np.broadcast_to(columns.get(name, default), (n,))
+    return HEADER.pack(MAGIC, n) + records.tobytes()
+
+
+def decode_payload(payload):
+    return np.frombuffer(payload, dtype=RECORD_DTYPE)
+
+
+def publish(columns, host=DEFAULT_HOST, port=DEFAULT_PORT, timeout=2.0):
+    """同步发送一帧 (给看板按钮这种偶尔发一次的场景用)。"""
+    with socket.create_connection((host, port), timeout=timeout) as sock:
+        sock.sendall(encode_frame(columns))
+
+
+# ==========================================
+# 采集服务：后台线程里跑 asyncio TCP 服务
+# ==========================================
+class IngestService:
+    """
+    本地的“MQTT 接收端”替身。每个连接可以连续发送多帧，
+    服务在自己的事件循环线程里解码，立刻写入共享的 TelemetryRing (看板从这里读)，
+    再按 flush_interval 把攒下来的记录批量落盘到 TelemetryStore。
+    传入 running_stats (RunningStats) 时，每帧顺手更新增量统计，看板读 KPI 不用再扫缓冲区；
+    传入 alarms (AlarmEngine) 时，每帧也跑一遍报警规则，报警事件和采集同步产生。
+    Streamlit 的脚本线程只会在读缓冲区时短暂拿一下锁，不会被突发流量卡住。
+    """
+
+    def __init__(self, buffer, store=None, host=DEFAULT_HOST, port=DEFAULT_PORT, flush_interval=0.2,
+                 running_stats=None, alarms=None):
+        self.buffer = buffer
+        self.store = store
+        self.running_stats = running_stats
+        self.alarms = alarms
+        self.host = host
+        self.port = port
+        self.flush_interval = flush_interval
+        self.stats = {'connections': 0, 'frames': 0, 'records': 0, 'bytes': 0, 'errors': 0}
+
+        self._pending = []
+        self._loop = None
+        self._stopping = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._error = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, timeout=5.0):
+        """启动后台线程，等端口绑定成功后返回 (port=0 时会自动分配端口)。"""
+        if self.running:
+            return self
+        self._ready.clear()
+        self._error = None
+        self._thread = threading.Thread(target=self._run, name='ingest-service', daemon=True)
+        self._thread.start()
+        if not self._ready.wait(timeout):
+            raise TimeoutError("采集服务启动超时")
+        if self._error is not None:
+            raise self._error
+        return self
+
+    def stop(self, timeout=5.0):
+        if not self.running:
+            return
+        self._loop.call_soon_threadsafe(self._stopping.set)
+        self._thread.join(timeout)
+
+    def _run(self):
+        try:
+            asyncio.run(self._main())
+        except Exception as e:
+            self._error = e
+            self._ready.set()
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        flusher = asyncio.create_task(self._flush_loop())
+        self._ready.set()
+
+        async with server:
+            await self._stopping.wait()
+        flusher.cancel()
+        await self._flush()
+
+    async def _handle(self, reader, writer):
+        self.stats['connections'] += 1
+        try:
+            while True:
+                header = await reader.readexactly(HEADER.size)
+                magic, n = HEADER.unpack(header)
+                if magic != MAGIC:
+                    self.stats['errors'] += 1
+                    break
+                payload = await reader.readexactly(n * RECORD_DTYPE.itemsize)
+                self._ingest(decode_payload(payload))
+                self.stats['bytes'] += HEADER.size + len(payload)
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass  # 对端断开
+        finally:
+            writer.close()
+
+    def _ingest(self, records):
+        self.buffer.extend({name: records[name] for name in self.buffer.columns})
+        columns = {name: records[name] for name in RECORD_DTYPE.names}
+        if self.running_stats is not None:
+            self.running_stats.update(columns)
+        if self.alarms is not None:
+            self.alarms.evaluate(columns)
+        if self.store is not None:
+            self._pending.append(records)
+        self.stats['frames'] += 1
+        self.stats['records'] += len(records)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self._flush()
+
+    async def _flush(self):
+        if not self._pending:
+            return
+        chunks, self._pending = self._pending, []
+        records = np.concatenate(chunks)
+        # 落盘放到线程池里做，不占用事件循环
+        await asyncio.to_thread(self.store.append, {name: records[name] for name in RECORD_DTYPE.names})
+
+    def wait_for(self, n_records, timeout=30.0):
+        """等到累计收到 n_records 条为止 (压测用)，返回是否在超时前达成。"""
+        deadline = time.perf_counter() + timeout
+        while self.stats['records'] < n_records:
+            if time.perf_counter() > deadline:
+                return False
+            time.sleep(0.001)
+        return True
@@ -0,0 +1,183 @@
+import base64
+import copy
+import struct
+import zlib
+
+import numpy as np
+
+
+# ==========================================
+# 水质插值网格：把散点采样估算成整个湖面的 DO / pH 分布图
+# ==========================================
+class IDWGrid:
+    """
+    湖面上的规则网格 (较长的一边 max_cells 格，经度方向按纬度余弦修正成近似正方形的格子)，
+    只在湖内的格子上给出估计值，湖外是 NaN。
+
+    增量更新：新样本到来时只把它们累加进所在格子的 (样本数, 数值和)，O(新样本数)。
+    刷新估计：反距离加权 (IDW)。网格本身就是样本的空间索引 (代替 KD 树)，距离按格子算，
+    用多分辨率金字塔近似 1/d^power 的核：第 k 层把格子每 2^k x 2^k 合成一格，
+    在该层取 3x3 邻域的和，权重 (1.5*2^k)^-p - (1.5*2^(k+1))^-p，由粗到细逐层放大叠加。
+    近处的样本走细层、权重大，远处的样本只在粗层出现、权重小；
+    整个刷新只是几遍全网格的加法，开销只和网格大小有关，和累计样本数无关。
+    """
+
+    def __init__(self, lake, channels=('DO', 'pH'), max_cells=500, power=2.0):
+        self.channels = list(channels)
+        self.power = float(power)
+
+        # lake 可以是 LakeIndex (bounds 是一个四元组) 也可以是 WaterBodyRegistry (每个水体一行)
+        b = np.asarray(lake.bounds, dtype=np.float64).reshape(-1, 4)
+        min_x, min_y, max_x, max_y = b[:, 0].min(), b[:, 1].min(), b[:, 2].max(), b[:, 3].max()
+        self.kx = np.cos(np.radians((min_y + max_y) / 2))  # 经度 1 度的实际长度 / 纬度 1 度
+        self.cell = max((max_x - min_x) * self.kx, max_y - min_y) / max_cells  # 以纬度度数计的格子边长
+        self.nx = int(np.ceil((max_x - min_x) * self.kx / self.cell)) or 1
+        self.ny = int(np.ceil((max_y - min_y) / self.cell)) or 1
+        self.bounds = (min_x, min_y, min_x + self.nx * self.cell / self.kx, min_y + self.ny * self.cell)
+
+        # 湖内掩膜：格心在湖内的格子 (建一次)
+        cx = self.bounds[0] + (np.arange(self.nx) + 0.5) * self.cell / self.kx
+        cy = self.bounds[1] + (np.arange(self.ny) + 0.5) * self.cell
+        gx, gy = np.meshgrid(cx, cy)
+        self.mask = lake.contains_many(gx.ravel(), gy.ravel()).reshape(self.ny, self.nx)
+
+        # 金字塔层数：最粗一层不超过 2x2；网格补零到 2^levels 的整数倍
+        self.levels = max(1, int(np.ceil(np.log2(max(self.nx, self.ny) / 2))))
+        step = 2 ** self.levels
+        self._padded = (-(-self.ny // step) * step, -(-self.nx // step) * step)
+        radius = 1.5 * 2.0 ** np.arange(self.levels + 1)
+        dist = radius ** -self.power
+        self._weights = dist - np.append(dist[1:], 0.0)
+        self._center_weight = 0.5 ** -self.power - dist[0]  # 格子自己里的样本 (距离按半格)
+
+        # (1 + 通道数, ny * nx) 的累加器，第 0 层是样本数；第一批样本到来时才分配，空白网格不占内存
+        self._acc = None
+        self._cache = None
+
+    def fresh(self):
+        """同一张网格 (掩膜共用，不再重算) 的一份空白副本，给每个会话各自累加样本。"""
+        grid = copy.copy(self)
+        grid._acc = None
+        grid._cache = None
+        return grid
+
+    @property
+    def shape(self):
+        return self.ny, self.nx
+
+    @property
+    def n_samples(self):
+        return 0 if self._acc is None else int(self._acc[0].sum())
+
+    def reset(self):
+        self._acc = None
+        self._cache = None
+
+    def cell_index(self, lons, lats):
+        """经纬度对应的格子编号 (ny * nx 展平)，网格外为 -1。"""
+        ix = np.floor((np.asarray(lons, dtype=np.float64) - self.bounds[0]) * self.kx / self.cell).astype(np.int64)
+        iy = np.floor((np.asarray(lats, dtype=np.float64) - self.bounds[1]) / self.cell).astype(np.int64)
+        inside = (ix >= 0) & (ix < self.nx) & (iy >= 0) & (iy < self.ny)
+        return np.where(inside, iy * self.nx + ix, -1)
+
+    # ---------- 增量更新 ----------
+    def update(self, columns):
+        """累加一批样本，columns 需要 Lon / Lat 和各通道 (数组或标量)，NaN 不计入。"""
+        n = max((np.size(v) for v in columns.values()), default=0)
+        if n == 0:
+            return
+        idx = np.broadcast_to(self.cell_index(columns['Lon'], columns['Lat']), (n,))
+        if self._acc is None:
+            self._acc = np.zeros((1 + len(self.channels), self.ny * self.nx))
+        # np.add.at 只碰样本落到的格子，开销和本批样本数成正比，和网格大小无关
+        for layer, name in enumerate(self.channels, start=1):
+            if name not in columns:
+                continue
+            values = np.broadcast_to(np.asarray(columns[name], dtype=np.float64), (n,))
+            ok = (idx >= 0) & ~np.isnan(values)
+            np.add.at(self._acc[layer], idx[ok], values[ok])
+        # 样本数按第一个通道计 (同一条记录的各通道一起上报)
+        first = np.broadcast_to(np.asarray(columns.get(self.channels[0], np.nan), dtype=np.float64), (n,))
+        ok = (idx >= 0) & ~np.isnan(first)
+        np.add.at(self._acc[0], idx[ok], 1.0)
+        self._cache = None
+
+    # ---------- 估计 ----------
+    def estimate(self):
+        """返回 {通道: (ny, nx) 估计值}，湖外和还没有样本时为 NaN。没有新样本时直接用上次的结果。"""
+        if self._cache is not None:
+            return self._cache
+        if self._acc is None:
+            return {name: np.full((self.ny, self.nx), np.nan) for name in self.channels}
+        n_layers = self._acc.shape[0]
+        base = np.zeros((n_layers,) + self._padded)
+        base[:, :self.ny, :self.nx] = self._acc.reshape(n_layers, self.ny, self.nx)
+
+        # 逐层 2x2 求和得到金字塔
+        pyramid = [base]
+        for _ in range(self.levels):
+            a = pyramid[-1]
+            h, w = a.shape[1] // 2, a.shape[2] // 2
+            pyramid.append(a.reshape(n_layers, h, 2, w, 2).sum(axis=(2, 4)))
+
+        # 由粗到细：上一层结果放大一倍，再加上本层 3x3 邻域和乘本层权重
+        total = None
+        for level in range(self.levels, -1, -1):
+            term = self._weights[level] * _box3(pyramid[level])
+            if total is not None:
+                h, w = total.shape[1:]
+                term += np.broadcast_to(total[:, :, None, :, None], (n_layers, h, 2, w, 2)).reshape(term.shape)
+            total = term
+        total += self._center_weight * base
+        total = total[:, :self.ny, :self.nx]
+
+        out = {}
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for i, name in enumerate(self.channels):
+                out[name] = np.where(self.mask, total[i + 1] / total[0], np.nan)
+        self._cache = out
+        return out
+
+    # ---------- 渲染 ----------
+    def to_rgba(self, name, vmin, vmax, colors=None, alpha=170):
+        """把某通道的估计值按色带映射成 RGBA 图像 (第 0 行在北边，可直接当图片用)，湖外透明。"""
+        values = self.estimate()[name][::-1]
+        colors = np.asarray(colors if colors is not None else DEFAULT_COLORS, dtype=np.float64)
+        t = np.clip((values - vmin) / (vmax - vmin), 0, 1)
+        stops = np.linspace(0, 1, len(colors))
+        rgba = np.zeros(values.shape + (4,), dtype=np.uint8)
+        for c in range(3):
+            rgba[..., c] = np.interp(np.nan_to_num(t), stops, colors[:, c])
+        rgba[..., 3] = np.where(np.isnan(values), 0, alpha)
+        return rgba
+
+    def bitmap_bounds(self):
+        """pydeck BitmapLayer 的 bounds 参数：[西, 南, 东, 北]。"""
+        return list(self.bounds)
+
+
+def _box3(a):
+    """最后两个维度上的 3x3 邻域和 (边界外按 0)。"""
+    p = np.pad(a, ((0, 0), (1, 1), (1, 1)))
+    rows = p[:, :-2] + p[:, 1:-1] + p[:, 2:]
+    return rows[:, :, :-2] + rows[:, :, 1:-1] + rows[:, :, 2:]
+
+
+# 红 (低) -> 黄 -> 绿 (高)，DO 越高越好
+DEFAULT_COLORS = [(215, 48, 39), (254, 224, 139), (26, 152, 80)]
+
+
+def png_data_url(rgba):
+    """不依赖图像库，把 (H, W, 4) uint8 数组编码成 PNG 的 data URL，给 BitmapLayer 的 image 参数用。"""
+    h, w = rgba.shape[:2]
+    # 每行前面加一个 0 字节 (不做行滤波)，再整体 zlib 压缩
+    raw = np.hstack((np.zeros((h, 1), dtype=np.uint8), rgba.reshape(h, w * 4))).tobytes()
+
+    def chunk(tag, data):
+        return struct.pack('>I', len(data)) + tag + data + struct.pack('>I', zlib.crc32(tag + data))
+
+    png = (b'\x89PNG\r\n\x1a\n'
+           + chunk(b'IHDR', struct.pack('>IIBBBBB', w, h, 8, 6, 0, 0, 0))
+           + chunk(b'IDAT', zlib.compress(raw, 1))
+           + chunk(b'IEND', b''))
+    return 'data:image/png;base64,' + base64.b64encode(png).decode('ascii')
@@ -0,0 +1,124 @@
+import hashlib
+import json
+
+import numpy as np
+import shapely
+from shapely.geometry import shape
+
+
+# ==========================================
+# 湖面几何读取
+# ==========================================
+def read_lake_polygon(geojson_path):
+    """读取 GeoJSON，返回面积最大的那个要素 (与原 load_lake_boundary 逻辑一致)。"""
+    with open(geojson_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    max_area = 0
+    lake_polygon = None
+    for feature in data['features']:
+        geom = shape(feature['geometry'])
+        if geom.area > max_area:
+            max_area = geom.area
+            lake_polygon = geom
+    return lake_polygon
+
+
+# ==========================================
+# 湖内判定索引：栅格占用图 + 岸线精确回退
+# ==========================================
+OUTSIDE, INSIDE, EDGE = 0, 1, 2
+
+
+class LakeIndex:
+    """
+    加载时只建一次的湖面索引。
+    把湖的外包框切成 grid_size 级别的栅格，每个格子标记为：
+      INSIDE  - 整格都在湖内，直接判 True
+      OUTSIDE - 整格都在湖外，直接判 False
+      EDGE    - 格子压到岸线，交给 shapely 精确判定
+    绝大多数点只需要一次数组查表，只有岸线附近的少量点才走多边形计算。
+    """
+
+    def __init__(self, polygon, grid_size=256):
+        self._polygon = polygon
+        self._wkb = None
+        shapely.prepare(self._polygon)
+
+        self.bounds = polygon.bounds
+        min_x, min_y, max_x, max_y = self.bounds
+        span = max(max_x - min_x, max_y - min_y)
+        self.cell = span / grid_size
+        self.nx = int(np.ceil((max_x - min_x) / self.cell)) or 1
+        self.ny = int(np.ceil((max_y - min_y) / self.cell)) or 1
+        self.grid = self._rasterize()
+        pt = polygon.representative_point()
+        self.safe_point = (pt.x, pt.y)  # 湖内保证可用的起点 (lon, lat)
+
+    @classmethod
+    def from_arrays(cls, wkb, bounds, cell, grid, safe_point):
+        """用预编译好的栅格直接恢复索引；多边形本身等到第一次需要岸线精确判定时才解析。"""
+        self = cls.__new__(cls)
+        self._polygon = None
+        self._wkb = wkb
+        self.bounds = tuple(bounds)
+        self.cell = float(cell)
+        self.grid = grid
+        self.ny, self.nx = grid.shape
+        self.safe_point = tuple(float(v) for v in safe_point)
+        return self
+
+    @property
+    def polygon(self):
+        if self._polygon is None:
+            self._polygon = shapely.from_wkb(self._wkb)
+            shapely.prepare(self._polygon)
+        return self._polygon
+
+    def _rasterize(self):
+        min_x, min_y = self.bounds[0], self.bounds[1]
+        ix, iy = np.meshgrid(np.arange(self.nx), np.arange(self.ny))
+        x0 = min_x + ix.ravel() * self.cell
+        y0 = min_y + iy.ravel() * self.cell
+
+        # 1. 与岸线 (含湖心岛) 相交的格子都是 EDGE
+        boundary = self.polygon.boundary
+        shapely.prepare(boundary)
+        boxes = shapely.box(x0, y0, x0 + self.cell, y0 + self.cell)
+        edge = shapely.intersects(boundary, boxes)
+
+        # 2. 其余格子整格同侧，用格心判断即可
+        grid = np.full(x0.size, OUTSIDE, dtype=np.uint8)
+        grid[edge] = EDGE
+        rest = ~edge
+        inside = shapely.contains_xy(self.polygon, x0[rest] + self.cell / 2, y0[rest] + self.cell / 2)
+        grid[np.flatnonzero(rest)[inside]] = INSIDE
+        return grid.reshape(self.ny, self.nx)
+
+    def contains_many(self, lons, lats):
+        """批量判定 (lons, lats) 是否在湖内，返回布尔数组。"""
+        lons = np.asarray(lons, dtype=np.float64)
+        lats = np.asarray(lats, dtype=np.float64)
+        ix = np.floor((lons - self.bounds[0]) / self.cell).astype(np.int64)
+        iy = np.floor((lats - self.bounds[1]) / self.cell).astype(np.int64)
+        in_box = (ix >= 0) & (ix < self.nx) & (iy >= 0) & (iy < self.ny)
+
+        state = np.full(lons.shape, OUTSIDE, dtype=np.uint8)
+        state[in_box] = self.grid[iy[in_box], ix[in_box]]
+
+        result = state == INSIDE
+        edge = state == EDGE
+        if edge.any():
+            result[edge] = shapely.contains_xy(self.polygon, lons[edge], lats[edge])
+        return result
+
+    def contains(self, lon, lat):
+        return bool(self.contains_many([lon], [lat])[0])
+
+
+# ==========================================
+# 几何缓存的键：GeoJSON 内容的哈希 (water_bodies 按它缓存编译好的 .npz)
+# ==========================================
+def file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
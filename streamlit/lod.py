@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+
+
+# ==========================================
+# 细节层次 (LOD)：不管历史多长，每次刷新只把有限个点发给浏览器
+# ==========================================
+MAX_CHART_POINTS = 1000   # 每条折线最多的点数
+MAX_MAP_POINTS = 5000     # 地图上最多的点数
+MAX_TABLE_ROWS = 1000     # 原始数据表最多显示的行数
+
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets 降采样，返回保留下来的下标。
+    保留首尾两点，中间均分成 n_out - 2 个桶，每个桶挑出与前一个已选点、
+    下一个桶均值构成三角形面积最大的点，折线的形状 (尖峰、拐点) 基本不丢。
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = x.size
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    # 每个桶的均值 (下一个桶的“代表点”)，用前缀和一次算完
+    cx = np.concatenate(([0.0], np.cumsum(x)))
+    cy = np.concatenate(([0.0], np.cumsum(y)))
+    counts = np.diff(edges)
+    mean_x = (cx[edges[1:]] - cx[edges[:-1]]) / counts
+    mean_y = (cy[edges[1:]] - cy[edges[:-1]]) / counts
+    mean_x = np.append(mean_x[1:], x[-1])
+    mean_y = np.append(mean_y[1:], y[-1])
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - mean_x[i]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (mean_y[i] - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_decimate(y, n_out):
+    """按桶保留最小值和最大值，完全向量化，适合百万级数据的快速预降采样。返回下标。"""
+    y = np.asarray(y, dtype=np.float64)
+    n = y.size
+    n_buckets = n_out // 2
+    if n_out >= n or n_buckets < 1:
+        return np.arange(n)
+
+    size = n // n_buckets
+    body = y[:size * n_buckets].reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+    lo = offsets + np.argmin(body, axis=1)
+    hi = offsets + np.argmax(body, axis=1)
+    idx = np.sort(np.concatenate((lo, hi, [n - 1])))
+    return np.unique(idx)
+
+
+def timeseries_lod(df, time_col, value_cols, n_out=MAX_CHART_POINTS):
+    """
+    折线图用的降采样：多台机器人同一时刻的读数先按时间取平均，
+    数据量还很大时先用 min/max 粗筛，再用 LTTB 精选到 n_out 个点。
+    """
+    if df.empty:
+        return df[[time_col] + list(value_cols)]
+    times = df[time_col].to_numpy()
+    uniq, inverse = np.unique(times, return_inverse=True)
+    counts = np.bincount(inverse)
+    out = {time_col: uniq}
+    for col in value_cols:
+        out[col] = np.bincount(inverse, weights=df[col].to_numpy(dtype=np.float64)) / counts
+
+    if uniq.size > n_out:
+        x = uniq.astype('datetime64[ns]').astype(np.int64).astype(np.float64)
+        first = out[value_cols[0]]
+        keep = np.arange(uniq.size)
+        if uniq.size > 20 * n_out:
+            keep = minmax_decimate(first, 20 * n_out)
+        keep = keep[lttb(x[keep], first[keep], n_out)]
+        out = {name: values[keep] for name, values in out.items()}
+    return pd.DataFrame(out)
+
+
+def zoom_cell_size(zoom, cell_px=4):
+    """Web 墨卡托下，zoom 级别对应的 cell_px 像素有多少经度。"""
+    return cell_px * 360.0 / (256 * 2 ** zoom)
+
+
+def grid_thin(df, lon_col, lat_col, value_col, zoom, max_points=MAX_MAP_POINTS, cell_px=4):
+    """
+    地图点按屏幕网格聚合：同一个格子里的点合成一个 (位置取平均、数值取平均、附带点数)。
+    格子大小跟随缩放级别 (约 cell_px 像素)；聚合后仍超过 max_points 就把格子放大一倍再聚。
+    value_col 为 None 时只聚合位置 (编号之类取平均没有意义的列不要传进来)。
+    """
+    columns = [lon_col, lat_col] + ([value_col] if value_col is not None else [])
+    if df.empty:
+        return pd.DataFrame({**{col: [] for col in columns}, 'Count': []})
+    lons = df[lon_col].to_numpy(dtype=np.float64)
+    lats = df[lat_col].to_numpy(dtype=np.float64)
+
+    cell = zoom_cell_size(zoom, cell_px)
+    while True:
+        ix = np.floor((lons - lons.min()) / cell).astype(np.int64)
+        iy = np.floor((lats - lats.min()) / cell).astype(np.int64)
+        keys = ix * (iy.max() + 1) + iy
+        uniq, inverse = np.unique(keys, return_inverse=True)
+        if uniq.size <= max_points:
+            break
+        cell *= 2
+
+    counts = np.bincount(inverse)
+    out = {
+        lon_col: np.bincount(inverse, weights=lons) / counts,
+        lat_col: np.bincount(inverse, weights=lats) / counts,
+    }
+    if value_col is not None:
+        values = df[value_col].to_numpy(dtype=np.float64)
+        out[value_col] = np.round(np.bincount(inverse, weights=values) / counts, 2)
+    out['Count'] = counts
+    return pd.DataFrame(out)
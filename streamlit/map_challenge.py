@@ -1,8 +1,12 @@
 import pydeck as pdk
 import streamlit as st
-import pandas as pd
 import numpy as np
 
+from gps_index import GPSIndex
+from lod import MAX_TABLE_ROWS, grid_thin
+from playback import TripPlayback
+from session_cache import freeze
+
 st.set_page_config(page_title="SNAPP 机器鱼追踪系统", layout="wide")
 
 st.title("🗺️ 水下机器人实时位置追踪 (GIS)")
@@ -16,75 +20,117 @@ MY_SCHOOL_LON = 120.09 # 经度 (Longitude)
 
 # --- 1. 侧边栏控制 ---
 st.sidebar.header("🕹️ 机器人控制台")
+view_mode = st.sidebar.radio("显示模式", ["时段快照", "全天轨迹回放"], horizontal=True)
 robot_count = st.sidebar.slider("投放机器人数量", 10, 100, 50)
 hour_selected = st.sidebar.slider("查看时间段 (24h)", 0, 23, 10)
+view_radius = st.sidebar.slider("视野半径 (米)", 100, 2000, 2000, step=100)
+n_fixes = st.sidebar.number_input("GPS 记录总数", min_value=1000, max_value=50_000_000, value=1_000_000, step=100_000)
+seed = st.sidebar.number_input("随机种子 (相同种子 = 相同数据)", min_value=0, value=0, step=1)
+
+# --- 2. 模拟 GIS 数据 (生成以你学校为中心的巡航轨迹) ---
+# 这一步是为了模拟机器鱼传回来的 GPS 信号：每条机器鱼绕学校坐标做两个周期叠加的平滑巡航，再加一点定位噪声
+N_ROBOTS = 100
+# 用显式种子的独立随机数发生器，同样的种子每次都生成同样的数据 (缓存也按种子区分)
+# 生成后直接建时间索引 (gps_index.GPSIndex，按分钟分桶)，用 cache_resource 所有会话共用一份，命中时不拷贝；
+# 数组标成只读 (session_cache.freeze)，哪个会话误改共享数据会直接报错
+@st.cache_resource
+def generate_gps_data(lat, lon, n, seed=0):
+    rng = np.random.default_rng(seed)
+    bot = rng.integers(0, N_ROBOTS, n).astype(np.int16)  # 上报的机器鱼编号
+    t = rng.uniform(0, 24, n)                            # 定位时间 (一天中的第几小时)
+    # 每条机器鱼自己的振幅 (度)、角频率 (弧度 / 小时) 和相位，经纬度方向各两组
+    amp = rng.uniform(0.5, 1.5, (4, N_ROBOTS)) / 500
+    freq = rng.uniform(0.5, 3.0, (4, N_ROBOTS))
+    phase = rng.uniform(0, 2 * np.pi, (4, N_ROBOTS))
+    wave = [amp[k][bot] * np.sin(freq[k][bot] * t + phase[k][bot]) for k in range(4)]
+    return freeze(GPSIndex(
+        t,
+        # 在你学校坐标的基础上，加上巡航偏移和定位噪声
+        lon + wave[0] + wave[1] + rng.standard_normal(n) / 50_000,
+        lat + wave[2] + wave[3] + rng.standard_normal(n) / 50_000,
+        bucket=1 / 60, origin=0,
+        columns={'bot': bot},
+    ))
+
 
-# --- 2. 模拟 GIS 数据 (生成以你学校为中心的随机点) ---
-# 这一步是为了模拟机器鱼传回来的 GPS 信号
-@st.cache_data
-def generate_gps_data(lat, lon, n):
-    data = pd.DataFrame({
-        # 在你学校坐标的基础上，加一点点随机偏移，模拟移动
-        'lat': np.random.randn(n) / 500 + lat,
-        'lon': np.random.randn(n) / 500 + lon,
-        'time': np.random.randint(0, 24, n) # 随机分配时间
-    })
-    return data
+# 回放用的逐帧位置：每条机器鱼每分钟一帧，整天只算一次 (按数据和种子缓存)，之后播放全在浏览器里
+@st.cache_resource
+def build_playback(lat, lon, n, seed=0):
+    data = generate_gps_data(lat, lon, n, seed)
+    cols = data.columns
+    return freeze(TripPlayback.from_fixes(cols['bot'], cols['time'], cols['lon'], cols['lat'],
+                                          frame=1 / 60, start=0, end=24))
 
 # 生成数据
-gps_data = generate_gps_data(MY_SCHOOL_LAT, MY_SCHOOL_LON, 500)
+gps_data = generate_gps_data(MY_SCHOOL_LAT, MY_SCHOOL_LON, n_fixes, seed)
 
-# --- 3. 数据筛选 (根据侧边栏的时间) ---
-filtered_data = gps_data[gps_data['time'] == hour_selected]
+# --- 3. 数据筛选 (根据侧边栏的时间和视野) ---
+# 时间段 + 经纬度框查询只切出对应的分钟桶、二分经度，不扫描全部记录
+half_lat = view_radius / 111_320
+half_lon = half_lat / np.cos(np.radians(MY_SCHOOL_LAT))
+view_bbox = (MY_SCHOOL_LON - half_lon, MY_SCHOOL_LAT - half_lat, MY_SCHOOL_LON + half_lon, MY_SCHOOL_LAT + half_lat)
+filtered_data = gps_data.query(hour_selected, hour_selected + 1, bbox=view_bbox)
+filtered_data = filtered_data[filtered_data['bot'] < robot_count]
 
 # --- 4. 核心功能：地图可视化 (st.map) ---
 col1, col2 = st.columns([3, 1])
 
 with col1:
-    st.subheader(f"📍 {hour_selected}:00 - 机器鱼分布图")
-
-    # --- Pydeck 高级地图配置 ---
-    # 1. 定义初始视图 (地图中心和缩放级别)
-    view_state = pdk.ViewState(
-        latitude=MY_SCHOOL_LAT,
-        longitude=MY_SCHOOL_LON,
-        zoom=15,  # 默认缩放级别
-        pitch=0,  # 俯视角度 (0是垂直俯视)
-    )
-
-    # 2. 定义图层 (ScatterplotLayer = 散点图)
-    layer = pdk.Layer(
-        "ScatterplotLayer",
-        data=filtered_data.iloc[:robot_count],
-        get_position='[lon, lat]',
-        get_color='[255, 0, 0, 200]',  # [红, 绿, 蓝, 透明度] -> 红色
-        get_radius=10,  # 基础半径
-        # ⬇️ 关键设置：锁定屏幕像素大小 ⬇️
-        pickable=True,  # 允许鼠标悬停
-        radius_scale=1,
-        radius_min_pixels=5,  # 最小显示 5 像素 (防止缩太小看不见)
-        radius_max_pixels=10,  # 最大显示 10 像素 (防止放太大挡住地图)
-    )
-
-    # 3. 渲染地图
-    st.write(f"当前筛选出的数据条数: {len(filtered_data)}")
-    st.write(filtered_data.head())  # 打印前5行看看
-    st.pydeck_chart(pdk.Deck(
-        # 使用 'light' 或 'dark'，这是 Streamlit 内置的快捷方式，不需要 Token
-        map_style='light',
-        initial_view_state=view_state,
-        layers=[layer],
-        tooltip={"text": "机器鱼 ID: {index}\n经度: {lon}\n纬度: {lat}"}
-    ))
+    if view_mode == "全天轨迹回放":
+        st.subheader("🎞️ 全天轨迹回放")
+        # 整天的逐帧位置一次发给浏览器，播放 / 暂停 / 拖动进度条都在页面里完成，不回服务器
+        playback = build_playback(MY_SCHOOL_LAT, MY_SCHOOL_LON, n_fixes, seed)
+        st.caption(f"{robot_count} 台 · {playback.n_frames} 帧 (每分钟一帧)")
+        st.iframe(playback.to_html((MY_SCHOOL_LON, MY_SCHOOL_LAT), zoom=15, bots=np.arange(robot_count)), height=580)
+    else:
+        st.subheader(f"📍 {hour_selected}:00 - 机器鱼分布图")
+
+        # --- Pydeck 高级地图配置 ---
+        # 1. 定义初始视图 (地图中心和缩放级别)
+        view_state = pdk.ViewState(
+            latitude=MY_SCHOOL_LAT,
+            longitude=MY_SCHOOL_LON,
+            zoom=15,  # 默认缩放级别
+            pitch=0,  # 俯视角度 (0是垂直俯视)
+        )
+
+        # 2. 定义图层 (ScatterplotLayer = 散点图)
+        # 点数再多，也只按屏幕网格聚合后发最多 MAX_MAP_POINTS 个点给浏览器 (只聚合位置，机器鱼编号取平均没有意义)
+        layer = pdk.Layer(
+            "ScatterplotLayer",
+            data=grid_thin(filtered_data, 'lon', 'lat', None, zoom=15),
+            get_position='[lon, lat]',
+            get_color='[255, 0, 0, 200]',  # [红, 绿, 蓝, 透明度] -> 红色
+            get_radius=10,  # 基础半径
+            # ⬇️ 关键设置：锁定屏幕像素大小 ⬇️
+            pickable=True,  # 允许鼠标悬停
+            radius_scale=1,
+            radius_min_pixels=5,  # 最小显示 5 像素 (防止缩太小看不见)
+            radius_max_pixels=10,  # 最大显示 10 像素 (防止放太大挡住地图)
+        )
+
+        # 3. 渲染地图
+        st.write(f"当前筛选出的数据条数: {len(filtered_data)}")
+        st.write(filtered_data.head())  # 打印前5行看看
+        st.pydeck_chart(pdk.Deck(
+            # 使用 'light' 或 'dark'，这是 Streamlit 内置的快捷方式，不需要 Token
+            map_style='light',
+            initial_view_state=view_state,
+            layers=[layer],
+            tooltip={"text": "定位点数: {Count}\n经度: {lon}\n纬度: {lat}"}
+        ))
 
 
 with col2:
     st.subheader("📊 状态统计")
-    st.write(f"当前活跃机器人: **{len(filtered_data.iloc[:robot_count])}** 台")
+    st.write(f"当前活跃机器人: **{filtered_data['bot'].nunique()}** 台")
+    st.write(f"GPS 记录总数: {len(gps_data):,}")
     st.write(f"中心纬度: {MY_SCHOOL_LAT}")
     st.write(f"中心经度: {MY_SCHOOL_LON}")
     st.info("绿色点位代表机器鱼当前上报的 GPS 位置。")
+    # 每小时的记录数直接由索引的桶边界算出
+    st.bar_chart(np.add.reduceat(gps_data.bucket_counts(), np.arange(0, gps_data.n_buckets, 60)), height=150)
 
 # --- 5. 原始数据折叠栏 ---
-with st.expander("查看原始 GPS 遥测数据"):
-    st.dataframe(filtered_data)
\ No newline at end of file
+with st.expander(f"查看原始 GPS 遥测数据 (最多 {MAX_TABLE_ROWS} 条)"):
+    st.dataframe(filtered_data.head(MAX_TABLE_ROWS))
\ No newline at end of file
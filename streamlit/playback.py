@@ -0,0 +1,223 @@
+import base64
+import json
+
+import numpy as np
+
+
+# ==========================================
+# 轨迹回放：一次性把所有机器人的轨迹插值到统一的帧时间上，整段打包发给浏览器，
+# 由浏览器里的 deck.gl TripsLayer 自己逐帧播放 (播放、拖动进度条都不再回服务器)
+# ==========================================
+DECKGL_URL = "https://unpkg.com/deck.gl@9.3/dist.min.js"
+BASEMAP_URL = "https://basemaps.cartocdn.com/light_all/{z}/{x}/{y}.png"
+
+
+class TripPlayback:
+    """
+    frame_times: (n_frames,) 帧时间；lons / lats: (n_bots, n_frames) 每台机器人每一帧的位置，没有定位的时段为 NaN。
+    坐标存成相对 origin 的 float32 偏移 (湖面范围内精度到厘米级)，体积是 JSON 文本的几分之一。
+    """
+
+    def __init__(self, frame_times, lons, lats, bot_ids=None):
+        self.frame_times = np.asarray(frame_times, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        lats = np.asarray(lats, dtype=np.float64)
+        self.origin = (float(np.nanmin(lons)), float(np.nanmin(lats))) if np.isfinite(lons).any() else (0.0, 0.0)
+        self.d_lon = (lons - self.origin[0]).astype(np.float32)
+        self.d_lat = (lats - self.origin[1]).astype(np.float32)
+        self.bot_ids = np.arange(lons.shape[0]) if bot_ids is None else np.asarray(bot_ids)
+
+    @classmethod
+    def from_fixes(cls, bots, times, lons, lats, frame=1 / 60, start=None, end=None):
+        """
+        从零散的定位记录 (不要求有序) 生成回放：每台机器人按时间排好序后线性插值到
+        start ~ end 之间每隔 frame 一帧，第一条定位之前、最后一条之后为 NaN。
+        """
+        bots, times = np.asarray(bots), np.asarray(times, dtype=np.float64)
+        lons, lats = np.asarray(lons, dtype=np.float64), np.asarray(lats, dtype=np.float64)
+        start = times.min() if start is None else start
+        end = times.max() if end is None else end
+        frame_times = np.arange(start, end + frame / 2, frame)
+
+        order = np.lexsort((times, bots))
+        sorted_bots = bots[order]
+        bot_ids = np.unique(sorted_bots)
+        bounds = np.r_[np.searchsorted(sorted_bots, bot_ids), sorted_bots.size]
+        out_lon = np.full((bot_ids.size, frame_times.size), np.nan)
+        out_lat = np.full((bot_ids.size, frame_times.size), np.nan)
+        for i in range(bot_ids.size):
+            sel = order[bounds[i]:bounds[i + 1]]
+            out_lon[i] = np.interp(frame_times, times[sel], lons[sel], left=np.nan, right=np.nan)
+            out_lat[i] = np.interp(frame_times, times[sel], lats[sel], left=np.nan, right=np.nan)
+        return cls(frame_times, out_lon, out_lat, bot_ids)
+
+    @property
+    def n_bots(self):
+        return self.d_lon.shape[0]
+
+    @property
+    def n_frames(self):
+        return self.frame_times.size
+
+    @property
+    def nbytes(self):
+        return self.d_lon.nbytes + self.d_lat.nbytes + self.frame_times.nbytes
+
+    # ---------- 渲染 ----------
+    def payload(self, bots=None):
+        """发给浏览器的数据：坐标和帧时间都是 base64 编码的 float32 数组。bots 是要播放的机器人行号。"""
+        rows = slice(None) if bots is None else bots
+        return {
+            'origin': self.origin,
+            'n_frames': self.n_frames,
+            'bot_ids': self.bot_ids[rows].tolist(),
+            'times': _b64(self.frame_times.astype(np.float32)),
+            'lon': _b64(self.d_lon[rows]),
+            'lat': _b64(self.d_lat[rows]),
+        }
+
+    def to_html(self, center, zoom=15, bots=None, trail=0.5, speed=0.5, height=520, time_label='hours'):
+        """
+        自带播放控件的 deck.gl 页面 (给 st.iframe 用)。
+        trail: 拖尾长度 (和帧时间同单位)；speed: 每秒真实时间播放多少帧时间单位。
+        time_label='hours' 时进度显示成 HH:MM，否则直接显示数字。
+        """
+        config = {
+            'center': list(center), 'zoom': zoom, 'trail': trail, 'speed': speed,
+            'basemap': BASEMAP_URL, 'clock': time_label == 'hours',
+        }
+        return (_TEMPLATE
+                .replace('__DECKGL_URL__', DECKGL_URL)
+                .replace('__HEIGHT__', str(int(height)))
+                .replace('__PAYLOAD__', json.dumps(self.payload(bots)))
+                .replace('__CONFIG__', json.dumps(config)))
+
+
+def _b64(a):
+    return base64.b64encode(np.ascontiguousarray(a, dtype=np.float32).tobytes()).decode('ascii')
+
+
+_TEMPLATE = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8" />
+<script src="__DECKGL_URL__"></script>
+<style>
+  body { margin: 0; font-family: sans-serif; }
+  #map { position: relative; width: 100%; height: __HEIGHT__px; }
+  #controls { display: flex; align-items: center; gap: 8px; padding: 6px 0; }
+  #scrub { flex: 1; }
+  #clock { width: 5em; text-align: right; font-variant-numeric: tabular-nums; }
+</style>
+</head>
+<body>
+<div id="map"></div>
+<div id="controls">
+  <button id="play">⏸</button>
+  <input id="scrub" type="range" step="any" />
+  <span id="clock"></span>
+</div>
+<script>
+const DATA = __PAYLOAD__;
+const CONFIG = __CONFIG__;
+
+function f32(b64) {
+  const s = atob(b64);
+  const bytes = new Uint8Array(s.length);
+  for (let i = 0; i < s.length; i++) bytes[i] = s.charCodeAt(i);
+  return new Float32Array(bytes.buffer);
+}
+
+// 解码一次，按机器人拆成 TripsLayer 要的 (路径, 时间戳)
+const times = f32(DATA.times), dLon = f32(DATA.lon), dLat = f32(DATA.lat);
+const nF = DATA.n_frames, [lon0, lat0] = DATA.origin;
+const t0 = times[0], t1 = times[nF - 1];
+const trips = DATA.bot_ids.map((id, b) => {
+  const path = [], timestamps = [];
+  for (let f = 0; f < nF; f++) {
+    const x = dLon[b * nF + f];
+    if (Number.isNaN(x)) continue;
+    path.push([lon0 + x, lat0 + dLat[b * nF + f]]);
+    timestamps.push(times[f]);
+  }
+  return {id, path, timestamps, color: hue(id)};
+});
+
+function hue(id) {
+  const h = (id * 137.508) % 360 / 60, x = 1 - Math.abs(h % 2 - 1);
+  const rgb = [[1, x, 0], [x, 1, 0], [0, 1, x], [0, x, 1], [x, 0, 1], [1, 0, x]][Math.floor(h)];
+  return rgb.map(v => Math.round(60 + 180 * v));
+}
+
+// 当前时刻每台机器人的位置 (相邻两帧线性插值)，画成圆点
+function heads(t) {
+  const f = Math.min(Math.max((t - t0) / (t1 - t0) * (nF - 1), 0), nF - 1);
+  const i = Math.min(Math.floor(f), Math.max(nF - 2, 0)), w = f - i;
+  const out = [];
+  DATA.bot_ids.forEach((id, b) => {
+    const a = b * nF + i;
+    const x = dLon[a] + (dLon[a + 1] - dLon[a]) * w, y = dLat[a] + (dLat[a + 1] - dLat[a]) * w;
+    if (!Number.isNaN(x)) out.push({id, position: [lon0 + x, lat0 + y], color: hue(id)});
+  });
+  return out;
+}
+
+const basemap = new deck.TileLayer({
+  id: 'basemap', data: CONFIG.basemap, minZoom: 0, maxZoom: 19, tileSize: 256,
+  renderSubLayers: props => {
+    const [[w, s], [e, n]] = props.tile.boundingBox;
+    return new deck.BitmapLayer(props, {data: null, image: props.data, bounds: [w, s, e, n]});
+  },
+});
+
+const deckgl = new deck.Deck({
+  parent: document.getElementById('map'),
+  initialViewState: {longitude: CONFIG.center[0], latitude: CONFIG.center[1], zoom: CONFIG.zoom},
+  controller: true,
+  getTooltip: ({object}) => object && `机器鱼 ID: ${object.id}`,
+});
+
+const scrub = document.getElementById('scrub'), clock = document.getElementById('clock');
+const play = document.getElementById('play');
+scrub.min = t0; scrub.max = t1;
+let current = t0, playing = true, last = null;
+
+function render() {
+  scrub.value = current;
+  if (CONFIG.clock) {
+    const m = Math.floor(((current % 24) + 24) % 24 * 60);
+    clock.textContent = String(Math.floor(m / 60)).padStart(2, '0') + ':' + String(m % 60).padStart(2, '0');
+  } else {
+    clock.textContent = current.toFixed(1);
+  }
+  deckgl.setProps({layers: [
+    basemap,
+    new deck.TripsLayer({
+      id: 'trips', data: trips, getPath: d => d.path, getTimestamps: d => d.timestamps,
+      getColor: d => d.color, widthMinPixels: 2, trailLength: CONFIG.trail, currentTime: current,
+      fadeTrail: true, capRounded: true, jointRounded: true,
+    }),
+    new deck.ScatterplotLayer({
+      id: 'heads', data: heads(current), getPosition: d => d.position, getFillColor: d => d.color,
+      radiusMinPixels: 4, pickable: true,
+    }),
+  ]});
+}
+
+function tick(now) {
+  if (playing && last !== null) {
+    current += (now - last) / 1000 * CONFIG.speed;
+    if (current > t1) current = t0;
+  }
+  last = now;
+  render();
+  requestAnimationFrame(tick);
+}
+
+play.onclick = () => { playing = !playing; play.textContent = playing ? '⏸' : '▶'; };
+scrub.oninput = () => { current = parseFloat(scrub.value); };
+requestAnimationFrame(tick);
+</script>
+</body>
+</html>
+"""
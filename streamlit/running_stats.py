@@ -0,0 +1,204 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+
+# ==========================================
+# 增量统计：每次追加数据时顺手更新，看板读报告时是 O(1)
+# ==========================================
+class RunningStats:
+    """
+    按通道 (可选再按 group_col 分组，例如按站点 / 机器人编号) 维护的增量统计量：
+      count / mean / var (Welford，批量合并用 Chan 的并行公式) / min / max / last / EWMA
+    update() 对一整批数据完全向量化 (bincount)，不会随历史长度变慢；
+    summary() 只读几个数，不再每次重跑就把整个历史扫一遍。
+
+    window 不为 None 时 (例如 '1min')，还会按 Time 列切成首尾相接的固定时间窗，
+    每个窗口记 count / mean / min / max，最多保留最近 keep_windows 个窗口。
+    NaN 视为缺测，不计入统计。多线程共用时 (采集服务写、看板读) 由内部的锁保护。
+    """
+
+    def __init__(self, channels, group_col=None, ewma_alpha=0.1, window=None, keep_windows=120):
+        self.channels = list(channels)
+        self.group_col = group_col
+        self.ewma_alpha = float(ewma_alpha)
+        self.window = None if window is None else pd.Timedelta(window).to_timedelta64().astype('timedelta64[ns]')
+        self.keep_windows = int(keep_windows)
+        self.lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            # 每个通道一组按分组编号下标的数组，遇到更大的编号时再扩容
+            self._state = {name: _empty_state(0) for name in self.channels}
+            self._windows = OrderedDict()  # 窗口起点 -> {通道: [count, sum, min, max]}
+
+    # ---------- 更新 ----------
+    def update(self, columns):
+        """追加一批数据，columns 是 {列名: 数组或标量}，和 TelemetryRing.extend 的参数一样。"""
+        n = max((np.size(v) for v in columns.values()), default=0)
+        if n == 0:
+            return
+        if self.group_col is None:
+            groups = np.zeros(n, dtype=np.int64)
+        else:
+            # 编号为负 (例如 -1 = 未登记) 的记录不进任何分组
+            groups = np.broadcast_to(np.asarray(columns[self.group_col], dtype=np.int64), (n,))
+
+        with self.lock:
+            for name in self.channels:
+                if name not in columns:
+                    continue
+                values = np.broadcast_to(np.asarray(columns[name], dtype=np.float64), (n,))
+                valid = ~np.isnan(values) & (groups >= 0)
+                if valid.any():
+                    self._merge(name, groups[valid], values[valid])
+            if self.window is not None and 'Time' in columns:
+                self._update_windows(np.broadcast_to(columns['Time'], (n,)), columns, n)
+
+    def _merge(self, name, groups, values):
+        state = self._state[name]
+        if groups.max() >= state['count'].size:
+            state = self._state[name] = _grow(state, int(groups.max()) + 1)
+        size = state['count'].size
+
+        # 本批每组的 count / mean / M2 (组内先求均值，再求离差平方和)
+        count_b = np.bincount(groups, minlength=size).astype(np.float64)
+        touched = count_b > 0
+        mean_b = np.zeros_like(count_b)
+        mean_b[touched] = np.bincount(groups, weights=values, minlength=size)[touched] / count_b[touched]
+        m2_b = np.bincount(groups, weights=(values - mean_b[groups]) ** 2, minlength=size)
+
+        # Chan 并行公式合并进已有状态
+        count_a, mean_a = state['count'], state['mean']
+        total = count_a + count_b
+        delta = mean_b - mean_a
+        with np.errstate(invalid='ignore', divide='ignore'):
+            state['mean'] = np.where(touched, mean_a + delta * count_b / total, mean_a)
+            state['m2'] = np.where(touched, state['m2'] + m2_b + delta ** 2 * count_a * count_b / total, state['m2'])
+        state['count'] = total
+        np.fmin.at(state['min'], groups, values)
+        np.fmax.at(state['max'], groups, values)
+
+        # 每组本批最后一个值；EWMA 用闭式一次算完：
+        #   e_new = (1-a)^k * e_old + sum_i a * (1-a)^(k-1-i) * x_i
+        # 从没有过数据的组把第一个值当作 e_old，结果和逐条递推 (第一条直接赋值) 完全一样
+        order = np.argsort(groups, kind='stable')
+        g_sorted = groups[order]
+        starts = np.flatnonzero(np.r_[True, g_sorted[1:] != g_sorted[:-1]])
+        first = order[starts]
+        last = order[np.r_[starts[1:], g_sorted.size] - 1]
+        state['last'][groups[last]] = values[last]
+
+        a = self.ewma_alpha
+        ewma = state['ewma']
+        fresh = np.isnan(ewma[groups[first]])
+        ewma[groups[first][fresh]] = values[first][fresh]
+        pos = np.empty(groups.size, dtype=np.int64)
+        pos[order] = np.arange(groups.size) - np.repeat(starts, np.diff(np.r_[starts, groups.size]))
+        k = count_b[groups]
+        weights = a * (1 - a) ** (k - 1 - pos)
+        state['ewma'] = np.where(touched, (1 - a) ** count_b * ewma + np.bincount(groups, weights=weights * values, minlength=size), ewma)
+
+    def _update_windows(self, times, columns, n):
+        times = np.asarray(times, dtype='datetime64[ns]')
+        ok = ~np.isnat(times)
+        starts = times[ok].astype(np.int64) // self.window.astype(np.int64) * self.window.astype(np.int64)
+        uniq, inverse = np.unique(starts, return_inverse=True)
+        for name in self.channels:
+            if name not in columns:
+                continue
+            values = np.broadcast_to(np.asarray(columns[name], dtype=np.float64), (n,))[ok]
+            valid = ~np.isnan(values)
+            inv, vals = inverse[valid], values[valid]
+            count = np.bincount(inv, minlength=uniq.size)
+            total = np.bincount(inv, weights=vals, minlength=uniq.size)
+            lo = np.full(uniq.size, np.inf)
+            hi = np.full(uniq.size, -np.inf)
+            np.minimum.at(lo, inv, vals)
+            np.maximum.at(hi, inv, vals)
+            for j, start in enumerate(uniq.tolist()):
+                if count[j] == 0:
+                    continue
+                acc = self._windows.setdefault(start, {}).setdefault(name, [0, 0.0, np.inf, -np.inf])
+                acc[0] += int(count[j])
+                acc[1] += float(total[j])
+                acc[2] = min(acc[2], float(lo[j]))
+                acc[3] = max(acc[3], float(hi[j]))
+        # 乱序到达的旧窗口也按起点排好，只保留最近 keep_windows 个
+        if uniq.size and self._windows and next(reversed(self._windows)) != max(self._windows):
+            self._windows = OrderedDict(sorted(self._windows.items()))
+        while len(self._windows) > self.keep_windows:
+            self._windows.popitem(last=False)
+
+    # ---------- 读取 ----------
+    def summary(self, name, group=None):
+        """某通道的统计量字典；没有分组时 group 不用填，有分组时 group=None 表示全部合并。"""
+        with self.lock:
+            state = self._state[name]
+            if group is not None or self.group_col is None:
+                g = 0 if group is None else int(group)
+                if g >= state['count'].size or state['count'][g] == 0:
+                    return _empty_summary()
+                count, mean, m2 = state['count'][g], state['mean'][g], state['m2'][g]
+                lo, hi, last, ewma = state['min'][g], state['max'][g], state['last'][g], state['ewma'][g]
+            else:
+                # 所有分组合并 (各组数量级很小，按组向量化合并)
+                has = state['count'] > 0
+                if not has.any():
+                    return _empty_summary()
+                c, m = state['count'][has], state['mean'][has]
+                count = c.sum()
+                mean = (c * m).sum() / count
+                m2 = (state['m2'][has] + c * (m - mean) ** 2).sum()
+                lo, hi = state['min'][has].min(), state['max'][has].max()
+                last = ewma = np.nan  # 跨组没有“最后一条”的含义
+        var = m2 / (count - 1) if count > 1 else 0.0
+        return {
+            'count': int(count), 'mean': float(mean), 'var': float(var), 'std': float(np.sqrt(var)),
+            'min': float(lo), 'max': float(hi), 'last': float(last), 'ewma': float(ewma),
+        }
+
+    def count(self, name, group=None):
+        return self.summary(name, group)['count']
+
+    def windows(self, name):
+        """各时间窗里该通道的统计 (按窗口起点从旧到新)，最后一行是还没结束的当前窗口。"""
+        with self.lock:
+            rows = [(start, *chans[name]) for start, chans in self._windows.items() if name in chans]
+        if not rows:
+            return pd.DataFrame({'Start': pd.Series(dtype='datetime64[ns]'), 'Count': [], 'Mean': [], 'Min': [], 'Max': []})
+        start, count, total, lo, hi = (np.array(col) for col in zip(*rows))
+        return pd.DataFrame({
+            'Start': start.astype('datetime64[ns]'),
+            'Count': count,
+            'Mean': total / count,
+            'Min': lo,
+            'Max': hi,
+        })
+
+
+def _empty_state(size):
+    return {
+        'count': np.zeros(size),
+        'mean': np.zeros(size),
+        'm2': np.zeros(size),
+        'min': np.full(size, np.nan),
+        'max': np.full(size, np.nan),
+        'last': np.full(size, np.nan),
+        'ewma': np.full(size, np.nan),
+    }
+
+
+def _grow(state, size):
+    grown = _empty_state(size)
+    for key, arr in state.items():
+        grown[key][:arr.size] = arr
+    return grown
+
+
+def _empty_summary():
+    return {'count': 0, 'mean': np.nan, 'var': np.nan, 'std': np.nan,
+            'min': np.nan, 'max': np.nan, 'last': np.nan, 'ewma': np.nan}
@@ -0,0 +1,72 @@
+import threading
+import time
+
+
+# ==========================================
+# 后台采样器：按固定节拍调用采样函数，不占用 Streamlit 的脚本线程
+# ==========================================
+class BackgroundSampler:
+    """
+    在独立线程里每 interval 秒调用一次 sample_fn。
+    节拍按“起始时间 + k * interval”计算，不会因为 sample_fn 本身的耗时而越走越慢；
+    如果某一拍严重超时，直接跳过错过的拍子，而不是事后补跑一大串。
+
+    页面关掉以后 Streamlit 不会通知我们，所以看板每次刷新都要调用 touch()，
+    超过 idle_timeout 秒没人 touch 就自动停下，避免线程泄漏。
+    """
+
+    def __init__(self, sample_fn, interval=0.5, idle_timeout=60.0):
+        self.sample_fn = sample_fn
+        self.interval = interval
+        self.idle_timeout = idle_timeout
+        self.stats = {'ticks': 0, 'skipped': 0, 'max_lateness': 0.0, 'errors': 0}
+        self.last_error = None
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._last_touch = time.monotonic()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        if self.running:
+            return self
+        self._stop.clear()
+        self.touch()
+        self._thread = threading.Thread(target=self._run, name='background-sampler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def touch(self):
+        self._last_touch = time.monotonic()
+
+    def _run(self):
+        start = time.monotonic()
+        k = 0
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if now - self._last_touch > self.idle_timeout:
+                break
+
+            try:
+                self.sample_fn()
+            except Exception as e:
+                self.stats['errors'] += 1
+                self.last_error = e
+            self.stats['ticks'] += 1
+            self.stats['max_lateness'] = max(self.stats['max_lateness'], now - (start + k * self.interval))
+
+            # 计算下一拍的时间点；已经错过的拍子直接跳过
+            k += 1
+            behind = int((time.monotonic() - start) / self.interval) + 1 - k
+            if behind > 0:
+                self.stats['skipped'] += behind
+                k += behind
+            self._stop.wait(max(0.0, start + k * self.interval - time.monotonic()))
@@ -1,63 +1,80 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import time
+import itertools
+import os
 
-
-# ==========================================
-# 第一部分：定义“物理引擎” (Phase 2 新增内容)
-# ==========================================
-
-class VirtualSensor:
-    """
-    模拟真实的物理传感器：具有惯性（不会突变）和噪声。
-    """
-
-    def __init__(self, name, base_value, volatility):
-        self.name = name
-        self.current_value = base_value
-        self.volatility = volatility  # 波动性
-
-    def read_value(self):
-        # 1. 随机游走 (Random Walk): 基于上一次的值进行微小漂移
-        drift = np.random.normal(0, self.volatility)
-        self.current_value += drift
-
-        # 2. 添加测量白噪声 (电子元件的抖动)
-        noise = np.random.normal(0, 0.02)
-        final_value = self.current_value + noise
-
-        # 3. 物理约束 (防止数据跑偏太远)
-        if "pH" in self.name:
-            # pH 被强行限制在 6.0 到 9.0 之间回弹
-            if final_value > 9.0: self.current_value -= 0.1
-            if final_value < 6.0: self.current_value += 0.1
-            final_value = np.clip(final_value, 0, 14)
-        elif "氨氮" in self.name:
-            # 氨氮不能小于0
-            final_value = max(0, final_value)
-
-        return round(final_value, 2)
+from alarms import CRITICAL, AlarmEngine, RateRule, ThresholdRule, ZScoreRule
+from ingest_service import IngestService, publish
+from running_stats import RunningStats
+from sampler import BackgroundSampler
+from telemetry_buffer import TelemetryRing, now
+from telemetry_store import TelemetryStore
+from simulation import SimulationRun
 
 
 # ==========================================
-# 第二部分：初始化系统记忆 (关键！)
+# 第一部分：初始化系统记忆 (关键！)
 # ==========================================
 st.set_page_config(page_title="SNAPP 智慧水务终端", layout="wide")
 
-# 如果系统里还没有传感器，就造两个新的存起来
-if 'sensors' not in st.session_state:
-    st.session_state['sensors'] = {
-        'ph_sensor': VirtualSensor("pH传感器", base_value=7.0, volatility=0.05),
-        'nh3_sensor': VirtualSensor("氨氮传感器", base_value=0.5, volatility=0.02)
-    }
-
-# 如果系统里还没有历史数据，就造一个空的列表
-if 'history_data' not in st.session_state:
-    st.session_state['history_data'] = pd.DataFrame(columns=['Time', 'pH', 'Ammonia'])
+# 本终端的两个传感器：(名称, 初始值, 波动性)
+SENSORS = [("pH传感器", 7.0, 0.05), ("氨氮传感器", 0.5, 0.02)]
+
+# 每个浏览器会话是一个独立的终端，在采集服务里占用自己的站点编号 (从 FIRST_STATION_ID 往后分配)，
+# 不同会话的随机游走不会拼进同一条站点序列，RateRule / ZScoreRule 也就不会在拼接处误报
+FIRST_STATION_ID = 0
+# 共享缓冲区容量 (所有站点合计)
+BUFFER_CAPACITY = 100_000
+# 图表只画所选站点最近这么多条
+CHART_WINDOW = 3600
+
+# 报警规则：采集服务每收到一帧就对所有站点评估一遍
+SENSOR_RULES = [
+    ThresholdRule("pH 超限", 'pH', low=6.0, high=9.0, level=CRITICAL),
+    ThresholdRule("氨氮超标", 'Ammonia', high=1.0, level=CRITICAL),
+    RateRule("pH 突变", 'pH', max_rate=0.5),                       # 每秒变化超过 0.5
+    ZScoreRule("pH 异常波动", 'pH', window=60, z=4.0, persist=2),   # 连续 2 条偏离近 60 条均值 4 倍标准差
+    ZScoreRule("氨氮异常波动", 'Ammonia', window=60, z=4.0, persist=2),
+]
+
+
+# 采集服务：整个进程只起一个，所有会话共用它写入的缓冲区和磁盘遥测库
+@st.cache_resource
+def start_ingest_service():
+    store = TelemetryStore(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'sensors'))
+    buffer = TelemetryRing(['Time', 'Bot', 'pH', 'Ammonia'], capacity=BUFFER_CAPACITY)
+    # 重启后先从磁盘恢复最近一小时 (mmap 只读这一段)
+    recent = store.read_recent('1h', columns=buffer.columns)
+    buffer.extend({name: recent[name].to_numpy() for name in recent.columns})
+    # 按站点维护的增量统计，采集服务每收到一帧就更新，KPI 卡片直接读
+    stats = RunningStats(['pH', 'Ammonia'], group_col='Bot')
+    stats.update({name: recent[name].to_numpy() for name in recent.columns})
+    alarms = AlarmEngine(SENSOR_RULES, group_col='Bot')
+    alarms.evaluate({name: recent[name].to_numpy() for name in recent.columns})
+    return IngestService(buffer, store=store, running_stats=stats, alarms=alarms).start()
+
+
+try:
+    ingest = start_ingest_service()
+except OSError as e:
+    st.error(f"❌ 采集服务启动失败 (端口被占用?): {e}")
+    st.stop()
+
+
+# 站点编号分配器：整个进程一个，从磁盘恢复出来的站点之后接着编，重启后也不会和最近一小时的旧站点撞号
+@st.cache_resource
+def station_ids():
+    with ingest.buffer.lock:
+        restored = ingest.buffer.view('Bot')
+        start = FIRST_STATION_ID if restored.size == 0 else max(FIRST_STATION_ID, int(restored.max()) + 1)
+    return itertools.count(start)
+
+
+if 'station_id' not in st.session_state:
+    st.session_state['station_id'] = next(station_ids())
+STATION_ID = st.session_state['station_id']
 
 # ==========================================
-# 第三部分：页面布局与逻辑
+# 第二部分：页面布局与逻辑
 # ==========================================
 
 st.title("🌊 智慧水务实时监测系统 (Phase 2)")
@@ -65,61 +82,102 @@ st.markdown("集成物理仿真引擎：模拟真实传感器的**随机游走**
 
 # 1. 侧边栏控制
 st.sidebar.header("控制台")
-update_btn = st.sidebar.button("采集一次数据 (模拟 MQTT 接收)")
+update_btn = st.sidebar.button("采集一次数据 (上报到采集服务)")
 auto_run = st.sidebar.checkbox("自动连续采集 (Auto Mode)")
+sample_interval = st.sidebar.number_input("采样间隔 (秒)", min_value=0.05, value=0.5, step=0.05)
+refresh_interval = st.sidebar.number_input("画面刷新间隔 (秒)", min_value=0.2, value=1.0, step=0.2)
+station = st.sidebar.number_input("查看站点编号", min_value=0, value=STATION_ID, step=1,
+                                  help=f"本终端上报到站点 {STATION_ID}")
+seed = st.sidebar.number_input("随机种子 (相同种子 = 相同读数序列)", min_value=0, value=0, step=1)
+
+# 如果系统里还没有传感器 (或换了种子)，就新建一次可复现的仿真运行，两个传感器放在一起采样
+if 'sensor_run' not in st.session_state or st.session_state['sensor_run'].seed != seed:
+    if 'sampler' in st.session_state:
+        st.session_state.pop('sampler').stop()
+    st.session_state['sensor_run'] = SimulationRun(seed, sensors=SENSORS)
+
+
+# 2. 核心逻辑：读取传感器并上报
+def sample_once(run, port, station_id):
+    # 获取新的读数 (两个传感器一次采样)
+    new_ph, new_nh3 = run.step()['sensors']
+
+    # 像真实设备一样把读数打成一帧发给采集服务，由服务写入共享缓冲区并落盘
+    publish({
+        'Time': now(),
+        'Bot': station_id,
+        'pH': new_ph,
+        'Ammonia': new_nh3
+    }, port=port)
+
+
+if update_btn:
+    received = ingest.stats['records']
+    sample_once(st.session_state['sensor_run'], ingest.port, STATION_ID)
+    ingest.wait_for(received + 1, timeout=1.0)
+
+# 自动模式：后台线程按自己的节拍采样，页面不再 sleep + st.rerun 整页重跑
+sampler = st.session_state.get('sampler')
+if auto_run:
+    if sampler is None or not sampler.running or sampler.interval != sample_interval:
+        if sampler is not None:
+            sampler.stop()
+        sensor_run = st.session_state['sensor_run']
+        station_id = STATION_ID
+        sampler = BackgroundSampler(lambda: sample_once(sensor_run, ingest.port, station_id), interval=sample_interval)
+        st.session_state['sampler'] = sampler.start()
+elif sampler is not None:
+    sampler.stop()
+    del st.session_state['sampler']
 
-# 2. 核心逻辑：读取传感器
-# 只要点击了按钮，或者勾选了自动运行，就会执行下面的代码
-if update_btn or auto_run:
-    # 从“记忆”中取出传感器
-    ph_sensor = st.session_state['sensors']['ph_sensor']
-    nh3_sensor = st.session_state['sensors']['nh3_sensor']
-
-    # 获取新的读数 (这一步就在运行你写的 read_value 算法)
-    new_ph = ph_sensor.read_value()
-    new_nh3 = nh3_sensor.read_value()
-    current_time = time.strftime("%H:%M:%S")
-
-    # 把新数据存入历史记录
-    new_row = pd.DataFrame({
-        'Time': [current_time],
-        'pH': [new_ph],
-        'Ammonia': [new_nh3]
-    })
-
-    # 拼接数据 (concat)
-    st.session_state['history_data'] = pd.concat(
-        [st.session_state['history_data'], new_row],
-        ignore_index=True
-    ).tail(30)  # 只保留最近30条数据，防止内存爆炸
-
-    # 如果是自动模式，稍微休息一下，模拟采样间隔
-    if auto_run:
-        time.sleep(0.5)
-        st.rerun()  # 关键：让页面重新刷新，显示新数据
 
 # ==========================================
-# 第四部分：数据可视化 (Dashboard)
+# 第三部分：数据可视化 (Dashboard)
+# 只有这一块按 refresh_interval 局部刷新，页面其它部分不重跑
 # ==========================================
-
-# 准备数据
-df = st.session_state['history_data']
-
-# 只要有数据，就开始画图
-if not df.empty:
-    # 顶栏指标卡 (KPI)
+@st.fragment(run_every=refresh_interval if auto_run else None)
+def live_panel():
+    if 'sampler' in st.session_state:
+        st.session_state['sampler'].touch()
+
+    st.caption(
+        f"采集服务 {ingest.host}:{ingest.port} · 已接收 {ingest.stats['records']} 条 / "
+        f"{ingest.stats['frames']} 帧 · 连接 {ingest.stats['connections']} 次"
+    )
+
+    # 准备数据：从共享缓冲区拷一份快照，只保留所选站点
+    df = ingest.buffer.to_frame(copy=True)
+    df = df[df['Bot'] == station].tail(CHART_WINDOW)
+
+    # 只要有数据，就开始画图
+    if df.empty:
+        st.info("👈 请点击侧边栏的按钮开始采集数据")
+        return
+
+    # 顶栏指标卡 (KPI)：读采集服务维护的增量统计，O(1)
     kpi1, kpi2, kpi3 = st.columns(3)
-    last_ph = df['pH'].iloc[-1]
-    last_nh3 = df['Ammonia'].iloc[-1]
-
-    kpi1.metric("实时 pH", last_ph, delta=round(last_ph - 7.0, 2))
-    kpi2.metric("实时 氨氮 (mg/L)", last_nh3, delta=round(last_nh3 - 0.5, 2), delta_color="inverse")
-
-    # 简单的异常判定逻辑 (Boolean Logic)
+    ph = ingest.running_stats.summary('pH', group=station)
+    nh3 = ingest.running_stats.summary('Ammonia', group=station)
+    last_ph = ph['last']
+    last_nh3 = nh3['last']
+
+    kpi1.metric("实时 pH", last_ph, delta=round(last_ph - 7.0, 2),
+                help=f"累计 {ph['count']} 条 · 均值 {ph['mean']:.2f} ± {ph['std']:.2f} · 范围 {ph['min']:.2f}~{ph['max']:.2f}")
+    kpi2.metric("实时 氨氮 (mg/L)", last_nh3, delta=round(last_nh3 - 0.5, 2), delta_color="inverse",
+                help=f"累计 {nh3['count']} 条 · 均值 {nh3['mean']:.2f} ± {nh3['std']:.2f} · 范围 {nh3['min']:.2f}~{nh3['max']:.2f}")
+
+    # 报警状态：采集服务里的规则引擎维护，这里只读当前处于报警中的规则
+    active = ingest.alarms.active(group=station)
     status = "正常"
-    if last_ph < 6 or last_ph > 9 or last_nh3 > 1.0:
+    if not active.empty:
         status = "⚠️ 异常报警"
-    kpi3.metric("系统状态", status)
+    kpi3.metric("系统状态", status, help="、".join(active['Rule']) or None)
+
+    events = ingest.alarms.events
+    events = events[events['Bot'] == station]
+    if not events.empty:
+        with st.expander(f"报警记录 (最近 {len(events)} 条)"):
+            st.dataframe(events.iloc[::-1], use_container_width=True)
 
     # 绘制折线图
     st.divider()
@@ -133,5 +191,5 @@ if not df.empty:
         st.subheader("氨氮 变化趋势")
         st.line_chart(df.set_index('Time')['Ammonia'], color="#FF0000")  # 红色
 
-else:
-    st.info("👈 请点击侧边栏的按钮开始采集数据")
\ No newline at end of file
+
+live_panel()
@@ -0,0 +1,142 @@
+import sys
+import threading
+import time
+import types
+from collections import OrderedDict, deque
+
+import numpy as np
+import pandas as pd
+
+
+# ==========================================
+# 会话缓存：共享的只读数据 + 每个会话自己的小状态 (按内存记账，超预算按 LRU 逐出)
+# ==========================================
+def freeze(obj):
+    """
+    把 obj 里能找到的 NumPy 数组都标成只读，返回 obj 本身。
+    给 st.cache_resource 返回的共享对象 (几何、模拟数据集) 用：所有会话拿到的是同一份，
+    谁不小心原地改了它会直接报错，而不是悄悄改掉别人的数据。
+    共享对象 (连同里面的容器) 还会登记下来，会话引用到它们时不计入会话内存 (见 nbytes)。
+    """
+    for item in _walk(obj):
+        if isinstance(item, np.ndarray):
+            item.flags.writeable = False
+        if not isinstance(item, _SCALARS):
+            _shared.add(id(item))
+    return obj
+
+
+def nbytes(obj):
+    """
+    估算 obj 占的字节数，不限深度，每个对象只算一次：
+    可写 NumPy 数组按底层内存算 (同一数组的多个视图只算一次)，DataFrame / Series 按 memory_usage 算，
+    列表、字典、普通对象和里面的数字、字符串按 sys.getsizeof 估算。只读数组和 freeze 过的共享对象不算。
+    """
+    seen = set()
+    total = 0
+    for item in _walk(obj):
+        if isinstance(item, np.ndarray):
+            base = item
+            while isinstance(base.base, np.ndarray):
+                base = base.base
+            if base.flags.writeable and id(base) not in seen:
+                seen.add(id(base))
+                total += base.nbytes
+        elif isinstance(item, (pd.DataFrame, pd.Series)):
+            total += int(np.sum(item.memory_usage(index=True, deep=False)))
+        else:
+            total += sys.getsizeof(item)
+            if hasattr(item, '__dict__'):
+                total += sys.getsizeof(vars(item))
+    return total
+
+
+_SCALARS = (int, float, complex, str, bytes, bool, type(None), np.generic)
+_shared = set()  # freeze 过的共享对象的 id (它们跟着 st.cache_resource 活到进程结束)
+
+
+def _walk(obj):
+    """obj 能引用到的所有对象 (用显式的栈，不受递归深度限制)；类、模块、函数和 freeze 过的共享对象不往里走。"""
+    visited = set()
+    stack = [obj]
+    while stack:
+        item = stack.pop()
+        if id(item) in visited or id(item) in _shared:
+            continue
+        visited.add(id(item))
+        if isinstance(item, (type, types.ModuleType, types.FunctionType, types.MethodType)):
+            continue
+        if isinstance(item, np.ndarray):
+            if item.dtype != object:
+                yield item
+            continue
+        yield item
+        if isinstance(item, (pd.DataFrame, pd.Series)):
+            continue
+        if isinstance(item, dict):
+            stack.extend(item.values())
+        elif isinstance(item, (list, tuple, deque, set, frozenset)):
+            stack.extend(item)
+        elif hasattr(item, '__dict__'):
+            stack.extend(vars(item).values())
+
+
+class SessionCache:
+    """
+    进程里所有会话的重状态 (轨迹缓冲区、统计、插值网格等) 放在这里，st.session_state 只存一个键。
+    每次 get() 都重新给这个会话记一次账 (nbytes)，所有会话加起来超过 budget 字节时，
+    从最久没访问的会话开始逐出 (当前会话和 is_pinned(state) 为真的会话除外，例如正在后台自动巡航的)。
+    被逐出的会话下次访问时由 factory() 重建；看板的数据每一步都已经落盘，重建时从磁盘恢复。
+    """
+
+    def __init__(self, budget=512 * 2 ** 20, is_pinned=None):
+        self.budget = int(budget)
+        self.is_pinned = is_pinned
+        self._entries = OrderedDict()  # 键 -> [状态, 字节数, 最近访问时间]，按访问先后排列
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def get(self, key, factory):
+        """取出 (或新建) key 对应的会话状态，并把它挪到 LRU 的最新一端。"""
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            # factory 可能比较慢 (读磁盘)，不占着锁
+            entry = [factory(), 0, 0.0]
+            with self._lock:
+                entry = self._entries.setdefault(key, entry)
+        with self._lock:
+            self._entries.move_to_end(key)
+            entry[1] = nbytes(entry[0])
+            entry[2] = time.time()
+            self._evict(keep=key)
+        return entry[0]
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    @property
+    def total_bytes(self):
+        with self._lock:
+            return sum(entry[1] for entry in self._entries.values())
+
+    def usage(self):
+        """[(键, 字节数, 最近访问时间), ...]，从最久没访问的到最新的。"""
+        with self._lock:
+            return [(key, entry[1], entry[2]) for key, entry in self._entries.items()]
+
+    def _evict(self, keep):
+        total = sum(entry[1] for entry in self._entries.values())
+        for key in list(self._entries):
+            if total <= self.budget:
+                break
+            state, size, _ = self._entries[key]
+            if key == keep or (self.is_pinned is not None and self.is_pinned(state)):
+                continue
+            del self._entries[key]
+            total -= size
+            self.evictions += 1
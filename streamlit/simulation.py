@@ -0,0 +1,131 @@
+import json
+
+import numpy as np
+
+from coverage_planner import CoverageTracker, plan_for
+from fleet_engine import FleetSimulator
+from virtual_sensor import SensorBank
+
+
+# ==========================================
+# 可复现的仿真运行：显式种子 + 独立随机数流 + 步数日志 + 存档点
+# ==========================================
+class SimulationRun:
+    """
+    一次仿真运行 = 种子 + 参数 + 推进的步数 (事件只有“推进一步”一种，记步数就够了)。
+    种子通过 np.random.SeedSequence.spawn 拆成互相独立的随机数流
+    (舰队一条、传感器组一条)，不再用全局 np.random，所以同样的种子和参数
+    一定得到逐位相同的轨迹。
+
+    每 checkpoint_every 步存一个存档点 (状态 + 随机数发生器状态)，最多保留 max_checkpoints 个：
+    超出时按几何间隔稀疏化 (越早的存档点隔得越远，第 0 步和最新的一直保留)，
+    所以 fast_forward(n) 跳到最近的步数只需要补算几步，跳到很早的步数补算得多一些，但内存有上限。
+
+    注意：舰队内部为了向量化，所有机器人共用舰队那一条随机数流 (每一步按固定顺序抽取)，
+    所以可复现的单位是“整支舰队”，改变机器人数量就是另一组参数。
+    """
+
+    def __init__(self, seed=0, lake=None, n_bots=0, sensors=None, checkpoint_every=100,
+                 mode='random', stride=6, max_checkpoints=16):
+        self.seed = int(seed)
+        # sensors: [(名称, 初始值, 波动性), ...]
+        # mode: 'random' = 随机游走，'planned' = 沿覆盖规划路线 (coverage_planner) 每步前进 stride 个航点
+        self.params = {
+            'n_bots': int(n_bots),
+            'sensors': [tuple(s) for s in sensors] if sensors else [],
+            'checkpoint_every': int(checkpoint_every),
+            'max_checkpoints': int(max_checkpoints),
+            'mode': mode,
+            'stride': int(stride),
+        }
+        if mode not in ('random', 'planned'):
+            raise ValueError(f"未知的巡航模式: {mode}")
+        fleet_seed, sensor_seed = np.random.SeedSequence(self.seed).spawn(2)
+
+        self.fleet = None
+        if self.params['n_bots']:
+            if lake is None:
+                raise ValueError("有机器人时必须提供 lake")
+            # 两种模式都按规划用的栅格统计覆盖率，方便对比
+            planner = plan_for(lake)
+            self.fleet = FleetSimulator(
+                lake, n_bots=n_bots, rng=np.random.default_rng(fleet_seed),
+                planner=planner if mode == 'planned' else None, stride=stride,
+                coverage=CoverageTracker(planner.raster),
+            )
+
+        self.sensors = None
+        if self.params['sensors']:
+            names, base_values, volatilities = zip(*self.params['sensors'])
+            self.sensors = SensorBank(names, base_values, volatilities, rng=np.random.default_rng(sensor_seed))
+
+        self.step_count = 0
+        self.checkpoints = {0: self._save()}
+
+    # ---------- 状态存取 ----------
+    def _save(self):
+        return {
+            'fleet': self.fleet.get_state() if self.fleet else None,
+            'sensors': self.sensors.get_state() if self.sensors else None,
+        }
+
+    def _load(self, state):
+        if self.fleet:
+            self.fleet.set_state(state['fleet'])
+        if self.sensors:
+            self.sensors.set_state(state['sensors'])
+
+    # ---------- 推进 ----------
+    def _advance(self):
+        out = {}
+        if self.fleet:
+            self.fleet.step()
+            out['fleet'] = self.fleet.snapshot()
+        if self.sensors:
+            out['sensors'] = self.sensors.read_values()
+        self.step_count += 1
+        if self.step_count % self.params['checkpoint_every'] == 0 and self.step_count not in self.checkpoints:
+            self.checkpoints[self.step_count] = self._save()
+            self._thin_checkpoints()
+        return out
+
+    def _thin_checkpoints(self):
+        """
+        存档点超过上限时去掉一个：删掉后留下的空档相对它离最新一步的距离最小的那个，
+        这样保留下来的存档点间隔大致和离现在的距离成正比 (几何间隔)。
+        """
+        while len(self.checkpoints) > max(self.params['max_checkpoints'], 2):
+            steps = np.array(sorted(self.checkpoints))
+            gaps = (steps[2:] - steps[:-2]) / (steps[-1] - steps[1:-1] + self.params['checkpoint_every'])
+            del self.checkpoints[int(steps[1 + int(np.argmin(gaps))])]
+
+    def step(self):
+        """推进一步，返回 {'fleet': 舰队快照, 'sensors': 各传感器读数}。"""
+        return self._advance()
+
+    def fast_forward(self, target_step):
+        """跳到第 target_step 步：先恢复最近的存档点，再补算剩下的几步。"""
+        if target_step < 0:
+            raise ValueError("target_step 不能为负")
+        base = max(k for k in self.checkpoints if k <= target_step)
+        if base > self.step_count or target_step < self.step_count:
+            self._load(self.checkpoints[base])
+            self.step_count = base
+        while self.step_count < target_step:
+            self._advance()
+
+    # ---------- 回放 ----------
+    def to_json(self):
+        """种子 + 参数 + 步数，足以在别处逐位重放这次运行。"""
+        return json.dumps({'seed': self.seed, 'params': self.params, 'steps': self.step_count}, ensure_ascii=False)
+
+    @classmethod
+    def replay(cls, log_json, lake=None):
+        log = json.loads(log_json)
+        run = cls(log['seed'], lake=lake, **log['params'])
+        # 旧格式的日志是逐步的事件列表
+        steps = log['steps'] if 'steps' in log else sum(event['kind'] == 'step' for event in log['events'])
+        for _ in range(steps):
+            run.step()
+        return run
+
@@ -0,0 +1,142 @@
+import datetime
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+# 所有遥测通道及其存储类型 (两个看板各取自己需要的子集)
+TELEMETRY_COLUMNS = {
+    'Time': 'datetime64[ns]',
+    'Bot': 'int32',
+    'pH': 'float64',
+    'Ammonia': 'float64',
+    'Lat': 'float64',
+    'Lon': 'float64',
+    'DO': 'float64',
+}
+
+
+def now():
+    """当前本地时间，转成环形缓冲区 Time 列使用的 datetime64[ns]。"""
+    return np.datetime64(datetime.datetime.now(), 'ns')
+
+
+# ==========================================
+# 预分配的列式环形缓冲区
+# ==========================================
+class TelemetryRing:
+    """
+    每列一块预先分配好的 NumPy 数组，追加只是写下标，O(1)，不再每次 pd.concat。
+
+    每列实际分配 2 * capacity 的空间，同一条数据同时写在 i 和 i + capacity 两处，
+    这样“最近 size 条”永远是一段连续内存，to_frame() / to_arrow() 可以直接切片，不用拷贝。
+    注意：返回的表是缓冲区的视图，之后继续追加会覆盖里面的旧数据，需要长期保留请自己 .copy()。
+    空间按需翻倍增长到 capacity (每个会话一个缓冲区时，数据少的会话不用先占满整块内存)，
+    preallocate=True 时一开始就分配满。
+    多个线程共用同一个缓冲区时 (例如采集服务在后台写、看板在前台读)，读方用 to_frame(copy=True)，
+    它会在锁内拷贝一份，不会读到写了一半的数据。
+    """
+
+    def __init__(self, columns, capacity=10_000, preallocate=False):
+        if capacity <= 0:
+            raise ValueError("capacity 必须大于 0")
+        self.columns = list(columns)
+        self.capacity = int(capacity)
+        self._cap = self.capacity if preallocate else min(self.capacity, 1024)  # 当前已分配的环长
+        self._data = {
+            name: np.empty(2 * self._cap, dtype=TELEMETRY_COLUMNS[name])
+            for name in self.columns
+        }
+        self._head = 0  # 当前这块空间里累计写入的条数
+        self.size = 0
+        self.lock = threading.RLock()
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def empty(self):
+        return self.size == 0
+
+    @property
+    def nbytes(self):
+        return sum(arr.nbytes for arr in self._data.values())
+
+    def _reserve(self, n):
+        # 放不下新的 n 条又还没到 capacity：翻倍 (至少够放下)，把现有数据搬到新空间开头
+        if self._cap == self.capacity or self.size + n <= self._cap:
+            return
+        cap = min(self.capacity, max(2 * self._cap, self.size + n))
+        data = {}
+        for name, arr in self._data.items():
+            new = np.empty(2 * cap, dtype=arr.dtype)
+            new[:self.size] = self.view(name)
+            new[cap:cap + self.size] = new[:self.size]
+            data[name] = new
+        self._data, self._cap, self._head = data, cap, self.size
+
+    def append(self, row):
+        """追加一条记录，row 是 {列名: 值} 字典，缺失的列留空 (NaN / NaT)。"""
+        with self.lock:
+            self._reserve(1)
+            i = self._head % self._cap
+            for name, arr in self._data.items():
+                value = row.get(name, _missing(arr.dtype))
+                arr[i] = value
+                arr[i + self._cap] = value
+            self._head += 1
+            self.size = min(self.size + 1, self.capacity)
+
+    def extend(self, columns):
+        """批量追加，columns 是 {列名: 数组或标量}，标量会广播到整批。"""
+        n = max((np.size(v) for v in columns.values()), default=0)
+        if n == 0:
+            return
+        # 一次写入超过容量时只有最后 capacity 条会留下来
+        skip = max(0, n - self.capacity)
+        with self.lock:
+            self._reserve(n - skip)
+            pos = (self._head + skip + np.arange(n - skip)) % self._cap
+            for name, arr in self._data.items():
+                values = columns.get(name, _missing(arr.dtype))
+                values = np.broadcast_to(np.asarray(values, dtype=arr.dtype), (n,))[skip:]
+                arr[pos] = values
+                arr[pos + self._cap] = values
+            self._head += n
+            self.size = min(self.size + n, self.capacity)
+
+    def clear(self):
+        with self.lock:
+            self._head = 0
+            self.size = 0
+
+    def view(self, name):
+        """某一列最近 size 条数据的零拷贝切片 (按时间从旧到新)。"""
+        end = (self._head - 1) % self._cap + self._cap + 1
+        return self._data[name][end - self.size:end]
+
+    def last(self, name):
+        return self._data[name][(self._head - 1) % self._cap]
+
+    def to_frame(self, copy=False):
+        """包装成 DataFrame，给 st.line_chart / plotly / pydeck 直接使用；默认零拷贝。"""
+        if self.empty:
+            return pd.DataFrame({name: np.empty(0, dtype=self._data[name].dtype) for name in self.columns})
+        if copy:
+            with self.lock:
+                return pd.DataFrame({name: self.view(name).copy() for name in self.columns}, copy=False)
+        return pd.DataFrame({name: self.view(name) for name in self.columns}, copy=False)
+
+    def to_arrow(self):
+        """零拷贝地包装成 pyarrow.Table (需要安装 pyarrow)。"""
+        import pyarrow as pa
+        return pa.table({name: pa.array(self.view(name)) for name in self.columns})
+
+
+def _missing(dtype):
+    if dtype.kind == 'M':
+        return np.datetime64('NaT')
+    if dtype.kind in 'iu':
+        return -1
+    return np.nan
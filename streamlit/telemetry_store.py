@@ -0,0 +1,119 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+
+# 磁盘上每条记录的定长格式 (机器人和固定传感器共用，缺的通道写 NaN)
+RECORD_DTYPE = np.dtype([
+    ('Time', '<M8[ns]'),
+    ('Bot', '<i4'),
+    ('pH', '<f8'),
+    ('Ammonia', '<f8'),
+    ('DO', '<f8'),
+    ('Lat', '<f8'),
+    ('Lon', '<f8'),
+])
+
+PARTITION_FORMAT = '%Y%m%d-%H'  # 每小时一个分区文件
+
+
+# ==========================================
+# 持久化遥测库：按小时分区的定长二进制日志 + mmap 读取
+# ==========================================
+class TelemetryStore:
+    """
+    只追加的列式遥测库。每小时一个 .bin 文件，文件内容就是 RECORD_DTYPE 的数组，
+    所以读取时直接 np.memmap 打开，用二分查找定位时间窗口，只有窗口内的数据会被读进内存。
+    约定：同一个分区内按时间顺序追加 (每批写入前会先按时间排序)。同一个库的写入由库自己的锁串行，
+    但批与批之间的先后由调用方保证：一个库只给一个写入方用 (比如看板每个会话一个目录)，
+    并且在生成时间戳的同一把锁里调用 append。
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def _partition_path(self, hour):
+        return os.path.join(self.root, pd.Timestamp(hour).strftime(PARTITION_FORMAT) + '.bin')
+
+    def append(self, columns):
+        """批量追加，columns 是 {列名: 数组或标量}，和 TelemetryRing.extend 的参数一样。"""
+        n = max((np.size(v) for v in columns.values()), default=0)
+        if n == 0:
+            return
+        records = np.empty(n, dtype=RECORD_DTYPE)
+        for name in RECORD_DTYPE.names:
+            default = -1 if name == 'Bot' else np.nan
+            records[name] = np.broadcast_to(columns.get(name, default), (n,))
+        records.sort(order='Time', kind='stable')
+
+        # 按小时切分，分别追加到对应的分区文件
+        hours = records['Time'].astype('datetime64[h]')
+        cuts = np.flatnonzero(hours[1:] != hours[:-1]) + 1
+        with self._lock:
+            for chunk in np.split(records, cuts):
+                with open(self._partition_path(chunk['Time'][0]), 'ab') as f:
+                    # 上次写到一半被杀留下的残缺尾巴先截掉，否则后面追加的记录全部错位
+                    size = f.seek(0, os.SEEK_END)
+                    if size % RECORD_DTYPE.itemsize:
+                        f.truncate(size - size % RECORD_DTYPE.itemsize)
+                    f.write(chunk.tobytes())
+
+    def clear(self):
+        """删掉这个库的所有分区文件。"""
+        with self._lock:
+            for name in os.listdir(self.root):
+                if name.endswith('.bin'):
+                    os.remove(os.path.join(self.root, name))
+
+    def partitions(self, start, end):
+        """与 [start, end) 有交集的分区文件，按时间排序。"""
+        first = np.datetime64(start, 'h')
+        last = np.datetime64(end, 'h')
+        paths = []
+        for hour in np.arange(first, last + np.timedelta64(1, 'h'), dtype='datetime64[h]'):
+            path = self._partition_path(hour)
+            if os.path.exists(path) and os.path.getsize(path) > 0:
+                paths.append(path)
+        return paths
+
+    def read_window(self, start, end, columns=None, limit=None):
+        """
+        读取 [start, end) 时间窗口，返回 DataFrame。只有窗口内的数据会从磁盘读出。
+        limit: 最多返回窗口里最新的这么多条 (从最后一个分区往前取，更早的不读)。
+        """
+        start = np.datetime64(start, 'ns')
+        end = np.datetime64(end, 'ns')
+        names = list(columns) if columns is not None else list(RECORD_DTYPE.names)
+
+        chunks = []
+        remaining = limit
+        for path in reversed(self.partitions(start, end)):
+            if remaining is not None and remaining <= 0:
+                break
+            # 只映射完整的记录，丢掉写到一半的尾巴 (进程中途被杀时可能出现)
+            n = os.path.getsize(path) // RECORD_DTYPE.itemsize
+            if n == 0:
+                continue
+            mm = np.memmap(path, dtype=RECORD_DTYPE, mode='r', shape=(n,))
+            times = mm['Time']
+            lo = np.searchsorted(times, start, side='left')
+            hi = np.searchsorted(times, end, side='left')
+            if remaining is not None:
+                lo = max(lo, hi - remaining)
+                remaining -= max(hi - lo, 0)
+            if hi > lo:
+                chunks.append(mm[lo:hi])
+
+        if not chunks:
+            return pd.DataFrame({name: np.empty(0, dtype=RECORD_DTYPE[name]) for name in names})
+        window = np.concatenate(chunks[::-1])
+        return pd.DataFrame({name: window[name] for name in names})
+
+    def read_recent(self, duration, columns=None, limit=None):
+        """读取最近 duration (pd.Timedelta 或字符串，如 '1h') 内的数据，limit 同 read_window。"""
+        end = pd.Timestamp.now()
+        return self.read_window(end - pd.Timedelta(duration), end + pd.Timedelta('1s'), columns, limit)
@@ -0,0 +1,115 @@
+import numpy as np
+
+
+# ==========================================
+# 虚拟传感器“物理引擎”
+# (从 sensor_simulation.py 挪出来，采集服务的压测脚本也要用)
+# ==========================================
+
+# 传感器类型：决定读数的物理约束，建 bank 时根据名字判断一次，之后不再做字符串匹配
+PLAIN, PH, AMMONIA = 0, 1, 2
+
+
+def sensor_kind(name):
+    if "pH" in name:
+        return PH
+    if "氨氮" in name:
+        return AMMONIA
+    return PLAIN
+
+
+class SensorBank:
+    """
+    一组 (M 个) 传感器放在一起批量采样：一次从 np.random.Generator 里抽出
+    M x K 步的漂移和噪声，物理约束全部用数组运算完成，返回 (K, M) 的读数矩阵。
+    规则和原来单个 VirtualSensor 完全一样：
+      - 随机游走 (惯性) + 测量白噪声
+      - pH: 读数超过 9.0 / 低于 6.0 时，内部状态回弹 0.1；读数限制在 0 ~ 14
+      - 氨氮: 读数不能小于 0
+    """
+
+    def __init__(self, names, base_values, volatilities, noise_std=0.02, rng=None):
+        self.names = list(names)
+        self.kinds = np.array([sensor_kind(name) for name in self.names])
+        self.current_values = np.array(base_values, dtype=np.float64)
+        self.volatility = np.array(volatilities, dtype=np.float64)  # 波动性
+        self.noise_std = noise_std
+        self.rng = rng if rng is not None else np.random.default_rng()
+
+        self._ph = np.flatnonzero(self.kinds == PH)
+        self._ammonia = np.flatnonzero(self.kinds == AMMONIA)
+        self._free = np.flatnonzero(self.kinds != PH)
+
+    def __len__(self):
+        return len(self.names)
+
+    def sample(self, n_steps=1):
+        """连续采样 n_steps 步，返回形状为 (n_steps, M) 的读数 (保留两位小数)。"""
+        m = len(self.names)
+        # 1. 一次抽出全部随机数：漂移 (随机游走) 和测量白噪声
+        drift = self.rng.standard_normal((n_steps, m)) * self.volatility
+        noise = self.rng.normal(0, self.noise_std, (n_steps, m))
+
+        state = np.empty((n_steps, m))
+        # 2. 没有回弹规则的传感器，状态就是漂移的累加和
+        if self._free.size:
+            state[:, self._free] = self.current_values[self._free] + np.cumsum(drift[:, self._free], axis=0)
+
+        # 3. pH 的回弹取决于上一步的读数，只能逐步推进 (每一步仍然是所有 pH 传感器一起算)
+        if self._ph.size:
+            d = drift[:, self._ph]
+            e = noise[:, self._ph]
+            s = self.current_values[self._ph].copy()
+            ph_state = np.empty((n_steps, self._ph.size))
+            reading = np.empty(self._ph.size)
+            for k in range(n_steps):
+                s += d[k]
+                ph_state[k] = s
+                np.add(s, e[k], out=reading)
+                np.subtract(s, 0.1, out=s, where=reading > 9.0)
+                np.add(s, 0.1, out=s, where=reading < 6.0)
+            state[:, self._ph] = ph_state
+            self.current_values[self._ph] = s
+
+        if self._free.size:
+            self.current_values[self._free] = state[-1, self._free]
+
+        # 4. 物理约束
+        readings = state + noise
+        readings[:, self._ph] = np.clip(readings[:, self._ph], 0, 14)
+        readings[:, self._ammonia] = np.maximum(readings[:, self._ammonia], 0)
+        return np.round(readings, 2)
+
+    def get_state(self):
+        """内部状态 + 随机数发生器状态，用于存档点和回放。"""
+        return {'current_values': self.current_values.copy(), 'rng': self.rng.bit_generator.state}
+
+    def set_state(self, state):
+        self.current_values = state['current_values'].copy()
+        self.rng.bit_generator.state = state['rng']
+
+    def read_values(self):
+        """采一次，返回每个传感器一个读数 (给当前界面逐次采集用)。"""
+        return self.sample(1)[0]
+
+
+class VirtualSensor:
+    """
+    模拟真实的物理传感器：具有惯性（不会突变）和噪声。
+    内部就是只有一个传感器的 SensorBank，保留原来的单值读取接口。
+    """
+
+    def __init__(self, name, base_value, volatility, rng=None):
+        self.name = name
+        self._bank = SensorBank([name], [base_value], [volatility], rng=rng)
+
+    @property
+    def current_value(self):
+        return float(self._bank.current_values[0])
+
+    @property
+    def volatility(self):
+        return float(self._bank.volatility[0])  # 波动性
+
+    def read_value(self):
+        return float(self._bank.read_values()[0])
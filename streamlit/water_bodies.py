@@ -0,0 +1,192 @@
+import json
+import os
+
+import numpy as np
+import shapely
+from shapely.geometry import shape
+
+from lake_geometry import LakeIndex, file_hash
+
+
+# ==========================================
+# 多水体登记表：一个或多个 GeoJSON 里的所有水面，外包框放进 STRtree
+# ==========================================
+REGISTRY_VERSION = 2
+
+
+def read_water_bodies(geojson_path):
+    """读取 GeoJSON 里所有的面要素，返回 [(名称, shapely 几何), ...]。"""
+    with open(geojson_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+
+    bodies = []
+    for i, feature in enumerate(data['features']):
+        geom = shape(feature['geometry'])
+        if geom.geom_type not in ('Polygon', 'MultiPolygon') or geom.is_empty:
+            continue
+        props = feature.get('properties') or {}
+        name = props.get('name') or props.get('@id') or f"{os.path.basename(geojson_path)}#{i}"
+        bodies.append((name, geom))
+    return bodies
+
+
+class WaterBodyRegistry:
+    """
+    所有水体的登记表。判定一批点在哪个水体里时：
+      1. 先用 STRtree 按外包框找出每个点的候选水体 (大部分水体直接排除)
+      2. 再把点按候选水体分组，交给各自的 LakeIndex 做栅格 + 岸线精确判定
+    水体数量和多边形顶点数再多，每个点实际只和外包框命中的那一两个水体打交道。
+    outlines: 每个水体各块的外轮廓坐标 [[(M, 2) 数组, ...], ...]，从缓存加载时直接给出，不用解析多边形。
+    """
+
+    def __init__(self, names, indexes, outlines=None):
+        self.names = list(names)
+        self.indexes = list(indexes)
+        self.bounds = np.array([idx.bounds for idx in self.indexes], dtype=np.float64).reshape(-1, 4)
+        self.tree = shapely.STRtree(shapely.box(*self.bounds.T))
+        self.outlines = outlines if outlines is not None else [_outlines(idx.polygon) for idx in self.indexes]
+        self._map_paths = None
+
+    def __len__(self):
+        return len(self.names)
+
+    # ---------- 加载 / 缓存 ----------
+    @classmethod
+    def from_geojson(cls, geojson_paths, cache_dir=None, grid_size=128):
+        """加载一个或多个 GeoJSON，每个文件按内容哈希把编译结果缓存成 .npz (GeoJSON 同目录的 .cache/)。"""
+        if isinstance(geojson_paths, str):
+            geojson_paths = [geojson_paths]
+        names, indexes, outlines = [], [], []
+        for path in geojson_paths:
+            file_names, file_indexes, file_outlines = _load_file(path, cache_dir, grid_size)
+            names += file_names
+            indexes += file_indexes
+            outlines += file_outlines
+        return cls(names, indexes, outlines)
+
+    # ---------- 查询 ----------
+    def locate(self, lons, lats):
+        """每个点所在水体的编号，不在任何水体里为 -1。"""
+        lons = np.asarray(lons, dtype=np.float64)
+        lats = np.asarray(lats, dtype=np.float64)
+        result = np.full(lons.shape, -1, dtype=np.int64)
+        if lons.size == 0:
+            return result
+
+        # 1. 外包框粗筛：(点下标, 水体下标) 候选对
+        point_idx, body_idx = self.tree.query(shapely.points(lons, lats))
+        if point_idx.size == 0:
+            return result
+
+        # 2. 按水体分组，每个候选水体只判定落在它外包框里的点
+        order = np.argsort(body_idx, kind='stable')
+        point_idx, body_idx = point_idx[order], body_idx[order]
+        starts = np.flatnonzero(np.r_[True, body_idx[1:] != body_idx[:-1]])
+        ends = np.r_[starts[1:], body_idx.size]
+        for lo, hi in zip(starts, ends):
+            sel = point_idx[lo:hi]
+            inside = self.indexes[body_idx[lo]].contains_many(lons[sel], lats[sel])
+            result[sel[inside]] = body_idx[lo]
+        return result
+
+    def contains_many(self, lons, lats):
+        """和 LakeIndex.contains_many 相同的接口：点是否落在任意一个水体里。"""
+        return self.locate(lons, lats) >= 0
+
+    # ---------- 给舰队和地图用的辅助信息 ----------
+    @property
+    def safe_point(self):
+        """面积 (外包框) 最大的水体里的安全起点。"""
+        areas = (self.bounds[:, 2] - self.bounds[:, 0]) * (self.bounds[:, 3] - self.bounds[:, 1])
+        return self.indexes[int(np.argmax(areas))].safe_point
+
+    def start_points(self, n):
+        """n 台机器人的起点：依次轮流分配到每个水体。"""
+        points = np.array([idx.safe_point for idx in self.indexes])[np.arange(n) % len(self)]
+        return points[:, 0], points[:, 1]
+
+    @property
+    def centroid(self):
+        """所有水体外包框的中心 (lon, lat)，用作地图初始视角。"""
+        return ((self.bounds[:, 0].min() + self.bounds[:, 2].max()) / 2,
+                (self.bounds[:, 1].min() + self.bounds[:, 3].max()) / 2)
+
+    def map_paths(self):
+        """每个水体 (多面体的每一块) 的外轮廓坐标，给 PolygonLayer 描边。只在第一次调用时生成。"""
+        if self._map_paths is None:
+            self._map_paths = [{'name': name, 'path': coords.tolist()}
+                               for name, parts in zip(self.names, self.outlines) for coords in parts]
+        return self._map_paths
+
+
+def _outlines(polygon):
+    return [np.asarray(part.exterior.coords)[:, :2] for part in shapely.get_parts(polygon)]
+
+
+def _load_file(geojson_path, cache_dir, grid_size):
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(geojson_path)), '.cache')
+    stem = os.path.splitext(os.path.basename(geojson_path))[0]
+    path = os.path.join(cache_dir, f"{stem}-{file_hash(geojson_path)[:16]}-bodies.npz")
+
+    if os.path.exists(path):
+        try:
+            return _load_cache(path)
+        except (ValueError, KeyError, OSError):
+            pass  # 缓存损坏或版本过旧，重新编译
+
+    bodies = read_water_bodies(geojson_path)
+    names = [name for name, _ in bodies]
+    indexes = [LakeIndex(geom, grid_size=grid_size) for _, geom in bodies]
+    outlines = [_outlines(geom) for _, geom in bodies]
+    os.makedirs(cache_dir, exist_ok=True)
+    _save_cache(path, names, indexes, outlines)
+    return names, indexes, outlines
+
+
+def _save_cache(path, names, indexes, outlines):
+    # 所有水体的 WKB、栅格和外轮廓各自拼成一整块，再用偏移量切回去
+    wkbs = [shapely.to_wkb(idx.polygon) for idx in indexes]
+    grids = [idx.grid for idx in indexes]
+    parts = [coords for body in outlines for coords in body]
+    tmp = f"{path}.{os.getpid()}.tmp.npz"
+    np.savez(
+        tmp,
+        version=REGISTRY_VERSION,
+        names=np.array(names, dtype=str),
+        wkb_blob=np.frombuffer(b''.join(wkbs), dtype=np.uint8),
+        wkb_offsets=np.cumsum([0] + [len(w) for w in wkbs]),
+        grid_blob=np.concatenate([g.ravel() for g in grids]) if grids else np.empty(0, np.uint8),
+        grid_offsets=np.cumsum([0] + [g.size for g in grids]),
+        grid_shapes=np.array([g.shape for g in grids], dtype=np.int64).reshape(-1, 2),
+        cells=np.array([idx.cell for idx in indexes]),
+        bounds=np.array([idx.bounds for idx in indexes]).reshape(-1, 4),
+        safe_points=np.array([idx.safe_point for idx in indexes]).reshape(-1, 2),
+        outline_blob=np.concatenate(parts) if parts else np.empty((0, 2)),
+        outline_offsets=np.cumsum([0] + [len(c) for c in parts]),
+        outline_counts=np.array([len(body) for body in outlines], dtype=np.int64),
+    )
+    os.replace(tmp, path)
+
+
+def _load_cache(path):
+    with np.load(path) as z:
+        if int(z['version']) != REGISTRY_VERSION:
+            raise ValueError("水体缓存版本不匹配")
+        wkb_blob = z['wkb_blob'].tobytes()
+        wkb_offsets, grid_blob, grid_offsets = z['wkb_offsets'], z['grid_blob'], z['grid_offsets']
+        indexes = [
+            LakeIndex.from_arrays(
+                wkb_blob[wkb_offsets[i]:wkb_offsets[i + 1]],
+                z['bounds'][i],
+                z['cells'][i],
+                grid_blob[grid_offsets[i]:grid_offsets[i + 1]].reshape(z['grid_shapes'][i]),
+                z['safe_points'][i],
+            )
+            for i in range(len(z['names']))
+        ]
+        outline_blob, outline_offsets = z['outline_blob'], z['outline_offsets']
+        parts = [outline_blob[outline_offsets[j]:outline_offsets[j + 1]] for j in range(len(outline_offsets) - 1)]
+        bounds = np.cumsum(np.r_[0, z['outline_counts']])
+        outlines = [parts[bounds[i]:bounds[i + 1]] for i in range(len(z['names']))]
+        return z['names'].tolist(), indexes, outlines
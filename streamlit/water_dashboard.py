@@ -1,12 +1,23 @@
 import streamlit as st
-import pandas as pd
 import numpy as np
 import pydeck as pdk
 import plotly.express as px
-from shapely.geometry import Point, shape
-import json
-import time
+import glob
 import os
+import threading
+import uuid
+from types import SimpleNamespace
+
+from alarms import CRITICAL, AlarmEngine, ThresholdRule, ZScoreRule
+from interpolation import IDWGrid, png_data_url
+from lod import MAX_TABLE_ROWS, grid_thin, timeseries_lod
+from running_stats import RunningStats
+from sampler import BackgroundSampler
+from session_cache import SessionCache, freeze
+from simulation import SimulationRun
+from telemetry_buffer import TelemetryRing, now
+from telemetry_store import TelemetryStore
+from water_bodies import WaterBodyRegistry
 
 # 1. 基础页面配置
 st.set_page_config(
@@ -38,90 +49,150 @@ set_apple_icon(ICON_URL)
 # ==========================================
 # 2. 地图加载 (修改版：自动定位文件路径)
 # ==========================================
-@st.cache_data
+# 几何只在进程里加载一次，所有会话共用 (cache_resource 不会每次命中都拷贝一份)
+@st.cache_resource
 def load_lake_boundary():
     try:
         # 1. 获取当前脚本 (water_dashboard.py) 所在的绝对目录
         current_dir = os.path.dirname(os.path.abspath(__file__))
-        # 2. 拼接出 geojson 文件的完整路径
-        geojson_path = os.path.join(current_dir, 'qizhen_lake.geojson')
-
-        # 3. 打开文件
-        with open(geojson_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        max_area = 0
-        lake_polygon = None
-        for feature in data['features']:
-            geom = shape(feature['geometry'])
-            if geom.area > max_area:
-                max_area = geom.area
-                lake_polygon = geom
-        return lake_polygon
-    except FileNotFoundError:
-        st.error(f"❌ 找不到文件: {geojson_path}")
+        # 2. 目录下所有 GeoJSON 里的每一个水面都加载进来 (不再只保留面积最大的那个)
+        geojson_paths = sorted(glob.glob(os.path.join(current_dir, '*.geojson')))
+        if not geojson_paths:
+            raise FileNotFoundError(os.path.join(current_dir, '*.geojson'))
+
+        # 3. 每个文件的编译结果 (含地图描边坐标) 按内容哈希缓存在 .cache/ 下，GeoJSON 没变就直接读 .npz
+        # 所有会话共用同一份，数组标成只读，防止哪个会话原地改了别人的几何
+        registry = WaterBodyRegistry.from_geojson(geojson_paths)
+        registry.map_paths()  # 地图描边在这里生成一次，之后每次重跑都直接取
+        return freeze(registry)
+    except FileNotFoundError as e:
+        st.error(f"❌ 找不到文件: {e}")
         st.stop()
     except Exception as e:
         st.error(f"❌ 读取文件出错: {e}")
         st.stop()
 
-LAKE_POLYGON = load_lake_boundary()
+WATER_BODIES = load_lake_boundary()
+LAKE_PATHS_FOR_MAP = WATER_BODIES.map_paths()
+
+
+# 水质插值网格：湖内掩膜只算一次，每个会话拿一份空白副本各自累加样本
+@st.cache_resource
+def build_quality_grid():
+    return freeze(IDWGrid(WATER_BODIES, channels=('DO', 'pH'), max_cells=500))
 
-if LAKE_POLYGON.geom_type == 'Polygon':
-    x, y = LAKE_POLYGON.exterior.coords.xy
-    LAKE_COORDS_FOR_MAP = [[lon, lat] for lon, lat in zip(x, y)]
-else:
-    x, y = max(LAKE_POLYGON.geoms, key=lambda a: a.area).exterior.coords.xy
-    LAKE_COORDS_FOR_MAP = [[lon, lat] for lon, lat in zip(x, y)]
+# 插值图层的色带：(通道, 下限, 上限, 颜色)
+QUALITY_LAYERS = {
+    "溶解氧 (DO)": ('DO', 0.0, 12.0, [(215, 48, 39), (254, 224, 139), (26, 152, 80)]),
+    "pH": ('pH', 6.0, 9.0, [(215, 48, 39), (26, 152, 80), (69, 117, 180)]),
+}
 
 # ==========================================
 # 3. 机器人逻辑
 # ==========================================
-class CampusBot:
-    def __init__(self):
-        safe_pt = LAKE_POLYGON.representative_point()
-        self.lat = safe_pt.y
-        self.lon = safe_pt.x
-        self.ph = 7.1
-        self.do = 6.5
-
-    def move(self):
-        for _ in range(15):
-            d_lat = np.random.normal(0, 0.0003)
-            d_lon = np.random.normal(0, 0.0003)
-            temp_lat = self.lat + d_lat
-            temp_lon = self.lon + d_lon
-
-            if LAKE_POLYGON.contains(Point(temp_lon, temp_lat)):
-                self.lat = temp_lat
-                self.lon = temp_lon
-                self.ph += np.random.normal(0, 0.1)
-                self.ph = np.clip(self.ph, 5.0, 9.0)
-                self.do += np.random.normal(0, 0.2)
-                self.do = np.clip(self.do, 0.5, 12.0)
-                break
-
-        return {
-            'Time': time.strftime("%H:%M:%S"),
-            'Lat': self.lat,
-            'Lon': self.lon,
-            'pH': round(self.ph, 2),
-            'DO': round(self.do, 2)
-        }
-
-def generate_report(df):
-    if df.empty: return "暂无数据"
-    avg_do = df['DO'].mean()
-    status = "🟢 水质优良" if avg_do >= 5.0 else "🟡 轻度缺氧" if avg_do >= 3.0 else "🔴 严重缺氧"
-    return f"**状态**: {status}\n\n平均DO: `{avg_do:.2f}` | 平均pH: `{df['pH'].mean():.2f}`"
+# 单台机器人的逐点游走已经换成 fleet_engine.FleetSimulator，
+# 这里按控制面板设置的数量和随机种子创建一次可复现的仿真运行 (simulation.SimulationRun)
+# 机器人轮流分配到各个水体，湖内判定由 WaterBodyRegistry 按外包框路由到候选水体
+# 规划覆盖模式下机器人沿 coverage_planner 预先规划好的割草机式路线巡航 (每个湖只规划一次)
+CRUISE_MODES = {"随机游走": 'random', "规划覆盖": 'planned'}
+
+def create_run(n_bots, seed, mode='random'):
+    return SimulationRun(seed, lake=WATER_BODIES, n_bots=n_bots, mode=mode)
+
+# 报警规则：每一步对整支舰队的每台机器人评估 (alarms.AlarmEngine)
+DO_WARNING_RULE, DO_CRITICAL_RULE = "轻度缺氧", "严重缺氧"
+FLEET_RULES = [
+    ThresholdRule(DO_WARNING_RULE, 'DO', low=5.0),
+    ThresholdRule(DO_CRITICAL_RULE, 'DO', low=3.0, level=CRITICAL),
+    ThresholdRule("pH 超限", 'pH', low=6.0, high=9.0, level=CRITICAL),
+    ZScoreRule("DO 异常波动", 'DO', window=60, z=4.0, persist=2),
+]
+
+# 报告直接读增量统计 (running_stats.RunningStats) 和报警引擎的当前状态，不再每次重跑都对整个历史求平均
+def generate_report(stats, alarms):
+    do, ph = stats.summary('DO'), stats.summary('pH')
+    if do['count'] == 0: return "暂无数据"
+    active = alarms.active()
+    n_critical = active.loc[active['Rule'] == DO_CRITICAL_RULE, 'Bot'].nunique()
+    n_warning = active.loc[active['Rule'] == DO_WARNING_RULE, 'Bot'].nunique()
+    status = (f"🔴 严重缺氧 ({n_critical} 台)" if n_critical else
+              f"🟡 轻度缺氧 ({n_warning} 台)" if n_warning else "🟢 水质优良")
+    report = f"**状态**: {status}\n\n平均DO: `{do['mean']:.2f}` | 平均pH: `{ph['mean']:.2f}`"
+    recent = stats.windows('DO')
+    if not recent.empty:
+        report += f"\n\n本分钟 DO: `{recent['Mean'].iloc[-1]:.2f}` (最低 `{recent['Min'].iloc[-1]:.2f}`)"
+    others = active[~active['Rule'].isin([DO_WARNING_RULE, DO_CRITICAL_RULE])]
+    if not others.empty:
+        report += "\n\n⚠️ 其它报警: " + "、".join(f"{rule} {n} 台" for rule, n in others.groupby('Rule')['Bot'].nunique().items())
+    return report
 
 # ==========================================
 # 4. 页面布局
 # ==========================================
-if 'bot' not in st.session_state:
-    st.session_state.bot = CampusBot()
-if 'history' not in st.session_state:
-    st.session_state.history = pd.DataFrame(columns=['Time', 'Lat', 'Lon', 'pH', 'DO'])
+# 每个会话的轨迹落盘到自己的目录 data/fleet/<会话键>，重启或会话被回收后只恢复自己的数据，
+# 不同会话的机器人编号 (都从 0 开始) 不会混在一起
+FLEET_ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'fleet')
+
+def open_telemetry_store(session_key):
+    return TelemetryStore(os.path.join(FLEET_ROOT, session_key))
+
+# 历史轨迹存进环形缓冲区，追加是 O(1)，不再每次 pd.concat
+HISTORY_CAPACITY = 100_000
+# 所有会话的状态合计最多占这么多内存，超出后最久没访问的会话被回收 (正在自动巡航的除外)
+SESSION_BUDGET = 512 * 2 ** 20
+
+
+# 每个会话自己的状态：只有本会话的舰队、轨迹和在它上面累加的统计；湖面几何、插值掩膜等只读数据所有会话共用
+def new_session(session_key):
+    store = open_telemetry_store(session_key)
+    history = TelemetryRing(['Time', 'Lat', 'Lon', 'pH', 'DO'], capacity=HISTORY_CAPACITY)
+    # 从本会话的目录恢复最近一小时的轨迹，最多恢复缓冲区装得下的条数 (mmap 只读这一段)
+    recent = store.read_recent('1h', columns=['Time', 'Bot', 'Lat', 'Lon', 'pH', 'DO'], limit=HISTORY_CAPACITY)
+    recent = {name: recent[name].to_numpy() for name in recent.columns}
+    history.extend(recent)
+    stats = RunningStats(['pH', 'DO'], window='1min')
+    stats.update(recent)
+    alarms = AlarmEngine(FLEET_RULES, group_col='Bot')
+    alarms.evaluate(recent)
+    quality_grid = build_quality_grid().fresh()
+    quality_grid.update(recent)
+    return SimpleNamespace(run=create_run(1, 0), store=store, history=history, stats=stats, alarms=alarms,
+                           quality_grid=quality_grid, cruise_lock=threading.Lock(), sampler=None)
+
+
+@st.cache_resource
+def open_session_cache():
+    return SessionCache(SESSION_BUDGET, is_pinned=lambda s: s.sampler is not None and s.sampler.running)
+
+SESSIONS = open_session_cache()
+
+# st.session_state 里只放一个键，重状态放在进程级的 SessionCache 里记账
+if 'session_key' not in st.session_state:
+    st.session_state.session_key = uuid.uuid4().hex
+elif st.session_state.session_key not in SESSIONS:
+    st.toast("本会话闲置期间被回收，已从磁盘恢复最近一小时的数据")
+SESSION_KEY = st.session_state.session_key
+session = SESSIONS.get(SESSION_KEY, lambda: new_session(SESSION_KEY))
+
+
+# 巡航一步：整支舰队一次向量化推进，每台机器人一条记录，整批写入缓冲区并落盘
+# 按钮和后台自动巡航共用这一个函数，用锁保证同一时间只有一边在推进舰队；
+# 落盘也在锁里，分区文件才能按时间顺序追加
+def cruise_step(run, store, history, stats, alarms, grid, lock):
+    with lock:
+        snap = {'Time': now(), 'Bot': np.arange(run.fleet.n_bots), **run.step()['fleet']}
+        history.extend(snap)
+        stats.update(snap)
+        alarms.evaluate(snap)
+        grid.update(snap)
+        store.append(snap)
+
+
+def stop_auto_cruise():
+    sampler, session.sampler = session.sampler, None
+    if sampler is not None:
+        sampler.stop()
+
 
 st.title("🎓 浙大紫金港·智慧水务控制台")
 
@@ -129,52 +200,123 @@ col_left, col_right = st.columns([1, 2])
 
 with col_left:
     st.subheader("🕹️ 控制面板")
+    n_bots = st.number_input("机器人数量", min_value=1, max_value=10000, value=1, step=1)
+    seed = st.number_input("随机种子 (相同种子 = 相同轨迹)", min_value=0, value=0, step=1)
+    cruise_mode = CRUISE_MODES[st.radio("巡航模式", list(CRUISE_MODES), horizontal=True)]
+    run = session.run
+    if run.params['n_bots'] != n_bots or run.seed != seed or run.params['mode'] != cruise_mode:
+        stop_auto_cruise()
+        session.run = create_run(n_bots, seed, cruise_mode)
+
     if st.button("🚀 启动巡航 (10点)", type="primary"):
-        progress = st.progress(0)
-        temp_data = []
         for i in range(10):
-            pt = st.session_state.bot.move()
-            temp_data.append(pt)
-            progress.progress((i + 1) / 10)
-            time.sleep(0.05)
-        st.session_state.history = pd.concat([st.session_state.history, pd.DataFrame(temp_data)], ignore_index=True)
+            cruise_step(session.run, session.store, session.history, session.stats,
+                        session.alarms, session.quality_grid, session.cruise_lock)
         st.success("已更新")
 
+    # 自动巡航：后台线程按节拍推进舰队，页面只局部刷新地图和图表
+    auto_cruise = st.checkbox("自动巡航 (Auto Mode)")
+    step_interval = st.number_input("巡航步进间隔 (秒)", min_value=0.05, value=0.5, step=0.05)
+    refresh_interval = st.number_input("画面刷新间隔 (秒)", min_value=0.2, value=1.0, step=0.2)
+    # 地图按缩放级别聚合轨迹点，级别越高格子越细
+    map_zoom = st.slider("地图缩放级别", min_value=13, max_value=19, value=16)
+    # 按已有样本做反距离加权插值，铺满整个湖面
+    quality_layer = st.radio("水质插值图层", ["无"] + list(QUALITY_LAYERS), horizontal=True)
+    sampler = session.sampler
+    if auto_cruise:
+        if sampler is None or not sampler.running or sampler.interval != step_interval:
+            stop_auto_cruise()
+            run, store, history, lock = session.run, session.store, session.history, session.cruise_lock
+            stats, alarms, grid = session.stats, session.alarms, session.quality_grid
+            sampler = BackgroundSampler(lambda: cruise_step(run, store, history, stats, alarms, grid, lock),
+                                        interval=step_interval)
+            session.sampler = sampler.start()
+    else:
+        stop_auto_cruise()
+    live_every = refresh_interval if auto_cruise else None
+
     if st.button("🗑️ 清空数据"):
-        st.session_state.history = pd.DataFrame(columns=['Time', 'Lat', 'Lon', 'pH', 'DO'])
+        # 磁盘上本会话的记录也一起删掉，否则会话被回收后又会恢复回来
+        with session.cruise_lock:
+            session.store.clear()
+        session.history.clear()
+        session.stats.reset()
+        session.alarms.reset()
+        session.quality_grid.reset()
         st.rerun()
 
+    # 种子 + 参数 + 步数，拿去用 SimulationRun.replay() 可以逐位重放本次巡航 (点下载时才生成)
+    def run_log():
+        with session.cruise_lock:
+            return session.run.to_json()
+    st.download_button("💾 下载回放日志", run_log, file_name=f"cruise_seed{seed}.json", mime="application/json")
+
     st.divider()
-    st.info(generate_report(st.session_state.history))
 
-with col_right:
-    df = st.session_state.history
+    @st.fragment(run_every=live_every)
+    def report_panel():
+        st.info(generate_report(session.stats, session.alarms))
+        # 覆盖率：湖面栅格 (5 米一格) 里已经采过样的格子占比
+        coverage = session.run.fleet.coverage
+        with session.cruise_lock:
+            ticks, fractions = zip(*coverage.history) if coverage.history else ((), ())
+        st.metric("湖面覆盖率", f"{coverage.fraction:.1%}", help=f"已采样 {coverage.n_visited} / {coverage.raster.n_water} 格")
+        if len(ticks) > 1:
+            st.line_chart({'步数': ticks, '覆盖率 (%)': np.asarray(fractions) * 100}, x='步数', height=150)
+        events = session.alarms.events
+        if not events.empty:
+            with st.expander(f"报警记录 (最近 {len(events)} 条)"):
+                st.dataframe(events.iloc[::-1], use_container_width=True)
+        # 内存记账：每次刷新重新计一次本会话的占用 (轨迹缓冲区按需增长)，顺便按 LRU 回收超出预算的闲置会话
+        SESSIONS.get(SESSION_KEY, lambda: new_session(SESSION_KEY))
+        usage = SESSIONS.usage()
+        mine = next(size for key, size, _ in usage if key == SESSION_KEY)
+        st.caption(f"本会话占用 {mine / 2 ** 20:.1f} MB · 全部 {len(usage)} 个会话 "
+                   f"{sum(size for _, size, _ in usage) / 2 ** 20:.1f} / {SESSION_BUDGET / 2 ** 20:.0f} MB")
+
+    report_panel()
+
+
+@st.fragment(run_every=live_every)
+def live_view():
+    if session.sampler is not None:
+        session.sampler.touch()
+    df = session.history.to_frame(copy=True)
     st.subheader("📍 实时轨迹追踪")
 
     # 地图部分
     layers = [
-        pdk.Layer("PolygonLayer", data=[{"path": LAKE_COORDS_FOR_MAP}], get_polygon="path",
+        pdk.Layer("PolygonLayer", data=LAKE_PATHS_FOR_MAP, get_polygon="path",
                   get_fill_color=[0, 100, 255, 40], get_line_color=[0, 100, 255, 150], line_width_min_pixels=1,
                   pickable=False)
     ]
+    grid = session.quality_grid
+    if quality_layer in QUALITY_LAYERS and grid.n_samples:
+        channel, vmin, vmax, colors = QUALITY_LAYERS[quality_layer]
+        with session.cruise_lock:
+            rgba = grid.to_rgba(channel, vmin, vmax, colors)
+        layers.append(pdk.Layer("BitmapLayer", data=None, image=png_data_url(rgba), bounds=grid.bitmap_bounds(),
+                                pickable=False))
     if not df.empty:
-        layers.append(pdk.Layer("ScatterplotLayer", data=df, get_position='[Lon, Lat]', get_color='[255, 69, 0, 200]',
+        # 不管历史多长，地图上最多只发 MAX_MAP_POINTS 个聚合点
+        map_points = grid_thin(df, 'Lon', 'Lat', 'DO', zoom=map_zoom)
+        layers.append(pdk.Layer("ScatterplotLayer", data=map_points, get_position='[Lon, Lat]', get_color='[255, 69, 0, 200]',
                                 get_radius=5, radius_min_pixels=3, pickable=True))
 
     st.pydeck_chart(pdk.Deck(
         map_style='light',
-        initial_view_state=pdk.ViewState(latitude=LAKE_POLYGON.centroid.y, longitude=LAKE_POLYGON.centroid.x, zoom=16),
+        initial_view_state=pdk.ViewState(latitude=WATER_BODIES.centroid[1], longitude=WATER_BODIES.centroid[0], zoom=map_zoom),
         layers=layers,
-        tooltip={"text": "DO: {DO}"}
+        tooltip={"text": "DO: {DO}\n样本数: {Count}"}
     ))
 
-    # 图表部分
+    # 图表部分：按时间取舰队平均后用 LTTB 降采样，每条线最多 MAX_CHART_POINTS 个点
     if not df.empty:
         st.divider()
         chart_c1, chart_c2 = st.columns(2)
 
         with chart_c1:
-            fig_ph = px.area(df, x='Time', y='pH', title="pH 趋势", markers=True)
+            fig_ph = px.area(timeseries_lod(df, 'Time', ['pH']), x='Time', y='pH', title="pH 趋势", markers=True)
             fig_ph.update_traces(line_color='#3498db', fillcolor='rgba(52, 152, 219, 0.2)')
             fig_ph.update_layout(
                 xaxis=dict(showgrid=False, nticks=5),
@@ -186,7 +328,7 @@ with col_right:
             st.plotly_chart(fig_ph, use_container_width=True)
 
         with chart_c2:
-            fig_do = px.area(df, x='Time', y='DO', title="溶解氧 (DO) 趋势", markers=True)
+            fig_do = px.area(timeseries_lod(df, 'Time', ['DO']), x='Time', y='DO', title="溶解氧 (DO) 趋势", markers=True)
             fig_do.update_traces(line_color='#2ecc71', fillcolor='rgba(46, 204, 113, 0.2)')
             fig_do.update_layout(
                 xaxis=dict(showgrid=False, nticks=5),
@@ -197,6 +339,10 @@ with col_right:
             )
             st.plotly_chart(fig_do, use_container_width=True)
 
-if not df.empty:
-    with st.expander("查看原始数据"):
-        st.dataframe(df.sort_values("Time", ascending=False), use_container_width=True)
\ No newline at end of file
+    if not df.empty:
+        with st.expander(f"查看原始数据 (最近 {MAX_TABLE_ROWS} 条)"):
+            st.dataframe(df.tail(MAX_TABLE_ROWS).iloc[::-1], use_container_width=True)
+
+
+with col_right:
+    live_view()